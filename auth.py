@@ -2,15 +2,19 @@
 Authentication module for JWT-based user authentication
 """
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import SessionLocal, get_db, get_async_db
+import counters
 import models
 import schemas
+import hashing
+from cache import TTLCache
 
 
 # Import settings for JWT configuration
@@ -21,32 +25,81 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing and JWT libraries load on first use (or in the startup warm-up), not at import
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def warm_up_hashing() -> None:
+    """Build the CryptContext and load and self-test its bcrypt backend"""
+    get_pwd_context().handler("bcrypt").get_backend()
+
+
+def warm_up_tokens() -> None:
+    """Import python-jose"""
+    from jose import jwt  # noqa: F401
 
 # OAuth2 scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Authenticated users keyed by token subject (user id)
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+def _hash_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+def _run_in_hash_pool(fn, *args):
+    """Run a bcrypt operation on the bounded hashing pool, failing fast when it is full"""
+    try:
+        return hashing.pool.run(fn, *args)
+    except hashing.PoolSaturated:
+        raise _hash_pool_busy()
+
+
+async def _run_in_hash_pool_async(fn, *args):
+    """Await a bcrypt operation on the bounded hashing pool without holding a request thread"""
+    try:
+        return await hashing.pool.run_async(fn, *args)
+    except hashing.PoolSaturated:
+        raise _hash_pool_busy()
+
+
+def _bcrypt_input(password: str) -> str:
+    # Truncate password to 72 bytes to comply with bcrypt limitation
+    if len(password.encode('utf-8')) > 72:
+        password = password.encode('utf-8')[:72].decode('utf-8', errors='ignore')
+    return password
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    # Truncate password to 72 bytes to comply with bcrypt limitation
-    if len(plain_password.encode('utf-8')) > 72:
-        plain_password = plain_password.encode('utf-8')[:72].decode('utf-8', errors='ignore')
-    return pwd_context.verify(plain_password, hashed_password)
+    return _run_in_hash_pool(get_pwd_context().verify, _bcrypt_input(plain_password), hashed_password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash (for `async def` endpoints)"""
+    return await _run_in_hash_pool_async(get_pwd_context().verify, _bcrypt_input(plain_password), hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password (bcrypt has 72 byte limit)"""
-    # Truncate password to 72 bytes to comply with bcrypt limitation
     # This is a safety measure - validation should happen at schema level
-    if len(password.encode('utf-8')) > 72:
-        password = password.encode('utf-8')[:72].decode('utf-8', errors='ignore')
-    return pwd_context.hash(password)
+    return _run_in_hash_pool(get_pwd_context().hash, _bcrypt_input(password))
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
+    from jose import jwt
+
     to_encode = data.copy()
     
     if expires_delta:
@@ -77,12 +130,34 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[models
     if not user:
         return None
     
+    # End the read before bcrypt so its connection goes back to the pool meanwhile
+    user = _detached_user(user)
+    db.rollback()
+    
     if not verify_password(password, user.hashed_password):
         return None
     
     return user
 
 
+async def authenticate_user_async(db: AsyncSession, email: str, password: str) -> Optional[models.User]:
+    """Authenticate user with email and password over the AsyncSession"""
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    user = result.scalars().first()
+    
+    if not user:
+        return None
+    
+    # Release the connection before awaiting bcrypt, which can queue behind a burst
+    user = _detached_user(user)
+    await db.close()
+    
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    
+    return user
+
+
 def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     """Create a new user"""
     # Check if user already exists
@@ -98,6 +173,9 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
             detail="Username already taken"
         )
     
+    # End the lookups' transaction so no connection is held while bcrypt runs
+    db.rollback()
+    
     # Create new user
     hashed_password = get_password_hash(user.password)
     db_user = models.User(
@@ -115,32 +193,162 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     return db_user
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> models.User:
-    """Get current user from JWT token"""
-    credentials_exception = HTTPException(
+async def create_user_async(db: AsyncSession, user: schemas.UserCreate) -> models.User:
+    """Create a new user over the AsyncSession"""
+    result = await db.execute(select(models.User.email, models.User.username).where(
+        (models.User.email == user.email) | (models.User.username == user.username)))
+    taken = result.all()
+    if any(row.email == user.email for row in taken):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    
+    if taken:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already taken"
+        )
+    
+    # Release the connection before awaiting bcrypt
+    await db.close()
+    
+    hashed_password = await _run_in_hash_pool_async(get_pwd_context().hash, _bcrypt_input(user.password))
+    db_user = models.User(
+        username=user.username,
+        email=user.email,
+        hashed_password=hashed_password,
+        role=user.role,
+        full_name=user.full_name
+    )
+    
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    
+    return db_user
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def decode_token_subject(token: str) -> str:
+    """Return the user id (`sub`) from a JWT, or raise 401"""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
-        
-        if user_id is None:
-            raise credentials_exception
-            
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    
+    if user_id is None:
+        raise _credentials_exception()
+    
+    return user_id
+
+
+def _detached_user(user: models.User) -> models.User:
+    """Session-independent copy of a user row, safe to share between requests"""
+    return models.User(**{column.key: getattr(user, column.key) for column in models.User.__table__.columns})
+
+
+# ========== USER CACHE INVALIDATION ==========
+# Writes queue the user ids in session.info and evict them once the transaction
+# commits, not at flush, when other requests could still read and re-cache the
+# old row. A request that read the user before the commit and caches it after
+# the eviction would put the old row back, so lookups read user_cache.generation
+# before their query and pass it to set(): every eviction and clear advances it,
+# and set() drops values read under an older generation. Each write also bumps
+# USER_CACHE_COUNTER in its transaction; every worker polls it
+# (check_user_cache_version, USER_CACHE_POLL_SECONDS) and clears its cache when
+# it moves, so a deactivation reaches the other workers within one interval.
+USER_CACHE_COUNTER = "user_cache"
+_PENDING_USERS = "user_cache_pending"
+_ALL_USERS = object()  # Queued by bulk writes: clear the whole cache
+_seen_version: Optional[int] = None
+
+
+def _queue_invalidation(session: Optional[Session], user_id) -> None:
+    if session is None:
+        user_cache.invalidate(user_id)
+        return
+    session.info.setdefault(_PENDING_USERS, set()).add(user_id)
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _user_written(mapper, connection, target):
+    counters.bump(connection, USER_CACHE_COUNTER, 1)
+    _queue_invalidation(object_session(target), target.id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_user_written(orm_execute_state):
+    # Query.update()/delete() bypass the per-instance events above
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        if any(mapper.class_ is models.User for mapper in orm_execute_state.all_mappers):
+            session = orm_execute_state.session
+            counters.bump(session.connection(), USER_CACHE_COUNTER, 1)
+            _queue_invalidation(session, _ALL_USERS)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    pending = session.info.pop(_PENDING_USERS, None)
+    if not pending:
+        return
+    if _ALL_USERS in pending:
+        user_cache.clear()
+        return
+    for user_id in pending:
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_users(session):
+    session.info.pop(_PENDING_USERS, None)
+
+
+def check_user_cache_version() -> bool:
+    """Clear the user cache if another worker changed users since the last check; True if cleared"""
+    global _seen_version
+    db = SessionLocal()
+    try:
+        version = counters.read(db, [USER_CACHE_COUNTER])[USER_CACHE_COUNTER]
+    finally:
+        db.close()
+    previous, _seen_version = _seen_version, version
+    if previous is None or version == previous:
+        return False
+    user_cache.clear()
+    return True
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> models.User:
+    """Get current user from JWT token (sync; FastAPI runs it in the threadpool)"""
+    user_id = decode_token_subject(token)
+    
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
     
+    generation = user_cache.generation
     user = db.query(models.User).filter(models.User.id == user_id).first()
     
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
+    user = _detached_user(user)
+    user_cache.set(user_id, user, generation)
     return user
 
 
@@ -154,6 +362,39 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> models.User:
+    """Get current user from JWT token over the AsyncSession (for `async def` endpoints)"""
+    user_id = decode_token_subject(token)
+    
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    
+    generation = user_cache.generation
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    user = result.scalars().first()
+    
+    if user is None:
+        raise _credentials_exception()
+    
+    user = _detached_user(user)
+    user_cache.set(user_id, user, generation)
+    return user
+
+
+async def get_current_active_user_async(
+    current_user: models.User = Depends(get_current_user_async)
+) -> models.User:
+    """Get current active user over the AsyncSession"""
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    
+    return current_user
+
+
 def require_role(required_role: str):
     """Dependency to require specific role"""
     async def role_checker(current_user: models.User = Depends(get_current_active_user)):
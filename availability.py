@@ -0,0 +1,283 @@
+"""
+Doctor availability from compact per-day slot bitmaps
+
+The working day (AVAILABILITY_DAY_START to AVAILABILITY_DAY_END) is split into
+AVAILABILITY_SLOT_MINUTES slots. Each doctor-day is a single int whose bit i
+is set when slot i holds a non-cancelled appointment, so answering a 90-day
+window is 90 dict lookups. A doctor's bitmaps are loaded on first use with one
+indexed query and then kept current from ORM events: changes are queued on
+the session while it flushes and applied only after the transaction commits,
+so rolled-back writes never show up. Writes that bypass the ORM unit of work
+call track_inserted() themselves or rely on the TTL, which also bounds
+staleness from writes made by other worker processes.
+"""
+import threading
+import time
+from datetime import date, time as time_type
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from config import settings
+import models
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+DAY_START = _minutes(settings.AVAILABILITY_DAY_START)
+SLOT_MINUTES = max(1, settings.AVAILABILITY_SLOT_MINUTES)
+SLOTS_PER_DAY = max(0, (_minutes(settings.AVAILABILITY_DAY_END) - DAY_START) // SLOT_MINUTES)
+SLOT_LABELS = tuple(
+    f"{(DAY_START + i * SLOT_MINUTES) // 60:02d}:{(DAY_START + i * SLOT_MINUTES) % 60:02d}"
+    for i in range(SLOTS_PER_DAY)
+)
+
+CANCELLED = "Cancelled"
+TRACKED = ("doctor_id", "date", "time", "status")
+_PENDING = "availability_ops"
+
+# (doctor_id, day ordinal, slot index)
+Placement = Tuple[str, int, int]
+
+
+class _DoctorSlots:
+    """Booked-slot bitmaps for one doctor, keyed by date ordinal"""
+    __slots__ = ("days", "overlaps", "loaded_at")
+
+    def __init__(self):
+        self.days: Dict[int, int] = {}
+        # Extra bookings beyond the first in an already-set slot, so that
+        # cancelling one of a double booking keeps the slot marked busy
+        self.overlaps: Dict[Tuple[int, int], int] = {}
+        self.loaded_at = 0.0
+
+    def add(self, day: int, slot: int) -> None:
+        bit = 1 << slot
+        current = self.days.get(day, 0)
+        if current & bit:
+            self.overlaps[(day, slot)] = self.overlaps.get((day, slot), 0) + 1
+        else:
+            self.days[day] = current | bit
+
+    def remove(self, day: int, slot: int) -> None:
+        extra = self.overlaps.get((day, slot))
+        if extra:
+            if extra == 1:
+                del self.overlaps[(day, slot)]
+            else:
+                self.overlaps[(day, slot)] = extra - 1
+            return
+        remaining = self.days.get(day, 0) & ~(1 << slot)
+        if remaining:
+            self.days[day] = remaining
+        else:
+            self.days.pop(day, None)
+
+
+_doctors: Dict[str, _DoctorSlots] = {}
+# Doctors whose slots are being loaded; set to True if a commit lands mid-load
+_loading: Dict[str, bool] = {}
+_lock = threading.Lock()
+
+
+def slot_of(value: time_type) -> Optional[int]:
+    """Slot index for a time of day, or None outside working hours"""
+    offset = value.hour * 60 + value.minute - DAY_START
+    if offset < 0:
+        return None
+    slot = offset // SLOT_MINUTES
+    return slot if slot < SLOTS_PER_DAY else None
+
+
+def _placement(doctor_id, day, at, status) -> Optional[Placement]:
+    if doctor_id is None or day is None or at is None or status == CANCELLED:
+        return None
+    slot = slot_of(at)
+    if slot is None:
+        return None
+    return doctor_id, day.toordinal(), slot
+
+
+def _apply(ops: Iterable[Tuple[str, Any]]) -> None:
+    with _lock:
+        for op, arg in ops:
+            if op == "forget":
+                _doctors.pop(arg, None)
+                continue
+            doctor_id, day, slot = arg
+            slots = _doctors.get(doctor_id)
+            if slots is None:
+                if doctor_id in _loading:
+                    _loading[doctor_id] = True
+                continue
+            if op == "add":
+                slots.add(day, slot)
+            else:
+                slots.remove(day, slot)
+
+
+def _load(db: Session, doctor_id: str) -> Optional[_DoctorSlots]:
+    with _lock:
+        _loading[doctor_id] = False
+    try:
+        exists = db.execute(select(models.Doctor.id).where(models.Doctor.id == doctor_id)).first()
+        if exists is None:
+            return None
+        slots = _DoctorSlots()
+        rows = db.execute(
+            select(models.Appointment.date, models.Appointment.time)
+            .where(models.Appointment.doctor_id == doctor_id, models.Appointment.status != CANCELLED)
+        )
+        for day, at in rows:
+            slot = slot_of(at)
+            if slot is not None:
+                slots.add(day.toordinal(), slot)
+    except Exception:
+        with _lock:
+            _loading.pop(doctor_id, None)
+        raise
+    with _lock:
+        # A commit that raced with the query may be missing; serve this load
+        # but reload on the next request
+        stale = _loading.pop(doctor_id, False)
+        slots.loaded_at = 0.0 if stale else time.monotonic()
+        _doctors[doctor_id] = slots
+    return slots
+
+
+def _slots_for(db: Session, doctor_id: str) -> Optional[_DoctorSlots]:
+    slots = _doctors.get(doctor_id)
+    ttl = settings.AVAILABILITY_TTL_SECONDS
+    if slots is None or (ttl > 0 and time.monotonic() - slots.loaded_at > ttl):
+        slots = _load(db, doctor_id)
+    return slots
+
+
+# Free-slot labels for every byte of a day's bitmap, one table per byte
+# position, so decoding a day is a few table lookups however busy it is
+_FREE_BY_BYTE = [
+    [
+        tuple(label for i, label in enumerate(SLOT_LABELS[offset:offset + 8]) if not mask >> i & 1)
+        for mask in range(256)
+    ]
+    for offset in range(0, SLOTS_PER_DAY, 8)
+]
+
+
+def _free_labels(booked: int) -> List[str]:
+    free: List[str] = []
+    for table in _FREE_BY_BYTE:
+        free.extend(table[booked & 0xFF])
+        booked >>= 8
+    return free
+
+
+@lru_cache(maxsize=1024)
+def _iso_date(day: int) -> str:
+    return date.fromordinal(day).isoformat()
+
+
+def get_availability(db: Session, doctor_id: str, date_from: date, date_to: date) -> Optional[Dict[str, Any]]:
+    """Free slots per day between two dates (inclusive); None if the doctor does not exist"""
+    doctor_id = models.canonical_id(doctor_id)
+    slots = _slots_for(db, doctor_id)
+    if slots is None:
+        return None
+    days = slots.days
+    return {
+        "doctor_id": doctor_id,
+        "slot_minutes": SLOT_MINUTES,
+        "days": [
+            {"date": _iso_date(day), "free": _free_labels(days.get(day, 0))}
+            for day in range(date_from.toordinal(), date_to.toordinal() + 1)
+        ],
+    }
+
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return {
+            "doctors_loaded": len(_doctors),
+            "booked_days": sum(len(slots.days) for slots in _doctors.values()),
+            "slots_per_day": SLOTS_PER_DAY,
+        }
+
+
+def clear() -> None:
+    with _lock:
+        _doctors.clear()
+
+
+def _queue(session: Optional[Session], ops: List[Tuple[str, Any]]) -> None:
+    ops = [(op, arg) for op, arg in ops if arg is not None]
+    if session is not None and ops:
+        session.info.setdefault(_PENDING, []).extend(ops)
+
+
+def track_inserted(db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+    """Queue slots for appointments inserted with Core (applied on commit)"""
+    _queue(db, [
+        ("add", _placement(values["doctor_id"], values["date"], values["time"], values.get("status")))
+        for values in rows
+    ])
+
+
+def _state_values(target, new: bool) -> List[Any]:
+    state = inspect(target)
+    values = []
+    for key in TRACKED:
+        history = state.attrs[key].history
+        current = (history.added or history.unchanged) if new else (history.deleted or history.unchanged)
+        values.append(current[0] if current else None)
+    return values
+
+
+# ========== ORM EVENT HOOKS ==========
+def _track_previous_value(target, value, oldvalue, initiator):
+    # active_history loads an expired value before it is overwritten, so
+    # after_update can see which slot the appointment is leaving
+    pass
+
+
+for _key in TRACKED:
+    event.listen(getattr(models.Appointment, _key), "set", _track_previous_value, active_history=True)
+
+
+@event.listens_for(models.Appointment, "after_insert")
+def _appointment_inserted(mapper, connection, target):
+    _queue(object_session(target), [("add", _placement(*_state_values(target, new=True)))])
+
+
+@event.listens_for(models.Appointment, "after_update")
+def _appointment_updated(mapper, connection, target):
+    old = _placement(*_state_values(target, new=False))
+    new = _placement(*_state_values(target, new=True))
+    if old != new:
+        _queue(object_session(target), [("remove", old), ("add", new)])
+
+
+@event.listens_for(models.Appointment, "after_delete")
+def _appointment_deleted(mapper, connection, target):
+    _queue(object_session(target), [("remove", _placement(*_state_values(target, new=False)))])
+
+
+@event.listens_for(models.Doctor, "after_delete")
+def _doctor_deleted(mapper, connection, target):
+    _queue(object_session(target), [("forget", target.id)])
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session):
+    ops = session.info.pop(_PENDING, None)
+    if ops:
+        _apply(ops)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,182 @@
+"""
+Benchmark doctor availability lookups against querying appointments per request
+
+Usage:
+    python bench_availability.py [--doctors 200] [--days 90] [--per-day 10] [--lookups 2000]
+
+Seeds doctors with appointments spread over the window into a throwaway
+SQLite file unless --database-url points elsewhere, then times:
+  - loading every doctor's bitmaps (cold start),
+  - availability.get_availability for the full window (warm, per lookup),
+  - the query-and-compute-gaps path clients rely on today.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, time as time_type, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doctors", type=int, default=200, help="Doctors to seed")
+    parser.add_argument("--days", type=int, default=90, help="Days in the availability window")
+    parser.add_argument("--per-day", type=int, default=10, help="Appointments per doctor per day")
+    parser.add_argument("--lookups", type=int, default=2000, help="Warm lookups to time")
+    parser.add_argument("--database-url", default=None, help="Database to benchmark (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def seed(engine, models, availability, doctors: int, days: int, per_day: int, start: date):
+    from sqlalchemy import insert
+
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    doctor_ids = [str(uuid.uuid4()) for _ in range(doctors)]
+    patient_ids = [str(uuid.uuid4()) for _ in range(100)]
+    slot_times = [
+        time_type((availability.DAY_START + i * availability.SLOT_MINUTES) // 60,
+                  (availability.DAY_START + i * availability.SLOT_MINUTES) % 60)
+        for i in range(availability.SLOTS_PER_DAY)
+    ]
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(insert(models.Doctor.__table__), [
+            {"id": doctor_id, "name": f"Doctor {i}", "specialization": "General", "contact": f"+1000{i:06d}",
+             "email": f"bench{i}@example.com", "created_at": now, "updated_at": now}
+            for i, doctor_id in enumerate(doctor_ids)
+        ])
+        conn.execute(insert(models.Patient.__table__), [
+            {"id": patient_id, "name": f"Patient {i}", "age": 40, "gender": "Other", "contact": f"+2000{i:06d}",
+             "address": "Bench St", "created_at": now, "updated_at": now}
+            for i, patient_id in enumerate(patient_ids)
+        ])
+        rows = []
+        for doctor_id in doctor_ids:
+            for offset in range(days):
+                for at in rng.sample(slot_times, min(per_day, len(slot_times))):
+                    rows.append({
+                        "id": str(uuid.uuid4()), "patient_id": rng.choice(patient_ids), "doctor_id": doctor_id,
+                        "date": start + timedelta(days=offset), "time": at, "reason": "Checkup",
+                        "status": "Cancelled" if rng.random() < 0.05 else "Scheduled",
+                        "created_at": now, "updated_at": now,
+                    })
+            if len(rows) >= 10000:
+                conn.execute(insert(models.Appointment.__table__), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(models.Appointment.__table__), rows)
+    total = doctors * days * min(per_day, len(slot_times))
+    print(f"🌱 Seeded {doctors} doctors, {total} appointments in {time.perf_counter() - started:.1f}s")
+    return doctor_ids
+
+
+def free_slots_by_query(db, models, availability, doctor_id: str, date_from: date, date_to: date):
+    """What a client does today: fetch the window's appointments and find the gaps"""
+    from sqlalchemy import select
+
+    booked = {}
+    rows = db.execute(
+        select(models.Appointment.date, models.Appointment.time)
+        .where(models.Appointment.doctor_id == doctor_id, models.Appointment.date >= date_from,
+               models.Appointment.date <= date_to, models.Appointment.status != "Cancelled")
+    )
+    for day, at in rows:
+        booked.setdefault(day, set()).add(availability.slot_of(at))
+    return [
+        {"date": day.isoformat(),
+         "free": [label for i, label in enumerate(availability.SLOT_LABELS) if i not in booked.get(day, ())]}
+        for day in (date_from + timedelta(days=n) for n in range((date_to - date_from).days + 1))
+    ]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def report(label: str, samples, unit: float, suffix: str):
+    print(f"{label:<22} p50 {statistics.median(samples) * unit:9.1f} {suffix}   "
+          f"p95 {percentile(samples, 0.95) * unit:9.1f} {suffix}   ({len(samples)} lookups)")
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_availability.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DEBUG"] = "False"
+    # Keep the TTL from reloading doctors in the middle of the timed loop
+    os.environ["AVAILABILITY_TTL_SECONDS"] = "0"
+
+    import availability
+    import crud
+    import models
+    import schemas
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    start = date.today()
+    end = start + timedelta(days=args.days - 1)
+    doctor_ids = seed(engine, models, availability, args.doctors, args.days, args.per_day, start)
+
+    print("=" * 60)
+    print("Doctor Availability Benchmark")
+    print("=" * 60)
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Window: {args.days} days, {availability.SLOTS_PER_DAY} slots/day, {args.doctors} doctors\n")
+
+    rng = random.Random(11)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for doctor_id in doctor_ids:
+            availability.get_availability(db, doctor_id, start, end)
+        cold = time.perf_counter() - started
+        print(f"Cold load:             {cold * 1000:9.1f} ms total   "
+              f"({cold / len(doctor_ids) * 1000:.2f} ms per doctor)   {availability.stats()}")
+
+        warm = []
+        for _ in range(args.lookups):
+            doctor_id = rng.choice(doctor_ids)
+            started = time.perf_counter()
+            availability.get_availability(db, doctor_id, start, end)
+            warm.append(time.perf_counter() - started)
+        report("Bitmap lookup:", warm, 1e6, "us")
+
+        queried = []
+        for _ in range(max(1, args.lookups // 10)):
+            doctor_id = rng.choice(doctor_ids)
+            started = time.perf_counter()
+            free_slots_by_query(db, models, availability, doctor_id, start, end)
+            queried.append(time.perf_counter() - started)
+        report("Query + compute gaps:", queried, 1e6, "us")
+
+        # Sanity: bitmaps agree with the database and pick up new bookings on commit
+        doctor_id = doctor_ids[0]
+        expected = free_slots_by_query(db, models, availability, doctor_id, start, end)
+        actual = availability.get_availability(db, doctor_id, start, end)["days"]
+        if [day["free"] for day in expected] != [day["free"] for day in actual]:
+            print("❌ Bitmaps disagree with the appointments table")
+            sys.exit(1)
+        day = next(day for day in actual if day["free"])
+        booked_at = datetime.strptime(day["free"][0], "%H:%M").time()
+        booked_on = date.fromisoformat(day["date"])
+        patient_id = db.query(models.Patient.id).first()[0]
+        crud.create_appointment(db, schemas.AppointmentCreate(
+            patient_id=patient_id, doctor_id=doctor_id, date=booked_on, time=booked_at, reason="Bench"))
+        after = availability.get_availability(db, doctor_id, booked_on, booked_on)["days"][0]["free"]
+        if day["free"][0] in after:
+            print("❌ New appointment not reflected in availability")
+            sys.exit(1)
+    finally:
+        db.close()
+
+    print(f"\n✅ Bitmap lookups are {statistics.median(queried) / statistics.median(warm):.0f}x faster at p50")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark bulk inserts against the one-row-per-request create path
+
+Usage:
+    python bench_bulk_insert.py [--rows 5000] [--database-url sqlite:///bench.db]
+
+Defaults to a throwaway SQLite file. Point --database-url at a scratch MySQL
+database to measure the real thing. Tables are created if missing and the
+inserted rows are left in place.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="Rows to insert with each method")
+    parser.add_argument("--database-url", default=None, help="Database to benchmark (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def patient_rows(count: int, tag: str):
+    return [
+        {
+            "name": f"Bench Patient {tag}-{i}",
+            "age": 20 + i % 60,
+            "gender": ("Male", "Female", "Other")[i % 3],
+            "contact": f"+1555{i:07d}",
+            "address": f"{i} Benchmark Ave",
+            "medical_history": None,
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_bulk.db')}"
+    # Settings are read at import time, so configure the environment first
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DEBUG"] = "False"
+
+    import crud
+    import schemas
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+
+    print("=" * 60)
+    print("Bulk Insert Benchmark")
+    print("=" * 60)
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Rows per method: {args.rows}\n")
+
+    db = SessionLocal()
+    try:
+        rows = patient_rows(args.rows, "single")
+        started = time.perf_counter()
+        for row in rows:
+            crud.create_patient(db, schemas.PatientCreate(**row))
+        single_seconds = time.perf_counter() - started
+
+        rows = patient_rows(args.rows, "bulk")
+        started = time.perf_counter()
+        result = crud.bulk_create_patients(db, rows)
+        bulk_seconds = time.perf_counter() - started
+    finally:
+        db.close()
+
+    if result["errors"]:
+        print(f"❌ Bulk insert reported {len(result['errors'])} errors, first: {result['errors'][0]}")
+        sys.exit(1)
+
+    single_rate = args.rows / single_seconds
+    bulk_rate = args.rows / bulk_seconds
+    print(f"Single insert: {single_seconds:8.3f}s  {single_rate:10.0f} rows/s")
+    print(f"Bulk insert:   {bulk_seconds:8.3f}s  {bulk_rate:10.0f} rows/s")
+    print(f"\n✅ Bulk path is {bulk_rate / single_rate:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
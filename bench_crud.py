@@ -0,0 +1,410 @@
+"""
+crud.py microbenchmarks as the tables grow
+
+Usage:
+    python bench_crud.py run [--scales 10000,100000,1000000] [--repeat 20] [--output bench_crud.json]
+                             [--compare baseline.json] [--database-url mysql+pymysql://...]
+    python bench_crud.py compare baseline.json current.json [--threshold 0.25] [--min-ms 0.5]
+
+`run` grows one database through each scale in turn (patients, appointments
+and prescriptions each get `scale` rows, inserted with bulk Core statements)
+and at every scale calls each public crud function --repeat times. Every
+call gets fresh sessions and untimed setup (e.g. delete_* deletes a row
+created for it), then records:
+  - wall time (median and p95),
+  - SQL statements issued (querystats.collect),
+  - peak Python memory allocated during the call (tracemalloc, separate run).
+Results are written as JSON; keep one as the baseline.
+
+`compare` flags, per scale and function, a median time more than --threshold
+slower (ignoring changes under --min-ms), any increase in statement count,
+and peak memory more than --threshold higher. It exits with status 1 if
+anything regressed. Timings only compare fairly on the same machine and
+database. Defaults to a throwaway SQLite file; pass --database-url to run
+against a scratch MySQL database.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from bench_load import git_commit
+
+CHUNK = 10_000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks and write a JSON result")
+    run.add_argument("--scales", default="10000,100000,1000000", help="Comma-separated row counts per table")
+    run.add_argument("--repeat", type=int, default=20, help="Timed calls per function and scale")
+    run.add_argument("--only", default=None, help="Comma-separated function names to run (default: all)")
+    run.add_argument("--output", default="bench_crud.json", help="Where to write the result")
+    run.add_argument("--compare", default=None, help="Baseline to compare the new result with")
+    run.add_argument("--database-url", default=None, help="Database to benchmark (default: temporary SQLite file)")
+
+    for command in (run, commands.add_parser("compare", help="Compare two results and flag regressions")):
+        command.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown / memory growth")
+        command.add_argument("--min-ms", type=float, default=0.5, help="Ignore time changes smaller than this")
+    compare = commands.choices["compare"]
+    compare.add_argument("baseline", help="Earlier result")
+    compare.add_argument("current", help="New result")
+    return parser.parse_args()
+
+
+# ========== DATA ==========
+class Dataset:
+    """Ids of the rows inserted so far; grow() tops every table up to the next scale"""
+
+    def __init__(self, doctors: int, final_scale: int):
+        self.doctor_count = doctors
+        self.final_scale = final_scale
+        self.doctors = []
+        self.patients = []
+        self.appointments = []
+        self.prescriptions = []
+        self.epoch = datetime.utcnow() - timedelta(days=365)
+
+    def grow(self, engine, models, availability, scale: int):
+        from sqlalchemy import insert
+
+        def insert_chunks(table, count: int, make_row):
+            ids = []
+            with engine.begin() as conn:
+                for start in range(0, count, CHUNK):
+                    rows = [make_row(i) for i in range(start, min(start + CHUNK, count))]
+                    conn.execute(insert(table), rows)
+                    ids.extend(row["id"] for row in rows)
+            return ids
+
+        def stamps(i: int):
+            at = self.epoch + timedelta(seconds=i)
+            return {"created_at": at, "updated_at": at}
+
+        if not self.doctors:
+            self.doctors = insert_chunks(models.Doctor.__table__, self.doctor_count, lambda i: {
+                "id": models.generate_uuid(), "name": f"Bench Doctor {i}", "specialization": "General",
+                "contact": f"+1000{i:06d}", "email": f"bench.crud.doctor{i}@example.com", **stamps(i),
+            })
+
+        offset = len(self.patients)
+        self.patients += insert_chunks(models.Patient.__table__, scale - offset, lambda i: {
+            "id": models.generate_uuid(), "name": f"Bench Patient {offset + i}", "age": 1 + (offset + i) % 99,
+            "gender": ("Male", "Female", "Other")[(offset + i) % 3], "contact": f"+2000{offset + i:07d}",
+            "address": f"{offset + i} Bench St", "medical_history": None, **stamps(offset + i),
+        })
+
+        # Doctor, slot and day follow from the row number, so slots never repeat;
+        # the final scale's days are centred on today so the dashboard has some to count
+        per_day = availability.SLOTS_PER_DAY * len(self.doctors)
+        first_day = date.today() - timedelta(days=self.final_scale // per_day // 2)
+        offset = len(self.appointments)
+
+        def appointment(i: int):
+            n = offset + i
+            return {
+                "id": models.generate_uuid(), "patient_id": self.patients[n * 7919 % len(self.patients)],
+                "doctor_id": self.doctors[n % len(self.doctors)],
+                "date": first_day + timedelta(days=n // per_day),
+                "time": datetime.strptime(
+                    availability.SLOT_LABELS[n // len(self.doctors) % availability.SLOTS_PER_DAY], "%H:%M").time(),
+                "reason": "Routine checkup", "status": "Scheduled", **stamps(n),
+            }
+
+        self.appointments += insert_chunks(models.Appointment.__table__, scale - offset, appointment)
+
+        offset = len(self.prescriptions)
+        new_prescriptions = insert_chunks(models.Prescription.__table__, scale - offset, lambda i: {
+            "id": models.generate_uuid(), "patient_id": self.patients[(offset + i) * 104729 % len(self.patients)],
+            "doctor_id": self.doctors[(offset + i) % len(self.doctors)], "diagnosis": "Hypertension",
+            "medications": "Amlodipine 5mg", "instructions": "Once daily",
+            "date": date.today() - timedelta(days=(offset + i) % 365), **stamps(offset + i),
+        })
+        insert_chunks(models.PrescriptionAttachment.__table__, len(new_prescriptions), lambda i: {
+            "id": models.generate_uuid(), "prescription_id": new_prescriptions[i], "position": 0,
+            "path": f"labs/{(offset + i) % 1000}.png", "content_type": "image/png", "created_at": self.epoch,
+        })
+        self.prescriptions += new_prescriptions
+
+
+def benchmarks(crud, models, schemas, pagination, availability, data: Dataset):
+    """(name, setup, run) per case: setup(db) returns the argument run(db, arg) gets; only run is timed"""
+    unique = itertools.count(1)
+    slots = itertools.count()
+
+    def pick(ids):
+        return ids[next(unique) * 7919 % len(ids)]
+
+    def nothing(db):
+        return None
+
+    def patient_create():
+        n = next(unique)
+        return schemas.PatientCreate(name=f"Bench New {n}", age=40, gender="Other", contact="+3000000000",
+                                     address="Bench St")
+
+    def doctor_create():
+        n = next(unique)
+        return schemas.DoctorCreate(name=f"Bench New {n}", specialization="General", contact="+3000000001",
+                                    email=f"bench.new{n}.{time.time_ns()}@example.com")
+
+    def free_slot():
+        # Far beyond the seeded days, one slot per call
+        n = next(slots)
+        day = date.today() + timedelta(days=3650 + n // availability.SLOTS_PER_DAY)
+        return day, availability.SLOT_LABELS[n % availability.SLOTS_PER_DAY]
+
+    def appointment_create(db=None):
+        day, label = free_slot()
+        return schemas.AppointmentCreate(patient_id=pick(data.patients), doctor_id=data.doctors[0], date=day,
+                                         time=label, reason="Bench booking")
+
+    def prescription_create(db=None):
+        return schemas.PrescriptionCreate(patient_id=pick(data.patients), doctor_id=pick(data.doctors),
+                                          diagnosis="Bench", medications="Bench", date=date.today(),
+                                          attachments=["scans/bench.pdf"])
+
+    def cursor_at_middle(fn, order):
+        cache = {}
+
+        def setup(db):
+            scale = len(data.patients)
+            if scale not in cache:
+                page = fn(db, skip=scale // 2, limit=50)
+                cache[scale] = pagination.next_cursor(page, order, 50)
+            return cache[scale]
+        return setup
+
+    def bulk_rows(kind: str):
+        def setup(db):
+            rows = []
+            for _ in range(100):
+                if kind == "patients":
+                    rows.append(patient_create().model_dump())
+                elif kind == "doctors":
+                    rows.append(doctor_create().model_dump())
+                elif kind == "appointments":
+                    rows.append(appointment_create().model_dump(mode="json"))
+                else:
+                    rows.append(prescription_create().model_dump(mode="json"))
+            return rows
+        return setup
+
+    return [
+        ("get_patients", nothing, lambda db, _: crud.get_patients(db, limit=50)),
+        ("get_patients[skip=middle]", nothing, lambda db, _: crud.get_patients(db, skip=len(data.patients) // 2, limit=50)),
+        ("get_patients[cursor=middle]", cursor_at_middle(crud.get_patients, crud.PATIENT_ORDER),
+         lambda db, cursor: crud.get_patients(db, limit=50, cursor=cursor)),
+        ("get_patient", lambda db: pick(data.patients), crud.get_patient),
+        ("get_doctors", nothing, lambda db, _: crud.get_doctors(db, limit=100)),
+        ("get_doctor", lambda db: pick(data.doctors), crud.get_doctor),
+        ("get_appointments", nothing, lambda db, _: crud.get_appointments(db, limit=50)),
+        ("get_appointments[cursor=middle]", cursor_at_middle(crud.get_appointments, crud.APPOINTMENT_ORDER),
+         lambda db, cursor: crud.get_appointments(db, limit=50, cursor=cursor)),
+        ("get_appointment", lambda db: pick(data.appointments), crud.get_appointment),
+        ("get_prescriptions", nothing, lambda db, _: crud.get_prescriptions(db, limit=50)),
+        ("get_prescriptions[cursor=middle]", cursor_at_middle(crud.get_prescriptions, crud.PRESCRIPTION_ORDER),
+         lambda db, cursor: crud.get_prescriptions(db, limit=50, cursor=cursor)),
+        ("get_prescription", lambda db: pick(data.prescriptions), crud.get_prescription),
+        ("get_prescriptions_by_patient", lambda db: pick(data.patients), crud.get_prescriptions_by_patient),
+        ("get_prescriptions_by_attachment", lambda db: f"labs/{next(unique) % 1000}.png",
+         lambda db, path: crud.get_prescriptions_by_attachment(db, path, limit=50)),
+        ("get_prescription_attachments", lambda db: pick(data.prescriptions), crud.get_prescription_attachments),
+        ("get_entity_version", lambda db: pick(data.prescriptions),
+         lambda db, entity_id: crud.get_entity_version(db, models.Prescription, entity_id)),
+        ("get_table_version", nothing, lambda db, _: crud.get_table_version(db, models.Appointment)),
+        ("get_dashboard_stats", nothing, lambda db, _: crud.get_dashboard_stats(db)),
+        ("create_patient", lambda db: patient_create(), crud.create_patient),
+        ("create_doctor", lambda db: doctor_create(), crud.create_doctor),
+        ("create_appointment", appointment_create, crud.create_appointment),
+        ("create_prescription", prescription_create, crud.create_prescription),
+        ("update_patient", lambda db: pick(data.patients),
+         lambda db, patient_id: crud.update_patient(db, patient_id, schemas.PatientUpdate(age=41))),
+        ("update_doctor", lambda db: pick(data.doctors),
+         lambda db, doctor_id: crud.update_doctor(db, doctor_id, schemas.DoctorUpdate(contact=f"+4{next(unique):09d}"))),
+        ("update_appointment", lambda db: pick(data.appointments),
+         lambda db, appointment_id: crud.update_appointment(
+             db, appointment_id, schemas.AppointmentUpdate(reason=f"Bench update {next(unique)}"))),
+        ("update_prescription", lambda db: pick(data.prescriptions),
+         lambda db, prescription_id: crud.update_prescription(
+             db, prescription_id, schemas.PrescriptionUpdate(
+                 instructions=f"Bench update {next(unique)}", attachments=["scans/bench.pdf", "labs/bench.png"]))),
+        ("bulk_create_patients", bulk_rows("patients"), crud.bulk_create_patients),
+        ("bulk_create_doctors", bulk_rows("doctors"), crud.bulk_create_doctors),
+        ("bulk_create_appointments", bulk_rows("appointments"), crud.bulk_create_appointments),
+        ("bulk_create_prescriptions", bulk_rows("prescriptions"), crud.bulk_create_prescriptions),
+        ("delete_patient", lambda db: crud.create_patient(db, patient_create()).id, crud.delete_patient),
+        ("delete_doctor", lambda db: crud.create_doctor(db, doctor_create()).id, crud.delete_doctor),
+        ("delete_appointment", lambda db: crud.create_appointment(db, appointment_create()).id, crud.delete_appointment),
+        ("delete_prescription", lambda db: crud.create_prescription(db, prescription_create()).id,
+         crud.delete_prescription),
+    ]
+
+
+# ========== MEASUREMENT ==========
+def measure(SessionLocal, querystats, setup, run, repeat: int):
+    def once(trace_memory: bool):
+        db = SessionLocal()
+        try:
+            argument = setup(db)
+        finally:
+            db.close()
+        db = SessionLocal()
+        try:
+            if trace_memory:
+                tracemalloc.start()
+            with querystats.collect() as queries:
+                started = time.perf_counter()
+                run(db, argument)
+                elapsed = time.perf_counter() - started
+            peak = 0
+            if trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            return elapsed, queries.count, peak
+        finally:
+            db.close()
+
+    once(False)  # Warm caches and compiled statements
+    samples = [once(False) for _ in range(repeat)]
+    times = sorted(elapsed for elapsed, _, _ in samples)
+    _, _, peak = once(True)
+    return {
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 3),
+        "statements": max(count for _, count, _ in samples),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(args):
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_crud.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DEBUG"] = "False"
+    os.environ["SLOW_QUERY_MS"] = "0"
+
+    import availability
+    import counters
+    import crud
+    import models
+    import pagination
+    import querystats
+    import schemas
+    from check_query_plans import crud_functions
+    from database import Base, SessionLocal, engine
+
+    scales = sorted(int(value) for value in args.scales.split(","))
+    Base.metadata.create_all(bind=engine)
+    data = Dataset(doctors=max(20, scales[-1] // 500), final_scale=scales[-1])
+    cases = benchmarks(crud, models, schemas, pagination, availability, data)
+    missing = sorted(set(crud_functions(crud)) - {name.split("[")[0] for name, _, _ in cases})
+    if missing:
+        print(f"❌ No benchmark for: {', '.join(missing)}")
+        sys.exit(1)
+    if args.only:
+        wanted = set(args.only.split(","))
+        cases = [case for case in cases if case[0].split("[")[0] in wanted or case[0] in wanted]
+
+    print("=" * 78)
+    print("crud Microbenchmarks")
+    print("=" * 78)
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Scales: {', '.join(f'{scale:,}' for scale in scales)} rows per table, {args.repeat} calls per case\n")
+
+    results = {}
+    for scale in scales:
+        started = time.perf_counter()
+        data.grow(engine, models, availability, scale)
+        db = SessionLocal()
+        try:
+            counters.reconcile(db)
+        finally:
+            db.close()
+        print(f"🌱 Grew to {scale:,} rows per table in {time.perf_counter() - started:.1f}s")
+        print(f"{'function':<36} {'median ms':>10} {'p95 ms':>10} {'stmts':>6} {'peak KiB':>10}")
+        results[str(scale)] = {}
+        for name, setup, run in cases:
+            result = measure(SessionLocal, querystats, setup, run, args.repeat)
+            results[str(scale)][name] = result
+            print(f"{name:<36} {result['median_ms']:>10.3f} {result['p95_ms']:>10.3f} "
+                  f"{result['statements']:>6} {result['peak_kib']:>10.1f}")
+        print()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"✅ Result written to {args.output}")
+    return report
+
+
+# ========== COMPARISON ==========
+def regressions(baseline, current, threshold: float, min_ms: float):
+    """(scale, function, what, before, after) for every regression"""
+    found = []
+    for scale, functions in current["results"].items():
+        for name, after in functions.items():
+            before = baseline["results"].get(scale, {}).get(name)
+            if before is None:
+                continue
+            slower = after["median_ms"] - before["median_ms"]
+            if slower > min_ms and after["median_ms"] > before["median_ms"] * (1 + threshold):
+                found.append((scale, name, "median_ms", before["median_ms"], after["median_ms"]))
+            if after["statements"] > before["statements"]:
+                found.append((scale, name, "statements", before["statements"], after["statements"]))
+            if after["peak_kib"] - before["peak_kib"] > 64 and after["peak_kib"] > before["peak_kib"] * (1 + threshold):
+                found.append((scale, name, "peak_kib", before["peak_kib"], after["peak_kib"]))
+    return found
+
+
+def compare(baseline, current, threshold: float, min_ms: float) -> bool:
+    """Print regressions of `current` against `baseline`; True if there were none"""
+    print("=" * 78)
+    print(f"Comparing {current.get('commit')} with baseline {baseline.get('commit')} "
+          f"(threshold {threshold:.0%}, min {min_ms} ms)")
+    print("=" * 78)
+    if baseline.get("database") != current.get("database"):
+        print(f"⚠️  Different databases: {baseline.get('database')} vs {current.get('database')}")
+    found = regressions(baseline, current, threshold, min_ms)
+    for scale, name, what, before, after in found:
+        change = f" ({(after - before) / before:+.0%})" if before else ""
+        print(f"❌ {int(scale):>9,} {name:<36} {what:<10} {before} -> {after}{change}")
+    if not found:
+        print("✅ No regressions")
+    return not found
+
+
+def main():
+    args = parse_args()
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        sys.exit(0 if compare(baseline, current, args.threshold, args.min_ms) else 1)
+
+    report = run_benchmarks(args)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        sys.exit(0 if compare(baseline, report, args.threshold, args.min_ms) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""
+HTTP load test of the whole API
+
+Usage:
+    python bench_load.py [--concurrency 16] [--duration 30] [--warmup 5] [--seed 1]
+                         [--patients 2000] [--doctors 50] [--appointments 10000] [--prescriptions 2000]
+                         [--mix login=2,list_patients=20,...] [--server-workers 1]
+                         [--output result.json] [--compare baseline.json] [--database-url mysql+pymysql://...]
+
+Seeds the database at the requested scale with seed_data.py, starts
+`uvicorn main:app` in a child process and drives it over keep-alive HTTP
+from --concurrency client threads for --duration seconds (after --warmup
+seconds that are not measured). Each thread picks operations from the weighted --mix with its own
+seeded random generator, so runs with the same arguments send the same
+sequence of requests. Operations: login, list_patients, get_patient,
+list_doctors, list_appointments, create_appointment (409 on a taken slot
+counts as a conflict, not an error) and dashboard polling.
+
+The result is JSON: throughput and p50/p95/p99 latency per operation and in
+total, plus the commit and settings it was measured with. Save one run with
+--output and pass it to --compare on a later commit to see the change.
+Defaults to a throwaway SQLite file; the client uses only the standard
+library.
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+DEFAULT_MIX = {
+    "login": 2,
+    "list_patients": 20,
+    "get_patient": 10,
+    "list_doctors": 15,
+    "list_appointments": 20,
+    "create_appointment": 8,
+    "dashboard": 25,
+}
+PASSWORD = "loadtest-password"
+
+
+def parse_mix(value: str):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown operation '{name}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16, help="Client threads, each with one connection")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of load before measuring")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for data and request sequences")
+    parser.add_argument("--patients", type=int, default=2000, help="Patients to seed")
+    parser.add_argument("--doctors", type=int, default=50, help="Doctors to seed")
+    parser.add_argument("--appointments", type=int, default=10000, help="Appointments to seed")
+    parser.add_argument("--prescriptions", type=int, default=2000, help="Prescriptions to seed")
+    parser.add_argument("--users", type=int, default=4, help="Login accounts to seed")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="Operation weights, e.g. list_patients=3,dashboard=1")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=0, help="Server port (default: a free one)")
+    parser.add_argument("--output", default=None, help="Write the JSON result here (default: stdout)")
+    parser.add_argument("--compare", default=None, help="Earlier JSON result to compare against")
+    parser.add_argument("--database-url", default=None, help="Database to load (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+# ========== SEEDING ==========
+def seed(args):
+    """Create login users and the synthetic dataset (seed_data); returns ids the operations need"""
+    import auth
+    import availability
+    import schemas
+    import seed_data
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        emails = []
+        for i in range(args.users):
+            email = f"loadtest{i}@example.com"
+            if auth.get_user_by_email(db, email) is None:
+                auth.create_user(db, schemas.UserCreate(
+                    username=f"loadtest{i}", email=email, password=PASSWORD, full_name=f"Load Test {i}",
+                ))
+            emails.append(email)
+    finally:
+        db.close()
+
+    config = seed_data.Config(patients=args.patients, doctors=args.doctors, appointments=args.appointments,
+                              prescriptions=args.prescriptions, seed=args.seed)
+    # stdout carries the JSON result
+    with contextlib.redirect_stdout(sys.stderr):
+        seed_data.generate(config)
+    generator = seed_data.Generator(config)
+    return {
+        "emails": emails,
+        "doctors": [generator.row_id("doctors", i) for i in range(args.doctors)],
+        "patients": [generator.row_id("patients", i) for i in range(args.patients)],
+        "slots": list(availability.SLOT_LABELS),
+    }
+
+
+# ========== SERVER ==========
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=os.environ.copy(),
+                              stdout=sys.stderr)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Server did not become healthy within 60 seconds")
+
+
+# ========== CLIENT ==========
+class Client:
+    """One keep-alive connection with a bearer token"""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        self.token = None
+
+    def call(self, method: str, path: str, body=None):
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        payload = json.dumps(body) if body is not None else None
+        try:
+            self.conn.request(method, path, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            # Reconnect once; the server may have closed an idle connection
+            self.conn.close()
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+            self.conn.request(method, path, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            return response.status, response.read()
+
+    def login(self, email: str):
+        status, body = self.call("POST", "/api/auth/login", {"email": email, "password": PASSWORD})
+        if status == 200:
+            self.token = json.loads(body)["data"]["access_token"]
+        return status
+
+
+def operation(name: str, client: Client, rng: random.Random, data):
+    """Run one operation; returns the HTTP status"""
+    if name == "login":
+        return client.login(rng.choice(data["emails"]))
+    if name == "list_patients":
+        return client.call("GET", f"/api/patients?limit=50&skip={rng.randrange(0, 500, 50)}")[0]
+    if name == "get_patient":
+        return client.call("GET", f"/api/patients/{rng.choice(data['patients'])}")[0]
+    if name == "list_doctors":
+        return client.call("GET", "/api/doctors?limit=100")[0]
+    if name == "list_appointments":
+        return client.call("GET", f"/api/appointments?limit=50&skip={rng.randrange(0, 500, 50)}")[0]
+    if name == "create_appointment":
+        day = date.today() + timedelta(days=rng.randint(30, 730))
+        return client.call("POST", "/api/appointments", {
+            "patient_id": rng.choice(data["patients"]), "doctor_id": rng.choice(data["doctors"]),
+            "date": day.isoformat(), "time": rng.choice(data["slots"]), "reason": "Load test booking",
+        })[0]
+    if name == "dashboard":
+        return client.call("GET", "/api/dashboard/stats")[0]
+    raise ValueError(name)
+
+
+def ok(name: str, status: int) -> bool:
+    return 200 <= status < 300 or (name == "create_appointment" and status == 409)
+
+
+def run_load(args, port: int, data):
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+    start = time.monotonic()
+    measure_from = start + args.warmup
+    stop_at = measure_from + args.duration
+    results = []  # per thread: {name: {"latencies": [...], "errors": n, "conflicts": n}}
+
+    def worker(index: int):
+        rng = random.Random(args.seed * 100_003 + index)
+        client = Client(port)
+        if client.login(data["emails"][index % len(data["emails"])]) != 200:
+            raise RuntimeError("Login failed; is the server seeded?")
+        stats = defaultdict(lambda: {"latencies": [], "errors": 0, "conflicts": 0})
+        results.append(stats)
+        while True:
+            name = rng.choices(names, weights)[0]
+            started = time.monotonic()
+            if started >= stop_at:
+                break
+            status = operation(name, client, rng, data)
+            finished = time.monotonic()
+            if started < measure_from:
+                continue
+            entry = stats[name]
+            entry["latencies"].append(finished - started)
+            if status == 409:
+                entry["conflicts"] += 1
+            elif not ok(name, status):
+                entry["errors"] += 1
+        client.conn.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    merged = defaultdict(lambda: {"latencies": [], "errors": 0, "conflicts": 0})
+    for stats in results:
+        for name, entry in stats.items():
+            merged[name]["latencies"].extend(entry["latencies"])
+            merged[name]["errors"] += entry["errors"]
+            merged[name]["conflicts"] += entry["conflicts"]
+    return merged
+
+
+# ========== REPORTING ==========
+def percentile(ordered, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def summarize(latencies, errors: int, conflicts: int, seconds: float):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "conflicts": conflicts,
+        "rps": round(len(ordered) / seconds, 1),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        return commit + ("-dirty" if dirty else "") if commit else None
+    except OSError:
+        return None
+
+
+def compare(old, new):
+    print("=" * 78, file=sys.stderr)
+    print(f"Compared with {old.get('commit')} ({old.get('timestamp')})", file=sys.stderr)
+    print("=" * 78, file=sys.stderr)
+    print(f"{'operation':<20} {'rps':>16} {'p50 ms':>18} {'p95 ms':>18}", file=sys.stderr)
+    rows = list(new["operations"].items()) + [("total", new["total"])]
+    for name, entry in rows:
+        before = old["total"] if name == "total" else old["operations"].get(name)
+        if not before:
+            continue
+        cells = []
+        for key in ("rps", "p50_ms", "p95_ms"):
+            change = (entry[key] - before[key]) / before[key] if before[key] else 0.0
+            cells.append(f"{entry[key]:>9} ({change:+.0%})")
+        print(f"{name:<20} {cells[0]:>16} {cells[1]:>18} {cells[2]:>18}", file=sys.stderr)
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_load.db')}"
+    # The server process inherits this environment
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DEBUG"] = "False"
+    os.environ["ENVIRONMENT"] = "production"
+    os.environ["SCHEMA_STARTUP"] = "create"  # the seeded database is not stamped with an Alembic revision
+
+    print(f"🌱 Seeding {args.patients} patients, {args.doctors} doctors, {args.appointments} appointments, "
+          f"{args.prescriptions} prescriptions", file=sys.stderr)
+    data = seed(args)
+
+    port = args.port or free_port()
+    server = start_server(port, args.server_workers)
+    try:
+        print(f"🚀 {args.concurrency} clients for {args.warmup:g}s warmup + {args.duration:g}s", file=sys.stderr)
+        merged = run_load(args, port, data)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    everything = [latency for entry in merged.values() for latency in entry["latencies"]]
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "database": database_url.split("://", 1)[0],
+        "config": {
+            "concurrency": args.concurrency, "duration": args.duration, "warmup": args.warmup, "seed": args.seed,
+            "server_workers": args.server_workers, "mix": args.mix,
+            "scale": {"patients": args.patients, "doctors": args.doctors, "appointments": args.appointments,
+                      "prescriptions": args.prescriptions, "users": args.users},
+        },
+        "total": summarize(everything, sum(e["errors"] for e in merged.values()),
+                           sum(e["conflicts"] for e in merged.values()), args.duration),
+        "operations": {
+            name: summarize(entry["latencies"], entry["errors"], entry["conflicts"], args.duration)
+            for name, entry in sorted(merged.items())
+        },
+    }
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"✅ Result written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), result)
+    if result["total"]["errors"]:
+        print(f"❌ {result['total']['errors']} requests failed", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark indexed patient search against downloading every page and filtering
+
+Usage:
+    python bench_patient_search.py [--patients 1000000] [--queries 20] [--database-url sqlite:///bench.db]
+
+Seeds synthetic patients into a throwaway SQLite file (FTS5 stand-in) unless
+--database-url points elsewhere. Seeding is skipped when the table already
+holds enough rows, so repeated runs against the same database are quick.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+
+FIRST_NAMES = ["John", "Jane", "Robert", "Emily", "Michael", "Sarah", "David", "Lisa", "James", "Maria"]
+LAST_NAMES = ["Doe", "Smith", "Johnson", "Davis", "Brown", "Williams", "Anderson", "Wilson", "Garcia", "Lee"]
+CONDITIONS = ["Hypertension", "Asthma", "Type 2 Diabetes", "Migraine", "Anxiety", "High Cholesterol",
+              "Arthritis", "Heart Disease", "Allergy", "Insomnia"]
+QUERIES = ["asthma", "diabetes", "smith", "migraine anxiety", "hypert", "garcia arthritis"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=100000, help="Patients to seed (use 1000000 for the full run)")
+    parser.add_argument("--queries", type=int, default=20, help="Search queries to time")
+    parser.add_argument("--page-size", type=int, default=100, help="Page size for the download-everything path")
+    parser.add_argument("--database-url", default=None, help="Database to benchmark (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def seed(engine, models, count: int):
+    from sqlalchemy import func, insert, select
+
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count()).select_from(models.Patient)).scalar()
+    if existing >= count:
+        return existing
+
+    rng = random.Random(42)
+    table = models.Patient.__table__
+    now = datetime.utcnow()
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for start in range(existing, count, 10000):
+            conn.execute(insert(table), [
+                {
+                    "id": str(uuid.uuid4()),
+                    "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    "age": rng.randint(1, 99),
+                    "gender": rng.choice(["Male", "Female", "Other"]),
+                    "contact": f"+1555{i:07d}",
+                    "address": f"{i} Main St",
+                    "medical_history": ", ".join(rng.sample(CONDITIONS, rng.randint(0, 3))) or None,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(start, min(start + 10000, count))
+            ])
+    print(f"🌱 Seeded {count - existing} patients in {time.perf_counter() - started:.1f}s")
+    return count
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_search.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DEBUG"] = "False"
+
+    import crud
+    import models
+    import pagination
+    import search
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    total = seed(engine, models, args.patients)
+    started = time.perf_counter()
+    search.ensure_index()
+    print(f"🔎 Search index ready in {time.perf_counter() - started:.1f}s")
+
+    print("=" * 60)
+    print("Patient Search Benchmark")
+    print("=" * 60)
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Patients: {total}\n")
+
+    db = SessionLocal()
+    try:
+        timings = []
+        for i in range(args.queries):
+            query = QUERIES[i % len(QUERIES)]
+            started = time.perf_counter()
+            search.search_patients(db, query, limit=20)
+            timings.append(time.perf_counter() - started)
+        print(f"Indexed search:       p50 {statistics.median(timings) * 1000:9.2f} ms   "
+              f"p95 {percentile(timings, 0.95) * 1000:9.2f} ms   ({args.queries} queries)")
+
+        # What the front end does today: fetch every page, filter client side
+        tokens = search.tokenize(QUERIES[0])
+        started = time.perf_counter()
+        cursor, matches, pages = None, 0, 0
+        while True:
+            patients = crud.get_patients(db, limit=args.page_size, cursor=cursor)
+            pages += 1
+            for patient in patients:
+                haystack = " ".join(filter(None, [patient.name, patient.contact, patient.medical_history])).lower()
+                if all(token in haystack for token in tokens):
+                    matches += 1
+            cursor = pagination.next_cursor(patients, crud.PATIENT_ORDER, args.page_size)
+            db.expunge_all()
+            if not cursor:
+                break
+        elapsed = time.perf_counter() - started
+        print(f"Download everything:  {elapsed * 1000:13.2f} ms   ({pages} pages, {matches} matches, 1 query)")
+        print(f"\n✅ Indexed search is {elapsed / statistics.median(timings):.0f}x faster at p50")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark primary key formats: random UUID4 strings vs time-ordered binary UUIDv7
+
+Usage:
+    python bench_primary_keys.py [--patients 100000] [--joins 2000] [--database-url mysql+pymysql://...]
+
+Builds the same patients/appointments pair twice, once with the old
+String(36) + uuid4 keys and once with models.UUIDBinary + uuid7 keys, and
+times batched inserts, patient-history joins and a date-range join. Table
+and index sizes come from dbstat on SQLite and information_schema on MySQL.
+Defaults to a throwaway SQLite file; the scratch tables are dropped at the end.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=100000, help="Patients to insert per variant")
+    parser.add_argument("--appointments-per-patient", type=int, default=3, help="Appointments per patient")
+    parser.add_argument("--batch", type=int, default=1000, help="Rows per INSERT transaction")
+    parser.add_argument("--joins", type=int, default=2000, help="Patient-history joins to time")
+    parser.add_argument("--database-url", default=None, help="Database to benchmark (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def build_tables(metadata, prefix: str, id_type):
+    from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, String, Table
+
+    patients = Table(
+        f"{prefix}_patients", metadata,
+        Column("id", id_type, primary_key=True),
+        Column("name", String(255), nullable=False),
+        Column("created_at", DateTime, nullable=False),
+    )
+    appointments = Table(
+        f"{prefix}_appointments", metadata,
+        Column("id", id_type, primary_key=True),
+        Column("patient_id", id_type, ForeignKey(f"{prefix}_patients.id"), nullable=False),
+        Column("date", Date, nullable=False),
+        Column("reason", String(255), nullable=False),
+        Index(f"ix_{prefix}_appointments_patient_date", "patient_id", "date"),
+        Index(f"ix_{prefix}_appointments_date", "date"),
+    )
+    return patients, appointments
+
+
+def insert_rows(engine, patients, appointments, new_id, count: int, per_patient: int, batch: int):
+    """Insert patients and their appointments in batches; returns (patient ids, seconds)"""
+    rng = random.Random(5)
+    now = datetime.utcnow()
+    start_day = date.today()
+    patient_ids = []
+    started = time.perf_counter()
+    for offset in range(0, count, batch):
+        size = min(batch, count - offset)
+        patient_rows = [{"id": new_id(), "name": f"Patient {offset + i}", "created_at": now} for i in range(size)]
+        appointment_rows = [
+            {"id": new_id(), "patient_id": row["id"], "date": start_day + timedelta(days=rng.randint(0, 365)),
+             "reason": "Checkup"}
+            for row in patient_rows for _ in range(per_patient)
+        ]
+        with engine.begin() as conn:
+            conn.execute(patients.insert(), patient_rows)
+            conn.execute(appointments.insert(), appointment_rows)
+        patient_ids.extend(row["id"] for row in patient_rows)
+    return patient_ids, time.perf_counter() - started
+
+
+def time_joins(engine, patients, appointments, patient_ids, joins: int):
+    from sqlalchemy import bindparam, select
+
+    rng = random.Random(9)
+    samples = []
+    history = (
+        select(appointments.c.id, appointments.c.date, patients.c.name)
+        .join(patients, appointments.c.patient_id == patients.c.id)
+        .where(appointments.c.patient_id == bindparam("patient_id", type_=appointments.c.patient_id.type))
+    )
+    with engine.connect() as conn:
+        for _ in range(joins):
+            patient_id = rng.choice(patient_ids)
+            started = time.perf_counter()
+            conn.execute(history, {"patient_id": patient_id}).all()
+            samples.append(time.perf_counter() - started)
+        day = date.today() + timedelta(days=30)
+        window = (
+            select(appointments.c.id, patients.c.name)
+            .join(patients, appointments.c.patient_id == patients.c.id)
+            .where(appointments.c.date.between(day, day + timedelta(days=6)))
+        )
+        started = time.perf_counter()
+        rows = len(conn.execute(window).all())
+        range_seconds = time.perf_counter() - started
+    return samples, range_seconds, rows
+
+
+def sizes(engine, tables):
+    """Bytes used by each table's data and indexes"""
+    from sqlalchemy import text
+
+    names = ", ".join(f"'{table.name}'" for table in tables)
+    with engine.connect() as conn:
+        if engine.dialect.name == "mysql":
+            for table in tables:
+                conn.execute(text(f"ANALYZE TABLE {table.name}"))
+            rows = conn.execute(text(
+                "SELECT data_length, index_length FROM information_schema.tables "
+                f"WHERE table_schema = DATABASE() AND table_name IN ({names})"
+            )).all()
+            return sum(row[0] for row in rows), sum(row[1] for row in rows)
+        if engine.dialect.name == "sqlite":
+            objects = conn.execute(text(f"SELECT name, type FROM sqlite_master WHERE tbl_name IN ({names})")).all()
+            usage = dict(conn.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")).all())
+            data = sum(usage.get(name, 0) for name, kind in objects if kind == "table")
+            index = sum(usage.get(name, 0) for name, kind in objects if kind == "index")
+            return data, index
+    return 0, 0
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_keys.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DEBUG"] = "False"
+
+    from sqlalchemy import MetaData, String
+
+    import models
+    from database import engine
+
+    variants = [
+        ("uuid4 String(36)", "bench_str", String(36), lambda: str(uuid.uuid4())),
+        ("uuid7 BINARY(16)", "bench_bin", models.UUIDBinary(), models.generate_uuid),
+    ]
+
+    print("=" * 60)
+    print("Primary Key Format Benchmark")
+    print("=" * 60)
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    total_rows = args.patients * (1 + args.appointments_per_patient)
+    print(f"Rows per variant: {args.patients} patients + {args.patients * args.appointments_per_patient} appointments\n")
+
+    results = {}
+    metadata = MetaData()
+    try:
+        for label, prefix, id_type, new_id in variants:
+            patients, appointments = build_tables(metadata, prefix, id_type)
+            metadata.create_all(engine, tables=[patients, appointments])
+            patient_ids, insert_seconds = insert_rows(
+                engine, patients, appointments, new_id, args.patients, args.appointments_per_patient, args.batch
+            )
+            joins, range_seconds, range_rows = time_joins(engine, patients, appointments, patient_ids, args.joins)
+            data_bytes, index_bytes = sizes(engine, [patients, appointments])
+            results[label] = (total_rows / insert_seconds, statistics.median(joins))
+            print(f"{label}")
+            print(f"  Insert:        {total_rows / insert_seconds:10.0f} rows/s   ({insert_seconds:.1f}s)")
+            print(f"  History join:  p50 {statistics.median(joins) * 1e6:8.1f} us   "
+                  f"p95 {percentile(joins, 0.95) * 1e6:8.1f} us")
+            print(f"  Week join:     {range_seconds * 1000:10.1f} ms   ({range_rows} rows)")
+            print(f"  Size:          data {data_bytes / 2**20:8.1f} MiB   indexes {index_bytes / 2**20:8.1f} MiB\n")
+    finally:
+        metadata.drop_all(engine)
+
+    (before_insert, before_join), (after_insert, after_join) = results.values()
+    print(f"✅ Inserts {after_insert / before_insert:.2f}x, history joins {before_join / after_join:.2f}x "
+          f"(uuid7 BINARY(16) vs uuid4 String(36))")
+
+
+if __name__ == "__main__":
+    main()
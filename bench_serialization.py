@@ -0,0 +1,134 @@
+"""
+Benchmark JSON rendering of a 1,000-row /api/appointments page
+
+Usage:
+    python bench_serialization.py [--rows 1000] [--repeat 50] [--database-url mysql+pymysql://...]
+
+Times, for the same page of ORM rows:
+  - the query (crud.get_appointments),
+  - the old pipeline: per-row model_validate into ApiResponse(data: Any), then
+    FastAPI's response_model validation, dump to Python and json.dumps,
+  - responses.render_bytes: one TypeAdapter validation of the typed envelope
+    straight to JSON bytes,
+  - the whole request through the app (TestClient), to show what share of
+    the latency serialization is.
+Defaults to a throwaway SQLite file.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="Appointments on the page")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed runs per step")
+    parser.add_argument("--database-url", default=None, help="Database to benchmark (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def seed(crud, db, availability, rows: int):
+    doctors = crud.bulk_create_doctors(db, [
+        {"name": f"Bench Doctor {i}", "specialization": "General", "contact": f"+1000{i:06d}",
+         "email": f"bench.serial{i}@example.com"}
+        for i in range(10)
+    ])["ids"]
+    patients = crud.bulk_create_patients(db, [
+        {"name": f"Bench Patient {i}", "age": 30 + i % 50, "gender": "Other", "contact": f"+2000{i:06d}",
+         "address": "Bench St"}
+        for i in range(100)
+    ])["ids"]
+    start = date.today() + timedelta(days=1)
+    per_day = availability.SLOTS_PER_DAY * len(doctors)
+    result = crud.bulk_create_appointments(db, [
+        {"patient_id": patients[i % len(patients)], "doctor_id": doctors[i % len(doctors)],
+         "date": (start + timedelta(days=i // per_day)).isoformat(),
+         "time": availability.SLOT_LABELS[(i // len(doctors)) % availability.SLOTS_PER_DAY],
+         "reason": "Routine checkup and blood pressure review"}
+        for i in range(rows)
+    ])
+    if result["errors"]:
+        print(f"❌ Seeding failed: {result['errors'][:3]}")
+        sys.exit(1)
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_serialization.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DEBUG"] = "False"
+
+    from fastapi.testclient import TestClient
+    from pydantic import TypeAdapter
+
+    import availability
+    import crud
+    import main as app_main
+    import responses
+    import schemas
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        seed(crud, db, availability, args.rows)
+        page = crud.get_appointments(db, limit=args.rows)
+        legacy = TypeAdapter(schemas.ApiResponse)
+
+        def old_pipeline():
+            envelope = schemas.ApiResponse(data=[schemas.Appointment.model_validate(row) for row in page], success=True)
+            value = legacy.validate_python(envelope)
+            content = legacy.dump_python(value, mode="json")
+            return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+        def new_pipeline():
+            return responses.render_bytes(schemas.AppointmentListResponse, page)
+
+        if json.loads(old_pipeline())["data"] != json.loads(new_pipeline())["data"]:
+            print("❌ Old and new pipelines render different JSON")
+            sys.exit(1)
+
+        query = timed(lambda: crud.get_appointments(db, limit=args.rows), args.repeat)
+        old = timed(old_pipeline, args.repeat)
+        new = timed(new_pipeline, args.repeat)
+    finally:
+        db.close()
+
+    with TestClient(app_main.app) as client:
+        url = f"/api/appointments?limit={args.rows}"
+        response = client.get(url)
+        if response.status_code != 200 or len(response.json()["data"]) != args.rows:
+            print(f"❌ GET {url} returned {response.status_code}")
+            sys.exit(1)
+        request = timed(lambda: client.get(url), args.repeat)
+
+    print("=" * 60)
+    print("Response Serialization Benchmark")
+    print("=" * 60)
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Page: {args.rows} appointments, {len(response.content) / 1024:.0f} KiB JSON, median of {args.repeat} runs\n")
+    print(f"Query:                       {query * 1000:8.2f} ms")
+    print(f"Old pipeline (Any envelope): {old * 1000:8.2f} ms")
+    print(f"responses.render_bytes:      {new * 1000:8.2f} ms")
+    print(f"Full request:                {request * 1000:8.2f} ms")
+    print(f"\nSerialization share of the request: {new / request:.0%} now, "
+          f"{old / (request - new + old):.0%} with the old pipeline")
+    print(f"✅ Rendering is {old / new:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+EXPLAIN regression check for every query issued by crud.py
+
+Usage:
+    python check_query_plans.py [--database-url sqlite:///plans.db] [--rows 2000]
+
+Seeds a scratch database (temporary SQLite by default), calls every public
+function in crud.py, captures the SELECT/UPDATE/DELETE statements each one
+executes and runs EXPLAIN on them with the same parameters. Exits with status
+1 if any statement falls back to a full table scan, or if a crud function has
+no entry in EXERCISES below (so new queries cannot slip in unchecked).
+
+It also reads pages of 5 and 100 rows from the list functions in PAGE_SIZES,
+serialising them as the API does, and exits 1 if the larger page runs more
+statements than the smaller one (a per-row lazy load or query in a loop).
+
+Full scan means `SCAN <table>` without an index on SQLite and `type = ALL` on
+MySQL. Index-ordered scans bounded by LIMIT (`SCAN ... USING INDEX`) are fine.
+"""
+import argparse
+import inspect
+import os
+import re
+import sys
+import tempfile
+from datetime import date, time, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Database to check (default: temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=2000, help="Patients to seed; other tables scale from it")
+    parser.add_argument("--verbose", action="store_true", help="Print the plan of every statement")
+    return parser.parse_args()
+
+
+def seed(crud, db, rows: int):
+    doctors = crud.bulk_create_doctors(db, [
+        {"name": f"Doctor {i}", "specialization": "General", "contact": f"+1000{i:06d}", "email": f"doc{i}@example.com"}
+        for i in range(max(10, rows // 20))
+    ])["ids"]
+    patients = crud.bulk_create_patients(db, [
+        {"name": f"Patient {i}", "age": 20 + i % 70, "gender": "Female", "contact": f"+2000{i:06d}", "address": "Plan St"}
+        for i in range(rows)
+    ])["ids"]
+    start = date.today() - timedelta(days=30)
+    crud.bulk_create_appointments(db, [
+        {"patient_id": patients[i % len(patients)], "doctor_id": doctors[i % len(doctors)],
+         "date": (start + timedelta(days=i % 60)).isoformat(), "time": f"{9 + i % 8:02d}:00", "reason": "Checkup"}
+        for i in range(rows * 2)
+    ])
+    crud.bulk_create_prescriptions(db, [
+        {"patient_id": patients[i % len(patients)], "doctor_id": doctors[i % len(doctors)],
+         "diagnosis": "Flu", "medications": "Rest", "date": (start + timedelta(days=i % 60)).isoformat(),
+         "attachments": [f"scans/{i}.pdf", f"labs/{i % 50}.png"]}
+        for i in range(rows)
+    ])
+    return patients, doctors
+
+
+def build_exercises(crud, schemas, pagination, patients, doctors):
+    """Representative call(s) for every public crud function"""
+    state = {}
+
+    def new_patient(db):
+        state["patient"] = crud.create_patient(db, schemas.PatientCreate(
+            name="Plan Check", age=40, gender="Male", contact="+3000000000", address="Plan St"))
+
+    def new_doctor(db):
+        state["doctor"] = crud.create_doctor(db, schemas.DoctorCreate(
+            name="Plan Doctor", specialization="General", contact="+3000000001", email="plan.doctor@example.com"))
+
+    def new_appointment(db):
+        state["appointment"] = crud.create_appointment(db, schemas.AppointmentCreate(
+            patient_id=state["patient"].id, doctor_id=state["doctor"].id, date=date.today(), time=time(10), reason="Plan"))
+
+    def new_prescription(db):
+        state["prescription"] = crud.create_prescription(db, schemas.PrescriptionCreate(
+            patient_id=state["patient"].id, doctor_id=state["doctor"].id, diagnosis="Plan", medications="Plan",
+            date=date.today(), attachments=["scans/plan.pdf"]))
+
+    def paged(fn, order):
+        def run(db):
+            page = fn(db, limit=50)
+            fn(db, skip=100, limit=50)
+            fn(db, limit=50, cursor=pagination.next_cursor(page, order, 50))
+        return run
+
+    # Ordered so that creates run before the reads, updates and deletes that use their rows
+    return [
+        ("get_patients", paged(crud.get_patients, crud.PATIENT_ORDER)),
+        ("get_patient", lambda db: crud.get_patient(db, patients[0])),
+        ("get_doctors", paged(crud.get_doctors, crud.DOCTOR_ORDER)),
+        ("get_doctor", lambda db: crud.get_doctor(db, doctors[0])),
+        ("get_appointments", paged(crud.get_appointments, crud.APPOINTMENT_ORDER)),
+        ("get_prescriptions", paged(crud.get_prescriptions, crud.PRESCRIPTION_ORDER)),
+        ("get_prescriptions_by_patient", lambda db: crud.get_prescriptions_by_patient(db, patients[0])),
+        ("get_prescriptions_by_attachment", paged(
+            lambda db, **page: crud.get_prescriptions_by_attachment(db, "labs/7.png", **page), crud.PRESCRIPTION_ORDER)),
+        ("get_dashboard_stats", lambda db: crud.get_dashboard_stats(db)),
+        ("get_table_version", lambda db: [crud.get_table_version(db, model) for model in crud.ROW_COUNTERS]),
+        ("create_patient", new_patient),
+        ("create_doctor", new_doctor),
+        ("create_appointment", new_appointment),
+        ("create_prescription", new_prescription),
+        ("get_appointment", lambda db: crud.get_appointment(db, state["appointment"].id)),
+        ("get_prescription", lambda db: crud.get_prescription(db, state["prescription"].id)),
+        ("get_entity_version", lambda db: [
+            crud.get_entity_version(db, type(state[name]), state[name].id)
+            for name in ("patient", "doctor", "appointment", "prescription")]),
+        ("get_prescription_attachments", lambda db: crud.get_prescription_attachments(db, state["prescription"].id)),
+        ("update_patient", lambda db: crud.update_patient(db, state["patient"].id, schemas.PatientUpdate(age=41))),
+        ("update_doctor", lambda db: crud.update_doctor(db, state["doctor"].id, schemas.DoctorUpdate(contact="+3000000002"))),
+        ("update_appointment", lambda db: crud.update_appointment(
+            db, state["appointment"].id, schemas.AppointmentUpdate(reason="Plan update"))),
+        ("update_prescription", lambda db: crud.update_prescription(
+            db, state["prescription"].id, schemas.PrescriptionUpdate(
+                instructions="Plan update", attachments=["scans/plan.pdf", "labs/plan.png"]))),
+        ("bulk_create_patients", lambda db: crud.bulk_create_patients(db, [
+            {"name": "Bulk Plan", "age": 30, "gender": "Other", "contact": "+3000000003", "address": "Plan St"}])),
+        ("bulk_create_doctors", lambda db: crud.bulk_create_doctors(db, [
+            {"name": "Bulk Doc", "specialization": "General", "contact": "+3000000004", "email": "bulk.plan@example.com"}])),
+        ("bulk_create_appointments", lambda db: crud.bulk_create_appointments(db, [
+            {"patient_id": patients[1], "doctor_id": doctors[1], "date": date.today().isoformat(), "time": "11:00",
+             "reason": "Bulk plan"}])),
+        ("bulk_create_prescriptions", lambda db: crud.bulk_create_prescriptions(db, [
+            {"patient_id": patients[1], "doctor_id": doctors[1], "diagnosis": "Bulk", "medications": "Plan",
+             "date": date.today().isoformat(), "attachments": ["scans/bulk.pdf"]}])),
+        ("delete_appointment", lambda db: crud.delete_appointment(db, state["appointment"].id)),
+        ("delete_prescription", lambda db: crud.delete_prescription(db, state["prescription"].id)),
+        ("delete_doctor", lambda db: crud.delete_doctor(db, doctors[2])),
+        ("delete_patient", lambda db: crud.delete_patient(db, patients[2])),
+    ]
+
+
+PAGE_SIZES = (5, 100)
+
+
+def build_page_reads(crud, doctor_id: str):
+    """(name, read(db, size), response schema name) for list reads whose statement count must not grow with the page"""
+    by_patient = {size: seed_patient_prescriptions(crud, doctor_id, size) for size in PAGE_SIZES}
+    return [
+        ("get_appointments", lambda db, size: crud.get_appointments(db, limit=size), "Appointment"),
+        ("get_prescriptions", lambda db, size: crud.get_prescriptions(db, limit=size), "Prescription"),
+        ("get_prescriptions_by_patient", lambda db, size: crud.get_prescriptions_by_patient(db, by_patient[size]),
+         "Prescription"),
+    ]
+
+
+def seed_patient_prescriptions(crud, doctor_id: str, count: int) -> str:
+    """A new patient holding exactly `count` prescriptions, each with attachments"""
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        patient_id = crud.bulk_create_patients(db, [
+            {"name": f"Page Check {count}", "age": 50, "gender": "Other", "contact": "+3100000000", "address": "Page St"}
+        ])["ids"][0]
+        crud.bulk_create_prescriptions(db, [
+            {"patient_id": patient_id, "doctor_id": doctor_id, "diagnosis": "Page", "medications": "Page",
+             "date": date.today().isoformat(), "attachments": [f"scans/page-{count}-{i}.pdf", "labs/page.png"]}
+            for i in range(count)
+        ])
+    finally:
+        db.close()
+    return patient_id
+
+
+def page_statements(read, response_schema, size: int):
+    """(rows, statements) for one page read and serialised on a fresh session"""
+    import querystats
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        with querystats.collect() as queries:
+            rows = read(db, size)
+            [response_schema.model_validate(row).model_dump() for row in rows]
+        return len(rows), queries.count
+    finally:
+        db.close()
+
+
+def check_page_sizes(crud, schemas, doctor_id: str) -> int:
+    """Print statements per page size for each list read; return how many grew with the page"""
+    failures = 0
+    for name, read, schema_name in build_page_reads(crud, doctor_id):
+        small, large = (page_statements(read, getattr(schemas, schema_name), size) for size in PAGE_SIZES)
+        if small[0] != PAGE_SIZES[0] or large[0] != PAGE_SIZES[1]:
+            failures += 1
+            print(f"❌ {name}: pages had {small[0]} and {large[0]} rows, expected {PAGE_SIZES[0]} and "
+                  f"{PAGE_SIZES[1]}; seed more rows")
+        elif small[1] != large[1]:
+            failures += 1
+            print(f"❌ {name}: {small[1]} statements for {small[0]} rows but {large[1]} for {large[0]} rows")
+        else:
+            print(f"✅ {name}: {small[1]} statements for {small[0]} rows and for {large[0]} rows")
+    return failures
+
+
+def crud_functions(crud):
+    return sorted(
+        name for name, fn in inspect.getmembers(crud, inspect.isfunction)
+        if fn.__module__ == crud.__name__ and not name.startswith("_") and not inspect.iscoroutinefunction(fn)
+    )
+
+
+CHECKED = re.compile(r"^\s*(SELECT|UPDATE|DELETE)\b", re.IGNORECASE)
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def full_scans(connection, statement, parameters):
+    """Tables the statement reads with a full scan, plus the raw plan lines"""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        plan = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        details = [row[-1] for row in plan]
+        return [m.group(1) for m in map(SQLITE_FULL_SCAN.match, details) if m], details
+    if dialect == "mysql":
+        result = connection.exec_driver_sql("EXPLAIN " + statement, parameters)
+        rows = [dict(zip(result.keys(), row)) for row in result]
+        details = [f"{row['table']}: type={row['type']} key={row['key']} rows={row['rows']}" for row in rows]
+        return [row["table"] for row in rows if row["type"] == "ALL"], details
+    return [], [f"EXPLAIN not supported for {dialect}"]
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'query_plans.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DEBUG"] = "False"
+
+    from sqlalchemy import event, text
+
+    import crud
+    import pagination
+    import schemas
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+
+    print("=" * 60)
+    print("Query Plan Check")
+    print("=" * 60)
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}\n")
+
+    db = SessionLocal()
+    patients, doctors = seed(crud, db, args.rows)
+    with engine.begin() as conn:
+        if engine.dialect.name == "mysql":
+            for table in Base.metadata.tables:
+                conn.execute(text(f"ANALYZE TABLE {table}"))
+        else:
+            conn.execute(text("ANALYZE"))
+
+    exercises = build_exercises(crud, schemas, pagination, patients, doctors)
+    missing = sorted(set(crud_functions(crud)) - {name for name, _ in exercises})
+
+    captured = []
+    current = {"name": None}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if current["name"] and not executemany and CHECKED.match(statement):
+            captured.append((current["name"], statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        for name, run in exercises:
+            current["name"] = name
+            run(db)
+    finally:
+        current["name"] = None
+        event.remove(engine, "before_cursor_execute", capture)
+        db.close()
+
+    failures = 0
+    with engine.connect() as conn:
+        for name, statement, parameters in captured:
+            tables, details = full_scans(conn, statement, parameters)
+            if tables:
+                failures += 1
+                print(f"❌ {name}: full scan of {', '.join(tables)}")
+                print("   " + " ".join(statement.split()))
+                for line in details:
+                    print(f"   | {line}")
+            elif args.verbose:
+                print(f"✅ {name}: " + "; ".join(details))
+
+    checked_functions = len({name for name, _, _ in captured})
+    print(f"\nChecked {len(captured)} statements from {checked_functions} crud functions")
+    for name in missing:
+        print(f"❌ crud.{name} has no entry in EXERCISES; add one so its queries are checked")
+
+    if not failures and not missing:
+        print("✅ No full table scans")
+
+    print("\nStatements per page:")
+    page_failures = check_page_sizes(crud, schemas, doctors[0])
+
+    if failures or missing or page_failures:
+        sys.exit(1)
+    print("✅ Statement counts do not grow with the page size")
+
+
+if __name__ == "__main__":
+    main()
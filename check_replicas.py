@@ -0,0 +1,180 @@
+"""
+Read-replica routing check
+
+Usage:
+    python check_replicas.py [--replicas 2] [--window 1]
+
+Builds a primary and --replicas copies of it as SQLite files in a temporary
+directory, each holding one marker patient so a response shows which database
+served it, and drives the app through TestClient to check that:
+  - GET endpoints read from the replicas, round-robin,
+  - a client that writes reads from the primary for --window seconds while
+    other clients keep reading from replicas,
+  - a replica failing its health check leaves the rotation, reads fall back
+    to the primary when none is left, and a recovered replica comes back,
+  - a replica session refuses writes.
+The app runs with a one-connection primary pool and no user cache, so any
+request that needs a second primary connection (for example the user lookup
+plus a primary read) fails with 503 instead of passing unnoticed.
+Exits 1 on the first failed expectation.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicas", type=int, default=2, help="Replica files to route between (at least 2)")
+    parser.add_argument("--window", type=int, default=1, help="READ_YOUR_WRITES_SECONDS for the run")
+    return parser.parse_args()
+
+
+def add_marker(path: str, name: str):
+    from sqlalchemy import create_engine, insert
+
+    import models
+
+    now = datetime.utcnow()
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(insert(models.Patient.__table__).values(
+            id=str(uuid.uuid4()), name=name, age=40, gender="Other", contact="+3000000000",
+            address="Marker St", created_at=now, updated_at=now))
+    engine.dispose()
+
+
+def expect(condition: bool, message: str):
+    if not condition:
+        print(f"❌ {message}")
+        sys.exit(1)
+    print(f"✅ {message}")
+
+
+def main():
+    args = parse_args()
+    if args.replicas < 2:
+        sys.exit("--replicas must be at least 2 to check round-robin")
+    workdir = tempfile.mkdtemp()
+    primary = os.path.join(workdir, "primary.db")
+    copies = [os.path.join(workdir, f"replica{index}.db") for index in range(args.replicas)]
+    os.environ["DATABASE_URL"] = f"sqlite:///{primary}"
+    os.environ["DATABASE_REPLICA_URLS"] = ",".join(f"sqlite:///{path}" for path in copies)
+    os.environ["READ_YOUR_WRITES_SECONDS"] = str(args.window)
+    os.environ["REPLICA_HEALTH_CHECK_SECONDS"] = "0"  # checks are run by hand below
+    os.environ["DEBUG"] = "False"
+    os.environ["DOCTOR_DIRECTORY_POLL_SECONDS"] = "0"
+    os.environ["DB_POOL_SIZE"] = "1"
+    os.environ["DB_MAX_OVERFLOW"] = "0"
+    os.environ["DB_POOL_TIMEOUT"] = "2"
+    os.environ["USER_CACHE_SIZE"] = "0"  # every request looks its user up on the primary
+
+    from fastapi.testclient import TestClient
+
+    import auth
+    import main as app_main
+    import models
+    import replicas
+    import schemas
+    from database import Base, SessionLocal, engine
+
+    # Users first so every copy can resolve both tokens
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        tokens = [
+            auth.create_access_token({"sub": auth.create_user(db, schemas.UserCreate(
+                username=f"replica-check-{index}", email=f"replica-check-{index}@example.com",
+                full_name=f"Replica Check {index}", password="replica-check")).id})
+            for index in range(2)
+        ]
+    finally:
+        db.close()
+    engine.dispose()
+    for path in copies:
+        shutil.copyfile(primary, path)
+    add_marker(primary, "Marker primary")
+    for index, path in enumerate(copies):
+        add_marker(path, f"Marker replica{index}")
+
+    writer, reader = ({"Authorization": f"Bearer {token}"} for token in tokens)
+
+    def served_by(client, headers) -> str:
+        response = client.get("/api/patients?limit=100", headers=headers)
+        if response.status_code != 200:
+            print(f"❌ GET /api/patients returned {response.status_code}: {response.text[:200]}")
+            sys.exit(1)
+        names = [patient["name"] for patient in response.json()["data"]]
+        return next(name.split()[1] for name in names if name.startswith("Marker "))
+
+    def take_down(index: int):
+        os.replace(copies[index], copies[index] + ".bak")
+        os.mkdir(copies[index])  # a directory where the file was: every connect fails
+        replicas.replicas.replicas[index].engine.dispose()
+
+    def bring_back(index: int):
+        os.rmdir(copies[index])
+        os.replace(copies[index] + ".bak", copies[index])
+
+    print("=" * 60)
+    print("Read-Replica Routing Check")
+    print("=" * 60)
+    print(f"Primary and {args.replicas} replicas in {workdir}\n")
+
+    with TestClient(app_main.app) as client:
+        seen = [served_by(client, reader) for _ in range(args.replicas * 2)]
+        expected = [f"replica{index % args.replicas}" for index in range(args.replicas * 2)]
+        expect(seen == expected, f"Reads rotate across the replicas: {', '.join(seen)}")
+
+        response = client.post("/api/patients", headers=writer, json={
+            "name": "Written Patient", "age": 33, "gender": "Female", "contact": "+4000000000",
+            "address": "Write St"})
+        expect(response.status_code == 201, f"Writer created a patient ({response.status_code})")
+        expect(served_by(client, writer) == "primary", "Writer reads its write from the primary")
+        expect(served_by(client, reader).startswith("replica"), "Other clients keep reading from replicas")
+        time.sleep(args.window + 0.2)
+        expect(served_by(client, writer).startswith("replica"),
+               f"Writer returns to the replicas after {args.window}s")
+
+        take_down(0)
+        replicas.replicas.check()
+        seen = {served_by(client, reader) for _ in range(args.replicas * 2)}
+        expect("replica0" not in seen and "primary" not in seen,
+               f"Unhealthy replica0 leaves the rotation: {', '.join(sorted(seen))}")
+
+        for index in range(1, args.replicas):
+            take_down(index)
+        replicas.replicas.check()
+        expect(served_by(client, reader) == "primary", "Reads fall back to the primary with no healthy replica")
+
+        ready = client.get("/health/ready").json()
+        expect(ready["status"] == "ready" and not any(r["healthy"] for r in ready["replicas"]["replicas"]),
+               "/health/ready stays ready and reports the replicas down")
+
+        for index in range(args.replicas):
+            bring_back(index)
+        replicas.replicas.check()
+        seen = {served_by(client, reader) for _ in range(args.replicas * 2)}
+        expect(seen == {f"replica{index}" for index in range(args.replicas)}, "Recovered replicas rejoin the rotation")
+
+    db = replicas.read_session()
+    try:
+        db.add(models.Patient(name="Not Allowed", age=1, gender="Other", contact="+5000000000", address="-"))
+        db.flush()
+        refused = False
+    except replicas.ReadOnlySessionError:
+        refused = True
+    finally:
+        db.close()
+    expect(refused, "Replica sessions refuse writes")
+
+    print("\n✅ Read-replica routing behaves as expected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Time-to-first-healthy check
+
+Usage:
+    python check_startup.py [--target 2.5] [--runs 3] [--mode check|create] [--database-url mysql+pymysql://...]
+
+Prepares a database at the newest migration (tables, search index, Alembic
+stamp), then starts `uvicorn main:app` --runs times with ENVIRONMENT=production
+and measures the time from launching the process to the first 200 from
+GET /health. Prints each run with the worker's own startup breakdown
+(imports, schema step) and background warm-up (pool, bcrypt, JWT), and exits
+1 if the slowest run exceeds --target seconds. `--mode create` measures the
+create_all boot for comparison. Defaults to a throwaway SQLite file.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", type=float, default=2.5, help="Seconds the slowest run may take to be healthy")
+    parser.add_argument("--runs", type=int, default=3, help="Server starts to measure")
+    parser.add_argument("--mode", choices=("check", "create"), default="check", help="SCHEMA_STARTUP for the server")
+    parser.add_argument("--database-url", default=None, help="Database to boot against (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def prepare(database_url: str):
+    """Bring the database to the newest migration the way a deploy would leave it"""
+    os.environ["DATABASE_URL"] = database_url
+    from alembic import command
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    import models  # noqa: F401 - registers all tables on Base.metadata
+    import search
+    from database import Base, engine, expected_revision
+
+    config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+    head = ScriptDirectory.from_config(config).get_current_head()
+    if expected_revision() != head:
+        print(f"❌ database.expected_revision() is {expected_revision()}, Alembic's head is {head}")
+        sys.exit(1)
+    Base.metadata.create_all(bind=engine)
+    search.ensure_index()
+    command.stamp(config, "head")
+    engine.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_health(port: int):
+    """(status, body) from GET /health, or None while nothing is listening"""
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("GET", "/health")
+        response = conn.getresponse()
+        return response.status, response.read()
+    except OSError:
+        return None
+
+
+def boot(port: int, env: dict, timeout: float = 60):
+    """Start a server and return (seconds to first healthy response, startup report after warm-up)"""
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning", "--no-access-log"]
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        healthy = None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError(f"Server exited with code {server.returncode}")
+            result = get_health(port)
+            if result is not None and result[0] == 200:
+                healthy = time.perf_counter() - started
+                break
+            time.sleep(0.002)
+        if healthy is None:
+            raise RuntimeError(f"Server did not become healthy within {timeout:.0f} seconds")
+        # Wait for the background warm-up so its timings can be reported
+        report = json.loads(result[1])["startup"]
+        while not report["warmup_done"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+            report = json.loads(get_health(port)[1])["startup"]
+        return healthy, report
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def breakdown(timings: dict) -> str:
+    return ", ".join(f"{name} {ms:.0f}" for name, ms in timings.items()) or "-"
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'check_startup.db')}"
+    prepare(database_url)
+    env = dict(os.environ, DATABASE_URL=database_url, ENVIRONMENT="production", SCHEMA_STARTUP=args.mode,
+               DEBUG="False")
+
+    print("=" * 60)
+    print("Time-to-First-Healthy Check")
+    print("=" * 60)
+    print(f"SCHEMA_STARTUP={args.mode}, {args.runs} runs, target {args.target:.2f}s\n")
+
+    results = []
+    for run in range(1, args.runs + 1):
+        healthy, report = boot(free_port(), env)
+        results.append(healthy)
+        print(f"Run {run}: healthy after {healthy * 1000:6.0f} ms  |  in worker (ms): "
+              f"{breakdown(report['phases_ms'])}  |  warm-up (ms): {breakdown(report['warmup_ms'])}")
+        if report["schema"]["status"] not in ("current", "created"):
+            print(f"\n❌ Schema step did not succeed: {report['schema']}")
+            sys.exit(1)
+        for step, error in report["warmup_errors"].items():
+            print(f"   ⚠️  warm-up {step} failed: {error}")
+
+    slowest = max(results)
+    print(f"\nMedian {statistics.median(results) * 1000:.0f} ms, slowest {slowest * 1000:.0f} ms")
+    if slowest > args.target:
+        print(f"❌ Slowest start exceeded the {args.target:.2f}s target")
+        sys.exit(1)
+    print(f"✅ Every start was healthy within {args.target:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Incrementally maintained dashboard counters
+
+Row counts for patients, doctors, appointments, prescriptions and appointments
+per day live in the `counters` table. ORM insert/delete events adjust them on the same
+connection as the write, so a counter change commits or rolls back together
+with the row it describes. That includes children removed by ORM cascades.
+Writes that bypass the ORM unit of work (bulk Core inserts, raw SQL) call
+bump() themselves or rely on reconcile(), which recounts from the source
+tables and fixes drift. reconcile() scans whole tables, so it runs as one
+scheduled job (reconcile_counters.py), not in every worker.
+"""
+from datetime import date, datetime
+from typing import Dict, Iterable
+
+from sqlalchemy import String, cast, event, func, inspect, literal, select
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+import models
+
+
+PATIENTS = "patients"
+DOCTORS = "doctors"
+APPOINTMENTS = "appointments"
+PRESCRIPTIONS = "prescriptions"
+APPOINTMENTS_ON_PREFIX = "appointments_on:"
+
+_table = models.Counter.__table__
+
+
+def appointments_on(day: date) -> str:
+    """Counter name for the number of appointments on `day`"""
+    return f"{APPOINTMENTS_ON_PREFIX}{day.isoformat()}"
+
+
+def _upsert(dialect_name: str, name: str, delta: int):
+    now = datetime.utcnow()
+    values = dict(name=name, value=delta, updated_at=now)
+    if dialect_name == "mysql":
+        stmt = mysql.insert(_table).values(**values)
+        return stmt.on_duplicate_key_update(value=_table.c.value + delta, updated_at=now)
+    if dialect_name in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect_name == "sqlite" else postgresql.insert
+        stmt = insert(_table).values(**values)
+        return stmt.on_conflict_do_update(
+            index_elements=[_table.c.name],
+            set_={"value": _table.c.value + delta, "updated_at": now},
+        )
+    return None
+
+
+def bump(connection, name: str, delta: int = 1) -> None:
+    """Atomically add `delta` to a counter, creating it if needed"""
+    if not delta:
+        return
+    stmt = _upsert(connection.dialect.name, name, delta)
+    if stmt is not None:
+        connection.execute(stmt)
+        return
+    result = connection.execute(
+        _table.update().where(_table.c.name == name).values(value=_table.c.value + delta, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        connection.execute(_table.insert().values(name=name, value=delta, updated_at=datetime.utcnow()))
+
+
+def read(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """Current values of the named counters (missing counters read as 0)"""
+    names = list(names)
+    rows = db.execute(select(_table.c.name, _table.c.value).where(_table.c.name.in_(names))).all()
+    values = {name: 0 for name in names}
+    values.update({name: int(value) for name, value in rows})
+    return values
+
+
+def _total_drift(connection, name: str, model) -> int:
+    # The count and the stored value come from one statement, hence one snapshot
+    actual = select(func.count()).select_from(model).scalar_subquery()
+    stored = select(_table.c.value).where(_table.c.name == name).scalar_subquery()
+    return int(connection.execute(select(actual - func.coalesce(stored, 0))).scalar() or 0)
+
+
+def _daily_drift(connection) -> Dict[str, int]:
+    day_name = literal(APPOINTMENTS_ON_PREFIX) + cast(models.Appointment.date, String)
+    stored = (
+        select(_table.c.name.label("name"), (-_table.c.value).label("delta"))
+        .where(_table.c.name.like(f"{APPOINTMENTS_ON_PREFIX}%"))
+    )
+    actual = select(day_name.label("name"), func.count().label("delta")).group_by(models.Appointment.date)
+    drift: Dict[str, int] = {}
+    for name, delta in connection.execute(stored.union_all(actual)).all():
+        drift[name] = drift.get(name, 0) + int(delta)
+    return drift
+
+
+def reconcile(db: Session, apply: bool = True) -> Dict[str, int]:
+    """
+    Recount every counter from the source tables and correct any drift.
+
+    Drift is measured without locks: each total is compared with its counter
+    in a single statement, and the per-day counters with a single UNION, so
+    the count and the stored value share one snapshot. Writers change a row
+    and its counter in the same transaction, so the drift seen in that
+    snapshot is still the drift after later commits; it is added with bump()
+    in one short transaction instead of overwriting the value. Returns the
+    drift by counter name (not applied when `apply` is False).
+    """
+    totals = [
+        (PATIENTS, models.Patient),
+        (DOCTORS, models.Doctor),
+        (APPOINTMENTS, models.Appointment),
+        (PRESCRIPTIONS, models.Prescription),
+    ]
+    drift: Dict[str, int] = {}
+    for name, model in totals:
+        drift[name] = _total_drift(db.connection(), name, model)
+        db.commit()
+    drift.update(_daily_drift(db.connection()))
+    db.commit()
+
+    drift = {name: delta for name, delta in drift.items() if delta}
+    if apply and drift:
+        connection = db.connection()
+        for name, delta in sorted(drift.items()):
+            bump(connection, name, delta)
+        db.commit()
+    return drift
+
+
+# ========== ORM EVENT HOOKS ==========
+@event.listens_for(models.Patient, "after_insert")
+def _patient_inserted(mapper, connection, target):
+    bump(connection, PATIENTS, 1)
+
+
+@event.listens_for(models.Patient, "after_delete")
+def _patient_deleted(mapper, connection, target):
+    bump(connection, PATIENTS, -1)
+
+
+@event.listens_for(models.Doctor, "after_insert")
+def _doctor_inserted(mapper, connection, target):
+    bump(connection, DOCTORS, 1)
+
+
+@event.listens_for(models.Doctor, "after_delete")
+def _doctor_deleted(mapper, connection, target):
+    bump(connection, DOCTORS, -1)
+
+
+@event.listens_for(models.Prescription, "after_insert")
+def _prescription_inserted(mapper, connection, target):
+    bump(connection, PRESCRIPTIONS, 1)
+
+
+@event.listens_for(models.Prescription, "after_delete")
+def _prescription_deleted(mapper, connection, target):
+    bump(connection, PRESCRIPTIONS, -1)
+
+
+@event.listens_for(models.Appointment, "after_insert")
+def _appointment_inserted(mapper, connection, target):
+    bump(connection, APPOINTMENTS, 1)
+    bump(connection, appointments_on(target.date), 1)
+
+
+@event.listens_for(models.Appointment, "after_delete")
+def _appointment_deleted(mapper, connection, target):
+    bump(connection, APPOINTMENTS, -1)
+    bump(connection, appointments_on(target.date), -1)
+
+
+@event.listens_for(models.Appointment.date, "set", active_history=True)
+def _track_previous_date(target, value, oldvalue, initiator):
+    # active_history makes the ORM load an expired date before it is
+    # overwritten, so after_update can see which day to decrement
+    pass
+
+
+@event.listens_for(models.Appointment, "after_update")
+def _appointment_updated(mapper, connection, target):
+    history = inspect(target).attrs.date.history
+    if not history.has_changes():
+        return
+    for old_day in history.deleted:
+        if old_day is not None:
+            bump(connection, appointments_on(old_day), -1)
+    for new_day in history.added:
+        if new_day is not None:
+            bump(connection, appointments_on(new_day), 1)
@@ -1,14 +1,34 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from datetime import date
-from typing import List, Optional
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, insert, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from pydantic import ValidationError
+from collections import Counter as TallyCounter
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+import asyncio
+import random
+import time
 import models
 import schemas
+import pagination
+import counters
+import availability
+import directory
+from config import settings
+
+
+# Stable sort keys used for keyset pagination of list endpoints
+PATIENT_ORDER = (models.Patient.created_at, models.Patient.id)
+DOCTOR_ORDER = (models.Doctor.created_at, models.Doctor.id)
+APPOINTMENT_ORDER = (models.Appointment.date, models.Appointment.time, models.Appointment.id)
+PRESCRIPTION_ORDER = (models.Prescription.created_at, models.Prescription.id)
 
 
 # ========== PATIENT CRUD ==========
-def get_patients(db: Session, skip: int = 0, limit: int = 100) -> List[models.Patient]:
-    return db.query(models.Patient).offset(skip).limit(limit).all()
+def get_patients(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.Patient]:
+    query = db.query(models.Patient)
+    return pagination.paginate(query, PATIENT_ORDER, skip=skip, limit=limit, cursor=cursor).all()
 
 
 def get_patient(db: Session, patient_id: str) -> Optional[models.Patient]:
@@ -44,8 +64,9 @@ def delete_patient(db: Session, patient_id: str) -> bool:
 
 
 # ========== DOCTOR CRUD ==========
-def get_doctors(db: Session, skip: int = 0, limit: int = 100) -> List[models.Doctor]:
-    return db.query(models.Doctor).offset(skip).limit(limit).all()
+def get_doctors(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.Doctor]:
+    query = db.query(models.Doctor)
+    return pagination.paginate(query, DOCTOR_ORDER, skip=skip, limit=limit, cursor=cursor).all()
 
 
 def get_doctor(db: Session, doctor_id: str) -> Optional[models.Doctor]:
@@ -81,56 +102,134 @@ def delete_doctor(db: Session, doctor_id: str) -> bool:
 
 
 # ========== APPOINTMENT CRUD ==========
-def get_appointments(db: Session, skip: int = 0, limit: int = 100) -> List[models.Appointment]:
-    appointments = db.query(models.Appointment).offset(skip).limit(limit).all()
-    
-    # Add patient and doctor names
-    for appointment in appointments:
-        if appointment.patient:
-            appointment.patient_name = appointment.patient.name
-        if appointment.doctor:
-            appointment.doctor_name = appointment.doctor.name
-    
-    return appointments
+def _appointments_with_names(db: Session):
+    """Appointment query that projects patient and doctor names in the same SELECT"""
+    return (
+        db.query(models.Appointment, models.Patient.name, models.Doctor.name)
+        .outerjoin(models.Patient, models.Appointment.patient_id == models.Patient.id)
+        .outerjoin(models.Doctor, models.Appointment.doctor_id == models.Doctor.id)
+    )
+
+
+def _attach_names(rows) -> list:
+    """Copy projected patient/doctor names onto the loaded entities"""
+    results = []
+    for entity, patient_name, doctor_name in rows:
+        entity.patient_name = patient_name
+        entity.doctor_name = doctor_name
+        results.append(entity)
+    return results
+
+
+def get_appointments(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.Appointment]:
+    query = _appointments_with_names(db)
+    rows = pagination.paginate(query, APPOINTMENT_ORDER, skip=skip, limit=limit, cursor=cursor).all()
+    return _attach_names(rows)
 
 
 def get_appointment(db: Session, appointment_id: str) -> Optional[models.Appointment]:
-    appointment = db.query(models.Appointment).filter(models.Appointment.id == appointment_id).first()
-    
-    if appointment:
-        if appointment.patient:
-            appointment.patient_name = appointment.patient.name
-        if appointment.doctor:
-            appointment.doctor_name = appointment.doctor.name
-    
-    return appointment
+    row = _appointments_with_names(db).filter(models.Appointment.id == appointment_id).first()
+    if row is None:
+        return None
+    return _attach_names([row])[0]
 
 
-def create_appointment(db: Session, appointment: schemas.AppointmentCreate) -> models.Appointment:
+class BookingConflict(ValueError):
+    """The doctor already has a live (non-cancelled) appointment at that date and time"""
+
+
+SLOT_CONFLICT_MESSAGE = "Doctor already has an appointment at that date and time"
+T = TypeVar("T")
+
+
+def _is_slot_conflict(error: IntegrityError) -> bool:
+    # MySQL/PostgreSQL name the index; SQLite lists its columns
+    message = str(error.orig)
+    return "uq_appointments_doctor_slot" in message or "appointments.booking_active" in message
+
+
+def _is_lock_conflict(error: OperationalError) -> bool:
+    # MySQL deadlock (1213) / lock wait timeout (1205), SQLite busy database
+    args = getattr(error.orig, "args", ())
+    return (bool(args) and args[0] in (1205, 1213)) or "database is locked" in str(error.orig)
+
+
+def _commit_booking(db: Session) -> None:
+    """Commit, turning a slot uniqueness violation into BookingConflict"""
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if _is_slot_conflict(e):
+            raise BookingConflict(SLOT_CONFLICT_MESSAGE) from e
+        raise
+
+
+def _lock_retry_delay(error: OperationalError, attempt: int) -> Optional[float]:
+    """Jittered backoff before retrying after `error`, or None if it is final"""
+    if attempt >= max(1, settings.BOOKING_MAX_ATTEMPTS) - 1 or not _is_lock_conflict(error):
+        return None
+    return random.uniform(0, 0.02 * 2 ** attempt)
+
+
+def _with_lock_retries(db: Session, attempt_booking: Callable[[], T]) -> T:
+    """
+    Run a booking, retrying a few times with jittered backoff when the
+    database picks it as a deadlock victim. Slot conflicts are final and are
+    never retried, so contended slots cannot cause a retry storm.
+    """
+    attempt = 0
+    while True:
+        try:
+            return attempt_booking()
+        except OperationalError as e:
+            db.rollback()
+            delay = _lock_retry_delay(e, attempt)
+            if delay is None:
+                raise
+            time.sleep(delay)
+        attempt += 1
+
+
+async def _with_lock_retries_async(db: AsyncSession, attempt_booking: Callable[[Session], T]) -> T:
+    """_with_lock_retries for AsyncSession: each attempt runs in run_sync, the backoff awaits"""
+    attempt = 0
+    while True:
+        try:
+            return await db.run_sync(attempt_booking)
+        except OperationalError as e:
+            await db.rollback()
+            delay = _lock_retry_delay(e, attempt)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+        attempt += 1
+
+
+def _book_appointment(db: Session, appointment: schemas.AppointmentCreate) -> models.Appointment:
+    """One booking attempt"""
     db_appointment = models.Appointment(**appointment.model_dump())
     db.add(db_appointment)
-    db.commit()
-    db.refresh(db_appointment)
-    
-    # Add patient and doctor names
-    if db_appointment.patient:
-        db_appointment.patient_name = db_appointment.patient.name
-    if db_appointment.doctor:
-        db_appointment.doctor_name = db_appointment.doctor.name
-    
+    _commit_booking(db)
     return db_appointment
 
 
-def update_appointment(db: Session, appointment_id: str, appointment: schemas.AppointmentUpdate) -> Optional[models.Appointment]:
+def _change_appointment(db: Session, appointment_id: str, appointment: schemas.AppointmentUpdate) -> Optional[models.Appointment]:
+    """One update attempt"""
     db_appointment = get_appointment(db, appointment_id)
     if db_appointment:
         update_data = appointment.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_appointment, key, value)
-        db.commit()
+        _commit_booking(db)
+    return db_appointment
+
+
+def _reload_with_names(db: Session, db_appointment: Optional[models.Appointment]) -> Optional[models.Appointment]:
+    """Refresh a committed appointment and add patient and doctor names"""
+    if db_appointment:
         db.refresh(db_appointment)
         
-        # Add patient and doctor names
         if db_appointment.patient:
             db_appointment.patient_name = db_appointment.patient.name
         if db_appointment.doctor:
@@ -139,6 +238,18 @@ def update_appointment(db: Session, appointment_id: str, appointment: schemas.Ap
     return db_appointment
 
 
+def create_appointment(db: Session, appointment: schemas.AppointmentCreate) -> models.Appointment:
+    """Book an appointment; raises BookingConflict if the doctor's slot is taken"""
+    db_appointment = _with_lock_retries(db, lambda: _book_appointment(db, appointment))
+    return _reload_with_names(db, db_appointment)
+
+
+def update_appointment(db: Session, appointment_id: str, appointment: schemas.AppointmentUpdate) -> Optional[models.Appointment]:
+    """Update an appointment; raises BookingConflict if it moves onto a taken slot"""
+    db_appointment = _with_lock_retries(db, lambda: _change_appointment(db, appointment_id, appointment))
+    return _reload_with_names(db, db_appointment)
+
+
 def delete_appointment(db: Session, appointment_id: str) -> bool:
     db_appointment = get_appointment(db, appointment_id)
     if db_appointment:
@@ -149,51 +260,58 @@ def delete_appointment(db: Session, appointment_id: str) -> bool:
 
 
 # ========== PRESCRIPTION CRUD ==========
-def get_prescriptions(db: Session, skip: int = 0, limit: int = 100) -> List[models.Prescription]:
-    prescriptions = db.query(models.Prescription).offset(skip).limit(limit).all()
-    
-    # Add patient and doctor names
-    for prescription in prescriptions:
-        if prescription.patient:
-            prescription.patient_name = prescription.patient.name
-        if prescription.doctor:
-            prescription.doctor_name = prescription.doctor.name
-    
-    return prescriptions
+def _prescriptions_with_names(db: Session):
+    """
+    Prescription query that projects patient and doctor names in the same SELECT;
+    attachments for the whole page are loaded with one extra IN query
+    """
+    return (
+        db.query(models.Prescription, models.Patient.name, models.Doctor.name)
+        .outerjoin(models.Patient, models.Prescription.patient_id == models.Patient.id)
+        .outerjoin(models.Doctor, models.Prescription.doctor_id == models.Doctor.id)
+        .options(selectinload(models.Prescription.attachment_rows))
+    )
+
+
+def get_prescriptions(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.Prescription]:
+    query = _prescriptions_with_names(db)
+    rows = pagination.paginate(query, PRESCRIPTION_ORDER, skip=skip, limit=limit, cursor=cursor).all()
+    return _attach_names(rows)
 
 
 def get_prescription(db: Session, prescription_id: str) -> Optional[models.Prescription]:
-    prescription = db.query(models.Prescription).filter(models.Prescription.id == prescription_id).first()
-    
-    if prescription:
-        if prescription.patient:
-            prescription.patient_name = prescription.patient.name
-        if prescription.doctor:
-            prescription.doctor_name = prescription.doctor.name
-    
-    return prescription
+    row = _prescriptions_with_names(db).filter(models.Prescription.id == prescription_id).first()
+    if row is None:
+        return None
+    return _attach_names([row])[0]
 
 
 def get_prescriptions_by_patient(db: Session, patient_id: str) -> List[models.Prescription]:
-    prescriptions = db.query(models.Prescription).filter(models.Prescription.patient_id == patient_id).all()
-    
-    # Add patient and doctor names
-    for prescription in prescriptions:
-        if prescription.patient:
-            prescription.patient_name = prescription.patient.name
-        if prescription.doctor:
-            prescription.doctor_name = prescription.doctor.name
-    
-    return prescriptions
+    rows = _prescriptions_with_names(db).filter(models.Prescription.patient_id == patient_id).all()
+    return _attach_names(rows)
+
+
+def get_prescriptions_by_attachment(
+    db: Session, path: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+) -> List[models.Prescription]:
+    """Prescriptions that have `path` among their attachments"""
+    attached = select(models.PrescriptionAttachment.prescription_id).where(models.PrescriptionAttachment.path == path)
+    query = _prescriptions_with_names(db).filter(models.Prescription.id.in_(attached))
+    rows = pagination.paginate(query, PRESCRIPTION_ORDER, skip=skip, limit=limit, cursor=cursor).all()
+    return _attach_names(rows)
+
+
+def get_prescription_attachments(db: Session, prescription_id: str) -> List[models.PrescriptionAttachment]:
+    return (
+        db.query(models.PrescriptionAttachment)
+        .filter(models.PrescriptionAttachment.prescription_id == prescription_id)
+        .order_by(models.PrescriptionAttachment.position)
+        .all()
+    )
 
 
 def create_prescription(db: Session, prescription: schemas.PrescriptionCreate) -> models.Prescription:
     prescription_data = prescription.model_dump()
-    
-    # Convert attachments list to string if present
-    if prescription_data.get('attachments'):
-        prescription_data['attachments'] = ','.join(prescription_data['attachments'])
-    
     db_prescription = models.Prescription(**prescription_data)
     db.add(db_prescription)
     db.commit()
@@ -212,11 +330,6 @@ def update_prescription(db: Session, prescription_id: str, prescription: schemas
     db_prescription = get_prescription(db, prescription_id)
     if db_prescription:
         update_data = prescription.model_dump(exclude_unset=True)
-        
-        # Convert attachments list to string if present
-        if 'attachments' in update_data and update_data['attachments']:
-            update_data['attachments'] = ','.join(update_data['attachments'])
-        
         for key, value in update_data.items():
             setattr(db_prescription, key, value)
         db.commit()
@@ -240,31 +353,341 @@ def delete_prescription(db: Session, prescription_id: str) -> bool:
     return False
 
 
-# ========== DASHBOARD STATS ==========
-def get_dashboard_stats(db: Session) -> schemas.DashboardStats:
-    # Total patients
-    total_patients = db.query(func.count(models.Patient.id)).scalar() or 0
+# ========== BULK CREATE ==========
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+
+def _existing_ids(db: Session, column, ids) -> set:
+    ids = set(ids)
+    if not ids:
+        return set()
+    return set(db.execute(select(column).where(column.in_(ids))).scalars())
+
+
+def _bulk_create(
+    db: Session,
+    model,
+    schema,
+    rows: List[Dict[str, Any]],
+    to_values: Callable[[Any], Dict[str, Any]],
+    check_chunk: Optional[Callable[[Session, list, list], list]] = None,
+    insert_children: Optional[Callable[[Session, list], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Validate `rows` with `schema` and insert the valid ones with one multi-row
+    INSERT per chunk, all inside a single transaction. Each chunk runs in a
+    SAVEPOINT; if it hits an integrity error (e.g. a concurrent duplicate) it is
+    retried row by row so only the offending rows are reported.
+    Keys of the values that are not table columns are left to `insert_children`,
+    which runs in the same SAVEPOINT as the rows it belongs to.
+    Returns {"created", "ids", "errors"} where errors carry the row index.
+    """
+    errors: List[Dict[str, Any]] = []
+    valid = []
+    now = datetime.utcnow()
+    for index, row in enumerate(rows):
+        try:
+            item = schema.model_validate(row)
+        except ValidationError as e:
+            errors.append({"index": index, "error": _validation_message(e)})
+            continue
+        values = to_values(item)
+        values.update(id=models.generate_uuid(), created_at=now, updated_at=now)
+        valid.append((index, values))
     
-    # Total appointments
-    total_appointments = db.query(func.count(models.Appointment.id)).scalar() or 0
+    table = model.__table__
     
-    # Active prescriptions (all prescriptions)
-    active_prescriptions = db.query(func.count(models.Prescription.id)).scalar() or 0
+    def insert_rows(values_list):
+        db.execute(insert(table).values([
+            {key: value for key, value in values.items() if key in table.c} for values in values_list
+        ]))
+        if insert_children:
+            insert_children(db, values_list)
     
-    # Today's appointments
-    today = date.today()
-    today_appointments = db.query(func.count(models.Appointment.id)).filter(
-        models.Appointment.date == today
-    ).scalar() or 0
+    inserted: List[Dict[str, Any]] = []
+    chunk_size = max(1, settings.BULK_CHUNK_SIZE)
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        if check_chunk:
+            chunk = check_chunk(db, chunk, errors)
+        if not chunk:
+            continue
+        try:
+            with db.begin_nested():
+                insert_rows([values for _, values in chunk])
+            inserted.extend(values for _, values in chunk)
+        except IntegrityError:
+            for index, values in chunk:
+                try:
+                    with db.begin_nested():
+                        insert_rows([values])
+                    inserted.append(values)
+                except IntegrityError as e:
+                    message = SLOT_CONFLICT_MESSAGE if _is_slot_conflict(e) else str(e.orig)
+                    errors.append({"index": index, "error": message})
+    
+    _bump_bulk_counters(db, model, inserted)
+    if model is models.Appointment:
+        availability.track_inserted(db, inserted)
+    elif model is models.Doctor and inserted:
+        directory.touch(db)
+    db.commit()
+    
+    errors.sort(key=lambda err: err["index"])
+    return {"created": len(inserted), "ids": [values["id"] for values in inserted], "errors": errors}
+
+
+def _bump_bulk_counters(db: Session, model, inserted: List[Dict[str, Any]]) -> None:
+    # Core inserts bypass the ORM events in counters.py, so adjust them here
+    if not inserted:
+        return
+    connection = db.connection()
+    if model is models.Patient:
+        counters.bump(connection, counters.PATIENTS, len(inserted))
+    elif model is models.Doctor:
+        counters.bump(connection, counters.DOCTORS, len(inserted))
+    elif model is models.Prescription:
+        counters.bump(connection, counters.PRESCRIPTIONS, len(inserted))
+    elif model is models.Appointment:
+        counters.bump(connection, counters.APPOINTMENTS, len(inserted))
+        for day, count in TallyCounter(values["date"] for values in inserted).items():
+            counters.bump(connection, counters.appointments_on(day), count)
+
+
+def _check_patient_and_doctor(db: Session, chunk: list, errors: list) -> list:
+    """Drop rows whose patient_id or doctor_id does not exist"""
+    patients = _existing_ids(db, models.Patient.id, (values["patient_id"] for _, values in chunk))
+    doctors = _existing_ids(db, models.Doctor.id, (values["doctor_id"] for _, values in chunk))
+    kept = []
+    for index, values in chunk:
+        if values["patient_id"] not in patients:
+            errors.append({"index": index, "error": "Patient not found"})
+        elif values["doctor_id"] not in doctors:
+            errors.append({"index": index, "error": "Doctor not found"})
+        else:
+            kept.append((index, values))
+    return kept
+
+
+def _check_doctor_emails(db: Session, chunk: list, errors: list) -> list:
+    """Drop rows whose email is already registered or repeated earlier in the batch"""
+    taken = set(db.execute(
+        select(models.Doctor.email).where(models.Doctor.email.in_([values["email"] for _, values in chunk]))
+    ).scalars())
+    kept = []
+    for index, values in chunk:
+        if values["email"] in taken:
+            errors.append({"index": index, "error": "Email already registered"})
+        else:
+            taken.add(values["email"])
+            kept.append((index, values))
+    return kept
+
+
+def _insert_attachments(db: Session, values_list: list) -> None:
+    now = datetime.utcnow()
+    rows = [
+        {"id": models.generate_uuid(), "prescription_id": values["id"], "position": position, "path": path,
+         "content_type": models.guess_content_type(path), "created_at": now}
+        for values in values_list
+        for position, path in enumerate(values.get("attachments") or [])
+    ]
+    if rows:
+        db.execute(insert(models.PrescriptionAttachment.__table__).values(rows))
+
+
+def bulk_create_patients(db: Session, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return _bulk_create(db, models.Patient, schemas.PatientCreate, rows, lambda item: item.model_dump())
+
+
+def bulk_create_doctors(db: Session, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return _bulk_create(
+        db, models.Doctor, schemas.DoctorCreate, rows, lambda item: item.model_dump(),
+        check_chunk=_check_doctor_emails,
+    )
+
+
+def bulk_create_appointments(db: Session, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return _bulk_create(
+        db, models.Appointment, schemas.AppointmentCreate, rows, lambda item: item.model_dump(),
+        check_chunk=_check_patient_and_doctor,
+    )
+
+
+def bulk_create_prescriptions(db: Session, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return _bulk_create(
+        db, models.Prescription, schemas.PrescriptionCreate, rows, lambda item: item.model_dump(),
+        check_chunk=_check_patient_and_doctor, insert_children=_insert_attachments,
+    )
+
+
+# ========== VERSION PROBES ==========
+# Counter holding each table's row count (see counters.py)
+ROW_COUNTERS = {
+    models.Patient: counters.PATIENTS,
+    models.Doctor: counters.DOCTORS,
+    models.Appointment: counters.APPOINTMENTS,
+    models.Prescription: counters.PRESCRIPTIONS,
+}
+
+# Responses for these models embed patient and doctor names
+_NAMED_MODELS = (models.Appointment, models.Prescription)
+
+
+def get_entity_version(db: Session, model, entity_id: str) -> Optional[tuple]:
+    """
+    updated_at of one row, plus its patient's and doctor's when the response
+    embeds their names. One primary-key lookup; None if the row does not exist.
+    """
+    if model in _NAMED_MODELS:
+        statement = (
+            select(model.updated_at, models.Patient.updated_at, models.Doctor.updated_at)
+            .outerjoin(models.Patient, model.patient_id == models.Patient.id)
+            .outerjoin(models.Doctor, model.doctor_id == models.Doctor.id)
+        )
+    else:
+        statement = select(model.updated_at)
+    row = db.execute(statement.where(model.id == entity_id)).first()
+    return tuple(row) if row is not None else None
+
+
+def get_table_version(db: Session, model) -> tuple:
+    """
+    Row count (from counters) and latest updated_at of a table, plus the latest
+    patient and doctor updated_at when its rows embed their names. Deletes
+    change the count and inserts/updates the maximum; every part is an index
+    lookup, fetched in one SELECT.
+    """
+    tables = (model, models.Patient, models.Doctor) if model in _NAMED_MODELS else (model,)
+    count = select(models.Counter.value).where(models.Counter.name == ROW_COUNTERS[model]).scalar_subquery()
+    latest = [select(func.max(table.updated_at)).scalar_subquery() for table in tables]
+    return tuple(db.execute(select(count, *latest)).one())
+
+
+# ========== DASHBOARD STATS ==========
+def get_dashboard_stats(db: Session) -> schemas.DashboardStats:
+    # Single primary-key lookup on the incrementally maintained counters
+    # (see counters.py) instead of COUNT(*) over each table
+    today = counters.appointments_on(date.today())
+    values = counters.read(db, [counters.PATIENTS, counters.APPOINTMENTS, counters.PRESCRIPTIONS, today])
     
     return schemas.DashboardStats(
-        total_patients=total_patients,
-        total_appointments=total_appointments,
-        active_prescriptions=active_prescriptions,
-        today_appointments=today_appointments
+        total_patients=values[counters.PATIENTS],
+        total_appointments=values[counters.APPOINTMENTS],
+        active_prescriptions=values[counters.PRESCRIPTIONS],
+        today_appointments=values[today]
     )
 
 
+# ========== ASYNC VARIANTS ==========
+# Each variant runs the sync implementation above through AsyncSession.run_sync,
+# which drives the same ORM code over the async driver on the event loop
+# instead of occupying a threadpool thread. Use these from `async def` endpoints
+# together with database.get_async_db.
+async def get_patients_async(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.Patient]:
+    return await db.run_sync(get_patients, skip=skip, limit=limit, cursor=cursor)
+
+
+async def get_patient_async(db: AsyncSession, patient_id: str) -> Optional[models.Patient]:
+    return await db.run_sync(get_patient, patient_id)
+
+
+async def create_patient_async(db: AsyncSession, patient: schemas.PatientCreate) -> models.Patient:
+    return await db.run_sync(create_patient, patient)
+
+
+async def update_patient_async(db: AsyncSession, patient_id: str, patient: schemas.PatientUpdate) -> Optional[models.Patient]:
+    return await db.run_sync(update_patient, patient_id, patient)
+
+
+async def delete_patient_async(db: AsyncSession, patient_id: str) -> bool:
+    return await db.run_sync(delete_patient, patient_id)
+
+
+async def get_doctors_async(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.Doctor]:
+    return await db.run_sync(get_doctors, skip=skip, limit=limit, cursor=cursor)
+
+
+async def get_doctor_async(db: AsyncSession, doctor_id: str) -> Optional[models.Doctor]:
+    return await db.run_sync(get_doctor, doctor_id)
+
+
+async def create_doctor_async(db: AsyncSession, doctor: schemas.DoctorCreate) -> models.Doctor:
+    return await db.run_sync(create_doctor, doctor)
+
+
+async def update_doctor_async(db: AsyncSession, doctor_id: str, doctor: schemas.DoctorUpdate) -> Optional[models.Doctor]:
+    return await db.run_sync(update_doctor, doctor_id, doctor)
+
+
+async def delete_doctor_async(db: AsyncSession, doctor_id: str) -> bool:
+    return await db.run_sync(delete_doctor, doctor_id)
+
+
+async def get_appointments_async(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.Appointment]:
+    return await db.run_sync(get_appointments, skip=skip, limit=limit, cursor=cursor)
+
+
+async def get_appointment_async(db: AsyncSession, appointment_id: str) -> Optional[models.Appointment]:
+    return await db.run_sync(get_appointment, appointment_id)
+
+
+# Bookings retry outside run_sync so lock-retry backoff never blocks the event loop
+async def create_appointment_async(db: AsyncSession, appointment: schemas.AppointmentCreate) -> models.Appointment:
+    db_appointment = await _with_lock_retries_async(db, lambda sync_db: _book_appointment(sync_db, appointment))
+    return await db.run_sync(_reload_with_names, db_appointment)
+
+
+async def update_appointment_async(db: AsyncSession, appointment_id: str, appointment: schemas.AppointmentUpdate) -> Optional[models.Appointment]:
+    db_appointment = await _with_lock_retries_async(
+        db, lambda sync_db: _change_appointment(sync_db, appointment_id, appointment))
+    return await db.run_sync(_reload_with_names, db_appointment)
+
+
+async def delete_appointment_async(db: AsyncSession, appointment_id: str) -> bool:
+    return await db.run_sync(delete_appointment, appointment_id)
+
+
+async def get_prescriptions_async(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.Prescription]:
+    return await db.run_sync(get_prescriptions, skip=skip, limit=limit, cursor=cursor)
+
+
+async def get_prescription_async(db: AsyncSession, prescription_id: str) -> Optional[models.Prescription]:
+    return await db.run_sync(get_prescription, prescription_id)
+
+
+async def get_prescriptions_by_patient_async(db: AsyncSession, patient_id: str) -> List[models.Prescription]:
+    return await db.run_sync(get_prescriptions_by_patient, patient_id)
+
+
+async def get_prescriptions_by_attachment_async(db: AsyncSession, path: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.Prescription]:
+    return await db.run_sync(get_prescriptions_by_attachment, path, skip=skip, limit=limit, cursor=cursor)
+
+
+async def get_prescription_attachments_async(db: AsyncSession, prescription_id: str) -> List[models.PrescriptionAttachment]:
+    return await db.run_sync(get_prescription_attachments, prescription_id)
+
+
+async def create_prescription_async(db: AsyncSession, prescription: schemas.PrescriptionCreate) -> models.Prescription:
+    return await db.run_sync(create_prescription, prescription)
+
+
+async def update_prescription_async(db: AsyncSession, prescription_id: str, prescription: schemas.PrescriptionUpdate) -> Optional[models.Prescription]:
+    return await db.run_sync(update_prescription, prescription_id, prescription)
+
+
+async def delete_prescription_async(db: AsyncSession, prescription_id: str) -> bool:
+    return await db.run_sync(delete_prescription, prescription_id)
+
+
+async def get_dashboard_stats_async(db: AsyncSession) -> schemas.DashboardStats:
+    return await db.run_sync(get_dashboard_stats)
+
+
+
 
 
 
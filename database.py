@@ -1,8 +1,17 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, exc
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from typing import Callable, Dict, List, Optional
 from urllib.parse import quote_plus
+import glob
+import os
+import re
+import ssl
+import threading
+import time
 from config import settings
+import metrics
 
 # Parse DATABASE_URL and URL-encode password if needed
 def prepare_database_url(url: str) -> str:
@@ -29,13 +38,90 @@ def prepare_database_url(url: str) -> str:
 # Create database engine with URL-encoded password
 database_url = prepare_database_url(settings.DATABASE_URL)
 
+class PoolStats:
+    """Checkout counts and wait times since startup (one database, this worker)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait: float, timed_out: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_avg": round(self.wait_seconds_total / self.checkouts, 6) if self.checkouts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+_pool_stats: Dict[str, PoolStats] = {}
+_pool_stats_lock = threading.Lock()
+
+
+def pool_stats_for(name: str) -> PoolStats:
+    """Checkout statistics of the pools named `name` (kept across engine.dispose())"""
+    with _pool_stats_lock:
+        return _pool_stats.setdefault(name, PoolStats())
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited, and checkouts that
+    timed out, under the pool's logging name (pool_logging_name; "primary"
+    when unset). recreate() passes the name on, so dispose() keeps the stats.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.database_name = self._orig_logging_name or "primary"
+        self.checkout_stats = pool_stats_for(self.database_name)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            metrics.DB_POOL_TIMEOUTS.inc(self.database_name)
+            raise
+        finally:
+            wait = time.perf_counter() - started
+            metrics.DB_CHECKOUT_SECONDS.observe(wait, self.database_name)
+            self.checkout_stats.record(wait, timed_out)
+
+
+class TimedAsyncAdaptedQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """TimedQueuePool for asyncio engines"""
+
+
 # Configure SSL for managed MySQL providers (e.g., Railway) when enabled
 engine_kwargs = dict(
-    echo=settings.DEBUG,
+    echo=settings.SQL_ECHO,
     pool_pre_ping=True,
     pool_recycle=3600,
 )
 
+# In-memory SQLite gets a per-thread pool that takes no sizing options
+if ":memory:" not in database_url and database_url != "sqlite://":
+    engine_kwargs.update(
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+
 if database_url.startswith("mysql+pymysql://") and settings.DATABASE_SSL:
     # PyMySQL enables TLS when an 'ssl' dict is provided
     engine_kwargs["connect_args"] = {"ssl": {}}
@@ -45,6 +131,48 @@ engine = create_engine(
     **engine_kwargs,
 )
 
+pool_stats = pool_stats_for("primary")
+
+
+def threadpool_size() -> int:
+    """Threads for sync endpoints: one per connection the pool can hand out unless configured"""
+    return settings.THREADPOOL_SIZE or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+
+
+def pool_status() -> dict:
+    """Live pool occupancy plus checkout statistics, for /health/ready"""
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        status.update(
+            size=pool.size(),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(0, pool.overflow()),
+            timeout_seconds=pool.timeout(),
+        )
+    status.update(pool_stats.stats())
+    return status
+
+
+def pool_exhausted(status: dict) -> bool:
+    """Every connection the pool may open is checked out, so the next checkout would wait"""
+    return "checked_out" in status and status["checked_out"] >= status["size"] + status["max_overflow"]
+
+
+def _pool_connections():
+    status = pool_status()
+    for state in ("checked_out", "idle", "overflow", "size"):
+        if state in status:
+            yield (state,), status[state]
+
+
+metrics.registry.register(metrics.Gauge(
+    "db_pool_connections", "Connection pool state (checked out, idle, overflow, configured size)",
+    ("state",), callback=_pool_connections,
+))
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -52,6 +180,25 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def ping() -> None:
+    """Check out a connection and run a trivial query (raises if the database is unreachable)"""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+
+def warm_pool() -> int:
+    """Open the pool's connections ahead of the first requests; returns how many were opened"""
+    size = engine.pool.size() if isinstance(engine.pool, QueuePool) else 1
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(engine.connect())
+    finally:
+        for conn in connections:
+            conn.close()
+    return len(connections)
+
+
 # Dependency to get database session
 def get_db():
     db = SessionLocal()
@@ -61,6 +208,137 @@ def get_db():
         db.close()
 
 
+# ========== ASYNC DATABASE ==========
+# Sync driver -> async driver used for the AsyncSession path
+ASYNC_DRIVERS = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its async counterpart"""
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+async_database_url = prepare_database_url(settings.ASYNC_DATABASE_URL) if settings.ASYNC_DATABASE_URL \
+    else get_async_database_url(database_url)
+
+_async_engine = None
+_async_sessionmaker = None
+
+
+def get_async_engine():
+    """Create the async engine on first use so the async driver stays optional"""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        async_kwargs = dict(engine_kwargs)
+        async_kwargs.pop("connect_args", None)
+        if "poolclass" in async_kwargs:
+            async_kwargs.update(poolclass=TimedAsyncAdaptedQueuePool, pool_logging_name="primary-async")
+        if async_database_url.startswith("mysql+aiomysql://") and settings.DATABASE_SSL:
+            # aiomysql expects an SSLContext rather than PyMySQL's dict
+            async_kwargs["connect_args"] = {"ssl": ssl.create_default_context()}
+        _async_engine = create_async_engine(async_database_url, **async_kwargs)
+    return _async_engine
+
+
+def get_async_sessionmaker():
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_sessionmaker = async_sessionmaker(
+            bind=get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _async_sessionmaker
+
+
+# Async dependency to get database session (for `async def` endpoints)
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+# ========== SCHEMA VERSION ==========
+class SchemaOutdated(RuntimeError):
+    """The database's Alembic revision is not the newest migration's, or objects it should hold are missing"""
+
+    def __init__(self, stored: Optional[str], expected: str, missing: Optional[List[str]] = None):
+        self.stored = stored
+        self.expected = expected
+        self.missing = missing or []
+        if self.missing:
+            message = (
+                f"database is stamped at revision {stored} but is missing {', '.join(self.missing)}; "
+                f"stamp the revision before the migration that creates it, then run `alembic upgrade head`"
+            )
+        else:
+            message = (
+                f"database is at revision {stored or 'none (never stamped)'}, code expects {expected}; "
+                f"run `alembic upgrade head` (or `alembic stamp head` if create_all built it at this version)"
+            )
+        super().__init__(message)
+
+
+def schema_startup_mode() -> str:
+    """'create' (create_all on boot) or 'check' (compare revisions only); auto = check in production"""
+    mode = settings.SCHEMA_STARTUP.lower()
+    if mode == "auto":
+        return "check" if settings.ENVIRONMENT == "production" else "create"
+    return mode
+
+
+# `revision = "0005"` / `down_revision = "0004"` lines of a migration script (annotated or not)
+_REVISION_LINE = re.compile(r"^(revision|down_revision)\b[^=\n]*=(.*)$", re.MULTILINE)
+_QUOTED = re.compile(r"[\"']([^\"']+)[\"']")
+
+
+def expected_revision() -> str:
+    """Newest migration shipped with the code: the one revision no other migration revises"""
+    # Read straight from the scripts; importing Alembic costs ~100 ms of every boot
+    revisions, revised = set(), set()
+    for path in glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations", "versions", "*.py")):
+        with open(path, encoding="utf-8") as script:
+            for name, value in _REVISION_LINE.findall(script.read()):
+                (revisions if name == "revision" else revised).update(_QUOTED.findall(value))
+    heads = revisions - revised
+    if len(heads) != 1:
+        raise RuntimeError(f"Expected one migration head, found {sorted(heads) or 'none'}")
+    return heads.pop()
+
+
+def stored_revision(conn) -> Optional[str]:
+    """Revision recorded by `alembic upgrade` / `alembic stamp`; None if the database was never stamped"""
+    try:
+        return conn.exec_driver_sql("SELECT version_num FROM alembic_version").scalar()
+    except exc.DBAPIError:
+        return None
+
+
+def check_schema(required: Optional[Dict[str, Callable]] = None) -> str:
+    """A few queries instead of create_all: raise SchemaOutdated unless the database is at the newest
+    revision and every `required` object ({description: present(conn)}) is in place"""
+    expected = expected_revision()
+    with engine.connect() as conn:
+        stored = stored_revision(conn)
+        if stored != expected:
+            raise SchemaOutdated(stored, expected)
+        missing = [name for name, present in (required or {}).items() if not present(conn)]
+    if missing:
+        raise SchemaOutdated(stored, expected, missing)
+    return stored
+
+
 # Create all tables
 def init_db():
     try:
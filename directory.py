@@ -0,0 +1,166 @@
+"""
+In-process doctor directory
+
+Every doctor is loaded with one query into an immutable snapshot (rows in
+pagination order plus an id index) that serves /api/doctors pages and
+single-doctor reads without touching the database. Doctor writes are
+write-through invalidations: ORM events mark the session, and once it commits
+the local snapshot is dropped and the next read reloads it. The same writes
+bump the `doctor_directory` counter inside their transaction; each worker
+polls that counter (see main.py, DOCTOR_DIRECTORY_POLL_SECONDS) and drops its
+snapshot when the value moves, so writes made by other workers show up within
+one poll interval. An id missing from the snapshot is looked up in the
+database, so a doctor created by another worker is found straight away.
+"""
+import bisect
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from database import SessionLocal
+import counters
+import models
+import pagination
+
+
+VERSION_COUNTER = "doctor_directory"
+ORDER = (models.Doctor.created_at, models.Doctor.id)  # Same key as crud.DOCTOR_ORDER
+_DIRTY = "doctor_directory_dirty"
+_COLUMNS = models.Doctor.__table__.columns
+
+
+class Snapshot:
+    """All doctors at one point in time; never modified after it is built"""
+    __slots__ = ("rows", "keys", "by_id", "digest", "version")
+
+    def __init__(self, rows: List[models.Doctor], version: int):
+        self.rows = rows
+        self.keys = [(doctor.created_at, doctor.id) for doctor in rows]
+        self.by_id = {doctor.id: doctor for doctor in rows}
+        # Content fingerprint, identical in every worker that loaded the same rows
+        self.digest = hashlib.sha256(
+            repr([(doctor.id, doctor.updated_at) for doctor in rows]).encode()
+        ).hexdigest()
+        self.version = version
+
+    def page(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[models.Doctor]:
+        """Same rows pagination.paginate would select from the doctors table"""
+        if cursor:
+            start = bisect.bisect_right(self.keys, tuple(pagination.decode_cursor(cursor, ORDER)))
+        else:
+            start = max(skip, 0)
+        return self.rows[start:start + max(limit, 0)]
+
+
+_lock = threading.Lock()
+_snapshot: Optional[Snapshot] = None
+_generation = 0  # Bumped by every invalidation, so a load that raced one is not kept
+_loads = 0
+_invalidations = 0
+
+
+def _detached(values) -> models.Doctor:
+    return models.Doctor(**{column.key: values[column.key] for column in _COLUMNS})
+
+
+def _load(db: Session) -> Snapshot:
+    global _snapshot, _loads
+    with _lock:
+        generation = _generation
+    version = counters.read(db, [VERSION_COUNTER])[VERSION_COUNTER]
+    rows = db.execute(select(*_COLUMNS).order_by(*ORDER)).mappings()
+    snapshot = Snapshot([_detached(row) for row in rows], version)
+    with _lock:
+        _loads += 1
+        if generation == _generation:
+            _snapshot = snapshot
+    return snapshot
+
+
+def snapshot(db: Session) -> Snapshot:
+    """Current directory, loading it if it was invalidated"""
+    current = _snapshot
+    return current if current is not None else _load(db)
+
+
+def get_doctor(db: Session, doctor_id: str) -> Optional[models.Doctor]:
+    """Doctor by id from the directory; ids it does not know are checked in the database"""
+    doctor_id = models.canonical_id(doctor_id)
+    doctor = snapshot(db).by_id.get(doctor_id)
+    if doctor is not None:
+        return doctor
+    row = db.execute(select(*_COLUMNS).where(models.Doctor.id == doctor_id)).mappings().first()
+    if row is None:
+        return None
+    # Created after the snapshot was taken (by another worker)
+    invalidate()
+    return _detached(row)
+
+
+def invalidate() -> None:
+    global _snapshot, _generation, _invalidations
+    with _lock:
+        _generation += 1
+        if _snapshot is not None:
+            _invalidations += 1
+        _snapshot = None
+
+
+def check_version() -> bool:
+    """Drop the snapshot if another worker changed doctors since it was loaded; True if dropped"""
+    current = _snapshot
+    if current is None:
+        return False
+    db = SessionLocal()
+    try:
+        version = counters.read(db, [VERSION_COUNTER])[VERSION_COUNTER]
+    finally:
+        db.close()
+    if version == current.version:
+        return False
+    with _lock:
+        if _snapshot is not current:
+            return False
+    invalidate()
+    return True
+
+
+def touch(db: Session) -> None:
+    """Record a doctor write that bypassed the ORM unit of work (e.g. a bulk Core insert)"""
+    counters.bump(db.connection(), VERSION_COUNTER, 1)
+    db.info[_DIRTY] = True
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "doctors": len(_snapshot.rows) if _snapshot is not None else None,
+            "version": _snapshot.version if _snapshot is not None else None,
+            "loads": _loads,
+            "invalidations": _invalidations,
+        }
+
+
+# ========== ORM EVENT HOOKS ==========
+@event.listens_for(models.Doctor, "after_insert")
+@event.listens_for(models.Doctor, "after_update")
+@event.listens_for(models.Doctor, "after_delete")
+def _doctor_written(mapper, connection, target):
+    counters.bump(connection, VERSION_COUNTER, 1)
+    session = object_session(target)
+    if session is not None:
+        session.info[_DIRTY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    if session.info.pop(_DIRTY, False):
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_DIRTY, None)
@@ -0,0 +1,176 @@
+"""
+Streaming NDJSON/CSV export of large tables
+
+Rows are read with a server-side cursor (stream_results + yield_per) as plain
+column tuples, encoded batch by batch and handed to a StreamingResponse, so
+memory stays flat no matter how many rows are exported. The generator owns
+its database session because it keeps running after the endpoint returns.
+Prescription attachments are fetched per batch with one IN query on a second
+session, since the streaming cursor keeps the first connection busy.
+"""
+import csv
+import io
+import json
+import time
+from datetime import date, datetime, time as time_type, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from database import SessionLocal
+import crud
+import models
+
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+BATCH_ROWS = 1000
+
+
+def _columns(model, exclude=()):
+    # Generated columns (e.g. appointments.booking_active) are internal bookkeeping
+    return [
+        column for column in model.__table__.columns
+        if column.key not in exclude and column.computed is None
+    ]
+
+
+def _named(model, order):
+    """Select a model's columns plus patient/doctor names, ordered by its pagination key"""
+    return (
+        select(*_columns(model), models.Patient.name.label("patient_name"), models.Doctor.name.label("doctor_name"))
+        .outerjoin(models.Patient, model.patient_id == models.Patient.id)
+        .outerjoin(models.Doctor, model.doctor_id == models.Doctor.id)
+        .order_by(*order)
+    )
+
+
+def _created_between(statement, column, date_from: Optional[date], date_to: Optional[date]):
+    if date_from:
+        statement = statement.where(column >= datetime.combine(date_from, time_type.min))
+    if date_to:
+        statement = statement.where(column < datetime.combine(date_to + timedelta(days=1), time_type.min))
+    return statement
+
+
+def _dated_between(statement, column, date_from: Optional[date], date_to: Optional[date]):
+    if date_from:
+        statement = statement.where(column >= date_from)
+    if date_to:
+        statement = statement.where(column <= date_to)
+    return statement
+
+
+def build_statement(entity: str, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                    status: Optional[str] = None):
+    """SELECT for an export; dates filter created_at for patients/doctors and the visit date otherwise"""
+    if entity == "patients":
+        statement = select(*_columns(models.Patient)).order_by(*crud.PATIENT_ORDER)
+        return _created_between(statement, models.Patient.created_at, date_from, date_to)
+    if entity == "doctors":
+        statement = select(*_columns(models.Doctor)).order_by(*crud.DOCTOR_ORDER)
+        return _created_between(statement, models.Doctor.created_at, date_from, date_to)
+    if entity == "appointments":
+        statement = _dated_between(_named(models.Appointment, crud.APPOINTMENT_ORDER),
+                                   models.Appointment.date, date_from, date_to)
+        if status:
+            statement = statement.where(models.Appointment.status == status)
+        return statement
+    if entity == "prescriptions":
+        return _dated_between(_named(models.Prescription, crud.PRESCRIPTION_ORDER),
+                              models.Prescription.date, date_from, date_to)
+    raise ValueError(f"Unknown export entity: {entity}")
+
+
+def _with_attachments(db, keys: List[str], rows) -> list:
+    """Append each prescription's attachment paths to its row"""
+    id_index = keys.index("id")
+    attachment = models.PrescriptionAttachment
+    paths: Dict[str, List[str]] = {}
+    for prescription_id, path in db.execute(
+        select(attachment.prescription_id, attachment.path)
+        .where(attachment.prescription_id.in_([row[id_index] for row in rows]))
+        .order_by(attachment.prescription_id, attachment.position)
+    ):
+        paths.setdefault(prescription_id, []).append(path)
+    return [(*row, paths.get(row[id_index], [])) for row in rows]
+
+
+# Extra per-batch lookups: entity -> (added column, enrich function)
+EXTRA_COLUMNS = {
+    "prescriptions": ("attachments", _with_attachments),
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time_type)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _encode_ndjson(keys, rows) -> str:
+    return "".join(json.dumps(dict(zip(keys, row)), default=_json_default) + "\n" for row in rows)
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time_type)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return json.dumps(value)
+    return value
+
+
+def _encode_csv(keys, rows, header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(keys)
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+def stream_rows(entity: str, fmt: str, statement, session_factory=SessionLocal) -> Iterator[str]:
+    """Yield encoded batches of rows; logs row count and time to first byte when done"""
+    started = time.perf_counter()
+    first_byte: Optional[float] = None
+    total = 0
+    db = session_factory()
+    extra = EXTRA_COLUMNS.get(entity)
+    # Same database as the cursor (a replica's lag differs from the next one's)
+    lookup_db = SessionLocal(bind=db.get_bind(), info=dict(db.info)) if extra else None
+    try:
+        result = db.execute(statement.execution_options(stream_results=True, yield_per=BATCH_ROWS))
+        keys = list(result.keys())
+        if extra:
+            keys.append(extra[0])
+        if fmt == "csv":
+            # Header goes out before the first batch so clients see bytes immediately
+            first_byte = time.perf_counter()
+            yield _encode_csv(keys, [], header=True)
+        for rows in result.partitions():
+            total += len(rows)
+            if extra:
+                rows = extra[1](lookup_db, keys, rows)
+            chunk = _encode_ndjson(keys, rows) if fmt == "ndjson" else _encode_csv(keys, rows, header=False)
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            yield chunk
+    finally:
+        db.close()
+        if lookup_db is not None:
+            lookup_db.close()
+        elapsed = time.perf_counter() - started
+        ttfb = (first_byte - started) if first_byte is not None else elapsed
+        print(f"📤 Export {entity} ({fmt}): {total} rows, first byte {ttfb * 1000:.1f} ms, total {elapsed * 1000:.1f} ms")
+
+
+def export_response(entity: str, fmt: str, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                    status: Optional[str] = None, session_factory=SessionLocal) -> StreamingResponse:
+    statement = build_statement(entity, date_from=date_from, date_to=date_to, status=status)
+    extension = "ndjson" if fmt == "ndjson" else "csv"
+    headers: Dict[str, str] = {"Content-Disposition": f'attachment; filename="{entity}.{extension}"'}
+    return StreamingResponse(stream_rows(entity, fmt, statement, session_factory), media_type=FORMATS[fmt], headers=headers)
@@ -0,0 +1,106 @@
+"""
+Bounded worker pool for bcrypt hashing and verification
+
+bcrypt is deliberately slow and CPU bound. Running it inline lets a burst of
+logins occupy every request thread, so hashes run on a small dedicated pool
+instead. Admission is capped at `workers + max_queue` jobs; callers beyond
+that get PoolSaturated immediately rather than queueing behind the burst.
+`async def` endpoints await `run_async()`, which holds no request thread
+while the job queues or runs; `run()` blocks the calling thread.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import settings
+import metrics
+
+
+class PoolSaturated(Exception):
+    """Raised when the hashing pool queue is full"""
+
+
+class PasswordHashPool:
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Queue `fn(*args)` on the pool; its slot is freed when the job finishes"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated("Password hashing pool is saturated")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(self._timed, time.perf_counter(), fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` on the pool and wait for the result (blocks this thread)"""
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` on the pool and await the result"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def _timed(self, submitted: float, fn: Callable[..., Any], *args: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            self._record(started - submitted, finished - started)
+
+    def _record(self, wait: float, duration: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            self.hash_seconds_total += duration
+            self.hash_seconds_max = max(self.hash_seconds_max, duration)
+        metrics.BCRYPT_WAIT_SECONDS.observe(wait)
+        metrics.BCRYPT_SECONDS.observe(duration)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool counters and timings"""
+        with self._lock:
+            completed = self.completed
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "completed": completed,
+                "rejected": self.rejected,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / completed, 6) if completed else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "hash_seconds_total": round(self.hash_seconds_total, 6),
+                "hash_seconds_avg": round(self.hash_seconds_total / completed, 6) if completed else 0.0,
+                "hash_seconds_max": round(self.hash_seconds_max, 6),
+            }
+
+
+pool = PasswordHashPool(workers=settings.BCRYPT_POOL_SIZE, max_queue=settings.BCRYPT_MAX_QUEUE)
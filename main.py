@@ -1,16 +1,40 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+import startup  # first, so it can time the imports below
+from fastapi import FastAPI, Body, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.exception_handlers import http_exception_handler
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import exc as sqlalchemy_exc
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Any, Dict, List, Optional
+from datetime import date, timedelta
+import anyio
+import asyncio
+import time
 import uvicorn
 
 from database import get_db, init_db
+from replicas import get_read_db
+import database
 from config import settings
 import models
 import schemas
 import crud
 import auth
+import availability
+import counters
+import directory
+import etags
+import exports
+import hashing
+import metrics
+import pagination
+import querystats
+import replicas
+import responses
 import routes_auth
+import search
 
 
 # Create FastAPI application
@@ -30,17 +54,78 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Per-route latency, status, size and in-flight metrics, served at /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Per-request statement count, DB time and N+1 warnings
+app.add_middleware(querystats.QueryStatsMiddleware)
+
+# Tracks the client behind each request so its writes pin its reads to the primary
+app.add_middleware(replicas.ReadYourWritesMiddleware)
+
 
 # Include routers
 app.include_router(routes_auth.router)
 
 
-# Initialize database on startup
+# ========== CONNECTION POOL ==========
+def pool_exhausted() -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Database is busy, please retry shortly"},
+        headers={"Retry-After": str(settings.DB_RETRY_AFTER_SECONDS)},
+    )
+
+
+@app.exception_handler(sqlalchemy_exc.TimeoutError)
+async def pool_timeout_handler(request: Request, exc: sqlalchemy_exc.TimeoutError):
+    return pool_exhausted()
+
+
+@app.exception_handler(StarletteHTTPException)
+async def http_error_handler(request: Request, exc: StarletteHTTPException):
+    # Endpoints wrap unexpected errors in a 500; a pool checkout timeout underneath is a 503
+    cause = exc.__context__
+    while cause is not None:
+        if isinstance(cause, sqlalchemy_exc.TimeoutError):
+            return pool_exhausted()
+        cause = cause.__context__
+    return await http_exception_handler(request, exc)
+
+
+@app.on_event("startup")
+async def size_threadpool():
+    # Sync endpoints beyond the pool's capacity would only queue on checkout, out of sight
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = database.threadpool_size()
+    capacity = settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    if limiter.total_tokens > capacity:
+        print(f"⚠️  THREADPOOL_SIZE ({limiter.total_tokens}) exceeds the connection pool ({capacity}); "
+              f"requests will wait on checkout")
+
+
+# Initialize database on startup: create_all outside production, a revision check in it
 @app.on_event("startup")
 def on_startup():
+    startup.report.record("imports", time.perf_counter() - startup.IMPORTED_AT)
+    mode = database.schema_startup_mode()
+    startup.report.schema = {"mode": mode, "status": "unknown"}
     try:
-        init_db()
-        print(f"✅ Database initialized")
+        if mode == "check":
+            with startup.report.phase("schema check"):
+                revision = database.check_schema({"the patient search index": search.index_exists})
+            startup.report.schema.update(status="current", revision=revision)
+            print(f"✅ Database schema at revision {revision}")
+        else:
+            with startup.report.phase("create_all"):
+                init_db()
+            with startup.report.phase("search index"):
+                search.ensure_index()
+            startup.report.schema.update(status="created")
+            print(f"✅ Database initialized")
+    except database.SchemaOutdated as e:
+        startup.report.schema.update(status="outdated", revision=e.stored, expected=e.expected, missing=e.missing)
+        print(f"❌ Database schema is outdated: {e}")
     except Exception as e:
         error_msg = str(e)
         print(f"⚠️  Database initialization failed: {type(e).__name__}")
@@ -59,6 +144,94 @@ def on_startup():
     print(f"✅ API available at: http://{settings.API_HOST}:{settings.API_PORT}")
     print(f"✅ Authentication enabled with JWT")
     print(f"✅ CORS Origins: {', '.join(settings.get_cors_origins()[:3])}...")
+    print(startup.report.mark_ready())
+
+
+# Open pool connections and load bcrypt/JWT after boot, so /health never waits on them
+async def _warm_up():
+    summary = await run_in_threadpool(startup.report.warm_up, {
+        "pool": database.warm_pool,
+        "bcrypt": auth.warm_up_hashing,
+        "jwt": auth.warm_up_tokens,
+    })
+    print(summary)
+    for step, error in startup.report.warmup_errors.items():
+        print(f"⚠️  Warm-up step {step} failed: {error}")
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    if settings.STARTUP_WARMUP:
+        app.state.warm_up = asyncio.create_task(_warm_up())
+
+
+# Pick up doctor changes made by other workers (see directory.py)
+async def _poll_doctor_directory():
+    while True:
+        try:
+            await run_in_threadpool(directory.check_version)
+        except Exception as e:
+            print(f"⚠️  Doctor directory poll failed: {type(e).__name__}: {e}")
+        await asyncio.sleep(settings.DOCTOR_DIRECTORY_POLL_SECONDS)
+
+
+@app.on_event("startup")
+async def start_directory_poller():
+    if settings.DOCTOR_DIRECTORY_POLL_SECONDS > 0:
+        app.state.directory_poller = asyncio.create_task(_poll_doctor_directory())
+
+
+@app.on_event("shutdown")
+async def stop_directory_poller():
+    task = getattr(app.state, "directory_poller", None)
+    if task is not None:
+        task.cancel()
+
+
+# Drop cached users changed by other workers (e.g. deactivated; see auth.py)
+async def _poll_user_cache():
+    while True:
+        try:
+            await run_in_threadpool(auth.check_user_cache_version)
+        except Exception as e:
+            print(f"⚠️  User cache poll failed: {type(e).__name__}: {e}")
+        await asyncio.sleep(settings.USER_CACHE_POLL_SECONDS)
+
+
+@app.on_event("startup")
+async def start_user_cache_poller():
+    if settings.USER_CACHE_SIZE > 0 and settings.USER_CACHE_POLL_SECONDS > 0:
+        app.state.user_cache_poller = asyncio.create_task(_poll_user_cache())
+
+
+@app.on_event("shutdown")
+async def stop_user_cache_poller():
+    task = getattr(app.state, "user_cache_poller", None)
+    if task is not None:
+        task.cancel()
+
+
+# Take failing read replicas out of rotation and return recovered ones (see replicas.py)
+async def _check_replicas_periodically():
+    while True:
+        try:
+            await run_in_threadpool(replicas.replicas.check)
+        except Exception as e:
+            print(f"⚠️  Replica health check failed: {type(e).__name__}: {e}")
+        await asyncio.sleep(settings.REPLICA_HEALTH_CHECK_SECONDS)
+
+
+@app.on_event("startup")
+async def start_replica_checker():
+    if replicas.replicas and settings.REPLICA_HEALTH_CHECK_SECONDS > 0:
+        app.state.replica_checker = asyncio.create_task(_check_replicas_periodically())
+
+
+@app.on_event("shutdown")
+async def stop_replica_checker():
+    task = getattr(app.state, "replica_checker", None)
+    if task is not None:
+        task.cancel()
 
 
 # Root endpoint
@@ -79,40 +252,166 @@ def health_check():
     return {
         "status": "healthy",
         "version": settings.VERSION,
-        "environment": settings.ENVIRONMENT
+        "environment": settings.ENVIRONMENT,
+        "password_hashing": hashing.pool.stats(),
+        "user_cache": auth.user_cache.stats(),
+        "availability": availability.stats(),
+        "doctor_directory": directory.stats(),
+        "startup": startup.report.as_dict()
+    }
+
+
+# Readiness probe: 503 with Retry-After while no connection can be had or the schema is outdated.
+# It answers from pool occupancy first and pings on its own thread with a short timeout, so it
+# never queues behind a starved threadpool or waits out DB_POOL_TIMEOUT.
+_probe_limiter = anyio.CapacityLimiter(1)
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    threadpool = {
+        "size": int(limiter.total_tokens),
+        "busy": limiter.borrowed_tokens,
+        "waiting": limiter.statistics().tasks_waiting,
     }
+    pool = database.pool_status()
+    error = None
+    if startup.report.schema["status"] == "outdated":
+        error = "SchemaOutdated"
+    elif database.pool_exhausted(pool) or threadpool["waiting"]:
+        error = "PoolExhausted"
+    else:
+        with anyio.move_on_after(settings.READINESS_PING_TIMEOUT) as probe:
+            try:
+                await anyio.to_thread.run_sync(database.ping, abandon_on_cancel=True, limiter=_probe_limiter)
+            except Exception as e:
+                error = type(e).__name__
+        if probe.cancelled_caught:
+            error = "PingTimeout"
+    if error is not None:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "error": error, "schema": startup.report.schema,
+                     "database": pool, "replicas": replicas.stats(), "threadpool": threadpool},
+            headers={"Retry-After": str(settings.DB_RETRY_AFTER_SECONDS)},
+        )
+    return {"status": "ready", "database": pool, "replicas": replicas.stats(),
+            "threadpool": threadpool}
+
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def check_bulk_size(rows: List[Dict[str, Any]]):
+    if len(rows) > settings.BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Bulk requests are limited to {settings.BULK_MAX_ROWS} rows"
+        )
+
+
+def bulk_response(result: Dict[str, Any], entity: str, total: int) -> schemas.ApiResponse:
+    return schemas.ApiResponse(
+        data=result,
+        message=f"Created {result['created']} of {total} {entity}",
+        success=not result["errors"]
+    )
+
+
+def booking_conflict(db: Session, error: crud.BookingConflict, doctor_id: Optional[str] = None,
+                     day: Optional[date] = None) -> HTTPException:
+    """409 for a taken slot, listing a few open slots that day so clients pick another instead of retrying"""
+    detail = str(error)
+    if doctor_id and day:
+        result = availability.get_availability(db, doctor_id, day, day)
+        free = result["days"][0]["free"][:5] if result else []
+        if free:
+            detail += f"; open slots that day: {', '.join(free)}"
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
 
 
 # ========== PATIENT ENDPOINTS ==========
-@app.get("/api/patients", response_model=schemas.ApiResponse)
+@app.get("/api/patients", response_model=schemas.PatientListResponse)
 def get_patients(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
     """Get all patients (Protected route)"""
     try:
-        patients = crud.get_patients(db, skip=skip, limit=limit)
-        return schemas.ApiResponse(data=patients, success=True)
+        etag = etags.make("patients", request.url.query, crud.get_table_version(db, models.Patient))
+        if etags.matches(if_none_match, etag):
+            return etags.not_modified(etag)
+        patients = crud.get_patients(db, skip=skip, limit=limit, cursor=cursor)
+        return responses.render(
+            schemas.PatientListResponse,
+            patients,
+            next_cursor=pagination.next_cursor(patients, crud.PATIENT_ORDER, limit),
+            headers=etags.headers(etag)
+        )
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/patients/export")
+def export_patients(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """Stream all patients (optionally by creation date) as NDJSON or CSV (Protected route)"""
+    return exports.export_response("patients", format, date_from=date_from, date_to=date_to,
+                                   session_factory=replicas.read_session)
+
+
+@app.get("/api/patients/search", response_model=schemas.PatientListResponse)
+def search_patients(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """Full-text search over patient name, contact and medical history, best match first (Protected route)"""
+    try:
+        patients = search.search_patients(db, q, skip=skip, limit=limit)
+        return responses.render(schemas.PatientListResponse, patients)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/patients/{patient_id}", response_model=schemas.ApiResponse)
+@app.get("/api/patients/{patient_id}", response_model=schemas.PatientResponse)
 def get_patient(
     patient_id: str,
-    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
     """Get a specific patient by ID (Protected route)"""
+    version = crud.get_entity_version(db, models.Patient, patient_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    etag = etags.make("patient", patient_id, version)
+    if etags.matches(if_none_match, etag):
+        return etags.not_modified(etag)
     patient = crud.get_patient(db, patient_id=patient_id)
     if patient is None:
         raise HTTPException(status_code=404, detail="Patient not found")
-    return schemas.ApiResponse(data=patient, success=True)
+    return responses.render(schemas.PatientResponse, patient, headers=etags.headers(etag))
 
 
-@app.post("/api/patients", response_model=schemas.ApiResponse, status_code=status.HTTP_201_CREATED)
+@app.post("/api/patients", response_model=schemas.PatientResponse, status_code=status.HTTP_201_CREATED)
 def create_patient(
     patient: schemas.PatientCreate,
     db: Session = Depends(get_db),
@@ -121,16 +420,32 @@ def create_patient(
     """Create a new patient (Protected route)"""
     try:
         db_patient = crud.create_patient(db=db, patient=patient)
-        return schemas.ApiResponse(
-            data=db_patient,
+        return responses.render(
+            schemas.PatientResponse,
+            db_patient,
             message="Patient created successfully",
-            success=True
+            status_code=status.HTTP_201_CREATED
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.put("/api/patients/{patient_id}", response_model=schemas.ApiResponse)
+@app.post("/api/patients/bulk", response_model=schemas.ApiResponse)
+def bulk_create_patients(
+    rows: List[Dict[str, Any]] = Body(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    """Create many patients in one request; invalid rows are reported per index (Protected route)"""
+    check_bulk_size(rows)
+    try:
+        result = crud.bulk_create_patients(db, rows)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return bulk_response(result, "patients", len(rows))
+
+
+@app.put("/api/patients/{patient_id}", response_model=schemas.PatientResponse)
 def update_patient(
     patient_id: str,
     patient: schemas.PatientUpdate,
@@ -141,10 +456,10 @@ def update_patient(
     db_patient = crud.update_patient(db=db, patient_id=patient_id, patient=patient)
     if db_patient is None:
         raise HTTPException(status_code=404, detail="Patient not found")
-    return schemas.ApiResponse(
-        data=db_patient,
-        message="Patient updated successfully",
-        success=True
+    return responses.render(
+        schemas.PatientResponse,
+        db_patient,
+        message="Patient updated successfully"
     )
 
 
@@ -166,49 +481,117 @@ def delete_patient(
 
 
 # ========== DOCTOR ENDPOINTS ==========
-@app.get("/api/doctors", response_model=schemas.ApiResponse)
-def get_doctors(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@app.get("/api/doctors", response_model=schemas.DoctorListResponse)
+def get_doctors(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """Get all doctors"""
     try:
-        doctors = crud.get_doctors(db, skip=skip, limit=limit)
-        return schemas.ApiResponse(data=doctors, success=True)
+        # Served from the in-memory directory; the body and its ETag come from the same snapshot
+        doctors_snapshot = directory.snapshot(db)
+        etag = etags.make("doctors", request.url.query, doctors_snapshot.digest)
+        if etags.matches(if_none_match, etag):
+            return etags.not_modified(etag)
+        doctors = doctors_snapshot.page(skip=skip, limit=limit, cursor=cursor)
+        return responses.render(
+            schemas.DoctorListResponse,
+            doctors,
+            next_cursor=pagination.next_cursor(doctors, crud.DOCTOR_ORDER, limit),
+            headers=etags.headers(etag)
+        )
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/doctors/{doctor_id}", response_model=schemas.ApiResponse)
-def get_doctor(doctor_id: str, db: Session = Depends(get_db)):
+@app.get("/api/doctors/export")
+def export_doctors(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    """Stream all doctors (optionally by creation date) as NDJSON or CSV"""
+    return exports.export_response("doctors", format, date_from=date_from, date_to=date_to,
+                                   session_factory=replicas.read_session)
+
+
+@app.get("/api/doctors/{doctor_id}", response_model=schemas.DoctorResponse)
+def get_doctor(doctor_id: str, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
     """Get a specific doctor by ID"""
-    doctor = crud.get_doctor(db, doctor_id=doctor_id)
+    doctor = directory.get_doctor(db, doctor_id)
     if doctor is None:
         raise HTTPException(status_code=404, detail="Doctor not found")
-    return schemas.ApiResponse(data=doctor, success=True)
+    etag = etags.make("doctor", doctor_id, (doctor.updated_at,))
+    if etags.matches(if_none_match, etag):
+        return etags.not_modified(etag)
+    return responses.render(schemas.DoctorResponse, doctor, headers=etags.headers(etag))
+
+
+@app.get("/api/doctors/{doctor_id}/availability", response_model=schemas.ApiResponse)
+def get_doctor_availability(
+    doctor_id: str,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db)
+):
+    """Free appointment slots per day for a doctor (defaults to the next 7 days)"""
+    date_from = date_from or date.today()
+    date_to = date_to or date_from + timedelta(days=6)
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (date_to - date_from).days >= settings.AVAILABILITY_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Availability windows are limited to {settings.AVAILABILITY_MAX_DAYS} days"
+        )
+    result = availability.get_availability(db, doctor_id, date_from, date_to)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    return schemas.ApiResponse(data=result, success=True)
 
 
-@app.post("/api/doctors", response_model=schemas.ApiResponse, status_code=status.HTTP_201_CREATED)
+@app.post("/api/doctors", response_model=schemas.DoctorResponse, status_code=status.HTTP_201_CREATED)
 def create_doctor(doctor: schemas.DoctorCreate, db: Session = Depends(get_db)):
     """Create a new doctor"""
     try:
         db_doctor = crud.create_doctor(db=db, doctor=doctor)
-        return schemas.ApiResponse(
-            data=db_doctor,
+        return responses.render(
+            schemas.DoctorResponse,
+            db_doctor,
             message="Doctor created successfully",
-            success=True
+            status_code=status.HTTP_201_CREATED
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.put("/api/doctors/{doctor_id}", response_model=schemas.ApiResponse)
+@app.post("/api/doctors/bulk", response_model=schemas.ApiResponse)
+def bulk_create_doctors(rows: List[Dict[str, Any]] = Body(...), db: Session = Depends(get_db)):
+    """Create many doctors in one request; invalid rows are reported per index"""
+    check_bulk_size(rows)
+    try:
+        result = crud.bulk_create_doctors(db, rows)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return bulk_response(result, "doctors", len(rows))
+
+
+@app.put("/api/doctors/{doctor_id}", response_model=schemas.DoctorResponse)
 def update_doctor(doctor_id: str, doctor: schemas.DoctorUpdate, db: Session = Depends(get_db)):
     """Update a doctor"""
     db_doctor = crud.update_doctor(db=db, doctor_id=doctor_id, doctor=doctor)
     if db_doctor is None:
         raise HTTPException(status_code=404, detail="Doctor not found")
-    return schemas.ApiResponse(
-        data=db_doctor,
-        message="Doctor updated successfully",
-        success=True
+    return responses.render(
+        schemas.DoctorResponse,
+        db_doctor,
+        message="Doctor updated successfully"
     )
 
 
@@ -226,26 +609,63 @@ def delete_doctor(doctor_id: str, db: Session = Depends(get_db)):
 
 
 # ========== APPOINTMENT ENDPOINTS ==========
-@app.get("/api/appointments", response_model=schemas.ApiResponse)
-def get_appointments(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@app.get("/api/appointments", response_model=schemas.AppointmentListResponse)
+def get_appointments(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
+):
     """Get all appointments"""
     try:
-        appointments = crud.get_appointments(db, skip=skip, limit=limit)
-        return schemas.ApiResponse(data=appointments, success=True)
+        etag = etags.make("appointments", request.url.query, crud.get_table_version(db, models.Appointment))
+        if etags.matches(if_none_match, etag):
+            return etags.not_modified(etag)
+        appointments = crud.get_appointments(db, skip=skip, limit=limit, cursor=cursor)
+        return responses.render(
+            schemas.AppointmentListResponse,
+            appointments,
+            next_cursor=pagination.next_cursor(appointments, crud.APPOINTMENT_ORDER, limit),
+            headers=etags.headers(etag)
+        )
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/appointments/{appointment_id}", response_model=schemas.ApiResponse)
-def get_appointment(appointment_id: str, db: Session = Depends(get_db)):
+@app.get("/api/appointments/export")
+def export_appointments(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    status: Optional[schemas.AppointmentStatusEnum] = None
+):
+    """Stream appointments filtered by date range and status as NDJSON or CSV"""
+    return exports.export_response(
+        "appointments", format, date_from=date_from, date_to=date_to,
+        status=status.value if status else None, session_factory=replicas.read_session
+    )
+
+
+@app.get("/api/appointments/{appointment_id}", response_model=schemas.AppointmentResponse)
+def get_appointment(appointment_id: str, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_read_db)):
     """Get a specific appointment by ID"""
+    version = crud.get_entity_version(db, models.Appointment, appointment_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    etag = etags.make("appointment", appointment_id, version)
+    if etags.matches(if_none_match, etag):
+        return etags.not_modified(etag)
     appointment = crud.get_appointment(db, appointment_id=appointment_id)
     if appointment is None:
         raise HTTPException(status_code=404, detail="Appointment not found")
-    return schemas.ApiResponse(data=appointment, success=True)
+    return responses.render(schemas.AppointmentResponse, appointment, headers=etags.headers(etag))
 
 
-@app.post("/api/appointments", response_model=schemas.ApiResponse, status_code=status.HTTP_201_CREATED)
+@app.post("/api/appointments", response_model=schemas.AppointmentResponse, status_code=status.HTTP_201_CREATED)
 def create_appointment(appointment: schemas.AppointmentCreate, db: Session = Depends(get_db)):
     """Create a new appointment"""
     try:
@@ -255,23 +675,37 @@ def create_appointment(appointment: schemas.AppointmentCreate, db: Session = Dep
             raise HTTPException(status_code=404, detail="Patient not found")
         
         # Verify doctor exists
-        doctor = crud.get_doctor(db, appointment.doctor_id)
+        doctor = directory.get_doctor(db, appointment.doctor_id)
         if not doctor:
             raise HTTPException(status_code=404, detail="Doctor not found")
         
         db_appointment = crud.create_appointment(db=db, appointment=appointment)
-        return schemas.ApiResponse(
-            data=db_appointment,
+        return responses.render(
+            schemas.AppointmentResponse,
+            db_appointment,
             message="Appointment created successfully",
-            success=True
+            status_code=status.HTTP_201_CREATED
         )
+    except crud.BookingConflict as e:
+        raise booking_conflict(db, e, appointment.doctor_id, appointment.date)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.put("/api/appointments/{appointment_id}", response_model=schemas.ApiResponse)
+@app.post("/api/appointments/bulk", response_model=schemas.ApiResponse)
+def bulk_create_appointments(rows: List[Dict[str, Any]] = Body(...), db: Session = Depends(get_db)):
+    """Create many appointments in one request; invalid rows are reported per index"""
+    check_bulk_size(rows)
+    try:
+        result = crud.bulk_create_appointments(db, rows)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return bulk_response(result, "appointments", len(rows))
+
+
+@app.put("/api/appointments/{appointment_id}", response_model=schemas.AppointmentResponse)
 def update_appointment(appointment_id: str, appointment: schemas.AppointmentUpdate, db: Session = Depends(get_db)):
     """Update an appointment"""
     try:
@@ -283,18 +717,20 @@ def update_appointment(appointment_id: str, appointment: schemas.AppointmentUpda
         
         # Verify doctor exists if provided
         if appointment.doctor_id:
-            doctor = crud.get_doctor(db, appointment.doctor_id)
+            doctor = directory.get_doctor(db, appointment.doctor_id)
             if not doctor:
                 raise HTTPException(status_code=404, detail="Doctor not found")
         
         db_appointment = crud.update_appointment(db=db, appointment_id=appointment_id, appointment=appointment)
         if db_appointment is None:
             raise HTTPException(status_code=404, detail="Appointment not found")
-        return schemas.ApiResponse(
-            data=db_appointment,
-            message="Appointment updated successfully",
-            success=True
+        return responses.render(
+            schemas.AppointmentResponse,
+            db_appointment,
+            message="Appointment updated successfully"
         )
+    except crud.BookingConflict as e:
+        raise booking_conflict(db, e)
     except HTTPException:
         raise
     except Exception as e:
@@ -315,36 +751,101 @@ def delete_appointment(appointment_id: str, db: Session = Depends(get_db)):
 
 
 # ========== PRESCRIPTION ENDPOINTS ==========
-@app.get("/api/prescriptions", response_model=schemas.ApiResponse)
-def get_prescriptions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@app.get("/api/prescriptions", response_model=schemas.PrescriptionListResponse)
+def get_prescriptions(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
+):
     """Get all prescriptions"""
     try:
-        prescriptions = crud.get_prescriptions(db, skip=skip, limit=limit)
-        return schemas.ApiResponse(data=prescriptions, success=True)
+        etag = etags.make("prescriptions", request.url.query, crud.get_table_version(db, models.Prescription))
+        if etags.matches(if_none_match, etag):
+            return etags.not_modified(etag)
+        prescriptions = crud.get_prescriptions(db, skip=skip, limit=limit, cursor=cursor)
+        return responses.render(
+            schemas.PrescriptionListResponse,
+            prescriptions,
+            next_cursor=pagination.next_cursor(prescriptions, crud.PRESCRIPTION_ORDER, limit),
+            headers=etags.headers(etag)
+        )
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/prescriptions/export")
+def export_prescriptions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    """Stream prescriptions filtered by date range as NDJSON or CSV"""
+    return exports.export_response("prescriptions", format, date_from=date_from, date_to=date_to,
+                                   session_factory=replicas.read_session)
+
+
+@app.get("/api/prescriptions/by-attachment", response_model=schemas.PrescriptionListResponse)
+def get_prescriptions_by_attachment(
+    path: str = Query(..., min_length=1, max_length=512),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Get all prescriptions that have a given attachment"""
+    try:
+        prescriptions = crud.get_prescriptions_by_attachment(db, path, skip=skip, limit=limit, cursor=cursor)
+        return responses.render(
+            schemas.PrescriptionListResponse,
+            prescriptions,
+            next_cursor=pagination.next_cursor(prescriptions, crud.PRESCRIPTION_ORDER, limit)
+        )
+    except pagination.InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/prescriptions/{prescription_id}", response_model=schemas.ApiResponse)
-def get_prescription(prescription_id: str, db: Session = Depends(get_db)):
+@app.get("/api/prescriptions/{prescription_id}/attachments", response_model=schemas.PrescriptionAttachmentListResponse)
+def get_prescription_attachments(prescription_id: str, db: Session = Depends(get_read_db)):
+    """Get a prescription's attachments with their metadata"""
+    attachments = crud.get_prescription_attachments(db, prescription_id)
+    if not attachments and crud.get_prescription(db, prescription_id) is None:
+        raise HTTPException(status_code=404, detail="Prescription not found")
+    return responses.render(schemas.PrescriptionAttachmentListResponse, attachments)
+
+
+@app.get("/api/prescriptions/{prescription_id}", response_model=schemas.PrescriptionResponse)
+def get_prescription(prescription_id: str, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_read_db)):
     """Get a specific prescription by ID"""
+    version = crud.get_entity_version(db, models.Prescription, prescription_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Prescription not found")
+    etag = etags.make("prescription", prescription_id, version)
+    if etags.matches(if_none_match, etag):
+        return etags.not_modified(etag)
     prescription = crud.get_prescription(db, prescription_id=prescription_id)
     if prescription is None:
         raise HTTPException(status_code=404, detail="Prescription not found")
-    return schemas.ApiResponse(data=prescription, success=True)
+    return responses.render(schemas.PrescriptionResponse, prescription, headers=etags.headers(etag))
 
 
-@app.get("/api/prescriptions/patient/{patient_id}", response_model=schemas.ApiResponse)
-def get_prescriptions_by_patient(patient_id: str, db: Session = Depends(get_db)):
+@app.get("/api/prescriptions/patient/{patient_id}", response_model=schemas.PrescriptionListResponse)
+def get_prescriptions_by_patient(patient_id: str, db: Session = Depends(get_read_db)):
     """Get all prescriptions for a specific patient"""
     try:
         prescriptions = crud.get_prescriptions_by_patient(db, patient_id=patient_id)
-        return schemas.ApiResponse(data=prescriptions, success=True)
+        return responses.render(schemas.PrescriptionListResponse, prescriptions)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/prescriptions", response_model=schemas.ApiResponse, status_code=status.HTTP_201_CREATED)
+@app.post("/api/prescriptions", response_model=schemas.PrescriptionResponse, status_code=status.HTTP_201_CREATED)
 def create_prescription(prescription: schemas.PrescriptionCreate, db: Session = Depends(get_db)):
     """Create a new prescription"""
     try:
@@ -354,15 +855,16 @@ def create_prescription(prescription: schemas.PrescriptionCreate, db: Session =
             raise HTTPException(status_code=404, detail="Patient not found")
         
         # Verify doctor exists
-        doctor = crud.get_doctor(db, prescription.doctor_id)
+        doctor = directory.get_doctor(db, prescription.doctor_id)
         if not doctor:
             raise HTTPException(status_code=404, detail="Doctor not found")
         
         db_prescription = crud.create_prescription(db=db, prescription=prescription)
-        return schemas.ApiResponse(
-            data=db_prescription,
+        return responses.render(
+            schemas.PrescriptionResponse,
+            db_prescription,
             message="Prescription created successfully",
-            success=True
+            status_code=status.HTTP_201_CREATED
         )
     except HTTPException:
         raise
@@ -370,7 +872,18 @@ def create_prescription(prescription: schemas.PrescriptionCreate, db: Session =
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.put("/api/prescriptions/{prescription_id}", response_model=schemas.ApiResponse)
+@app.post("/api/prescriptions/bulk", response_model=schemas.ApiResponse)
+def bulk_create_prescriptions(rows: List[Dict[str, Any]] = Body(...), db: Session = Depends(get_db)):
+    """Create many prescriptions in one request; invalid rows are reported per index"""
+    check_bulk_size(rows)
+    try:
+        result = crud.bulk_create_prescriptions(db, rows)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return bulk_response(result, "prescriptions", len(rows))
+
+
+@app.put("/api/prescriptions/{prescription_id}", response_model=schemas.PrescriptionResponse)
 def update_prescription(prescription_id: str, prescription: schemas.PrescriptionUpdate, db: Session = Depends(get_db)):
     """Update a prescription"""
     try:
@@ -382,17 +895,17 @@ def update_prescription(prescription_id: str, prescription: schemas.Prescription
         
         # Verify doctor exists if provided
         if prescription.doctor_id:
-            doctor = crud.get_doctor(db, prescription.doctor_id)
+            doctor = directory.get_doctor(db, prescription.doctor_id)
             if not doctor:
                 raise HTTPException(status_code=404, detail="Doctor not found")
         
         db_prescription = crud.update_prescription(db=db, prescription_id=prescription_id, prescription=prescription)
         if db_prescription is None:
             raise HTTPException(status_code=404, detail="Prescription not found")
-        return schemas.ApiResponse(
-            data=db_prescription,
-            message="Prescription updated successfully",
-            success=True
+        return responses.render(
+            schemas.PrescriptionResponse,
+            db_prescription,
+            message="Prescription updated successfully"
         )
     except HTTPException:
         raise
@@ -415,7 +928,7 @@ def delete_prescription(prescription_id: str, db: Session = Depends(get_db)):
 
 # ========== DASHBOARD ENDPOINT ==========
 @app.get("/api/dashboard/stats", response_model=schemas.ApiResponse)
-def get_dashboard_stats(db: Session = Depends(get_db)):
+def get_dashboard_stats(db: Session = Depends(get_read_db)):
     """Get dashboard statistics"""
     try:
         stats = crud.get_dashboard_stats(db)
@@ -0,0 +1,234 @@
+"""
+Prometheus metrics in the text exposition format (served at /metrics)
+
+A small self-contained registry (counters, gauges and histograms with
+labels) so no client library is needed. MetricsMiddleware records, per route
+template rather than raw path, request latency, in-flight requests, status
+codes and response sizes. database.py reports connection pool checkout wait,
+querystats.py statement counts and DB time per request, and hashing.py bcrypt
+queue and hash times. Values are per worker process: scrape each worker (or
+sum across them) in multi-worker deployments.
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """Gauge set directly (inc/dec) or read from `callback` at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def samples(self) -> List[str]:
+        if self._callback is not None:
+            values = list(self._callback())
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # labels -> [count per bucket (not cumulative)..., sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * len(self.buckets) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(series)) for key, series in self._values.items()]
+        lines = []
+        for key, series in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _labels(self.labelnames, key, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template, method and status code",
+    ("method", "route", "status"),
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte",
+    ("method", "route"),
+))
+RESPONSE_BYTES = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size", ("method", "route"), buckets=SIZE_BUCKETS,
+))
+IN_PROGRESS = registry.register(Gauge(
+    "http_requests_in_progress", "Requests currently being handled", ("method",),
+))
+DB_CHECKOUT_SECONDS = registry.register(Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a connection from the pool, by database",
+    ("database",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+))
+DB_POOL_TIMEOUTS = registry.register(Counter(
+    "db_pool_timeouts_total", "Requests that gave up waiting for a pooled connection, by database",
+    ("database",),
+))
+DB_STATEMENTS = registry.register(Histogram(
+    "db_statements_per_request", "SQL statements run while handling one request", ("method", "route"),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500),
+))
+DB_REQUEST_SECONDS = registry.register(Histogram(
+    "db_request_seconds", "Time spent in SQL statements while handling one request", ("method", "route"),
+))
+DB_READ_SESSIONS = registry.register(Counter(
+    "db_read_sessions_total", "Read-only sessions by where they were routed (replica name or primary) and why",
+    ("target", "reason"),
+))
+BCRYPT_WAIT_SECONDS = registry.register(Histogram(
+    "bcrypt_queue_wait_seconds", "Time a password hash waited for a hashing pool worker",
+))
+BCRYPT_SECONDS = registry.register(Histogram(
+    "bcrypt_hash_seconds", "Time spent hashing or verifying one password",
+))
+
+
+def render() -> str:
+    return registry.render()
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    # Route templates keep the label set bounded; unmatched paths share one label
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status, size and in-flight count per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        started = time.perf_counter()
+        status = 500
+        size = 0
+        # Only the method is known here: routing runs inside the app
+        IN_PROGRESS.inc(method)
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_PROGRESS.dec(method)
+            route = route_label(scope)
+            REQUESTS.inc(method, route, str(status))
+            REQUEST_SECONDS.observe(time.perf_counter() - started, method, route)
+            RESPONSE_BYTES.observe(size, method, route)
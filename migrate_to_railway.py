@@ -1,11 +1,15 @@
 """
 Script to migrate database to Railway
 """
+import os
 import sys
+from alembic import command as alembic_command
+from alembic.config import Config as AlembicConfig
 from sqlalchemy import create_engine, text, inspect
 from database import engine, Base, init_db
 from config import settings
 from models import User, Patient, Doctor, Appointment, Prescription
+import search
 
 def test_connection():
     """Test the database connection"""
@@ -66,6 +70,12 @@ def create_tables():
     try:
         # Create all tables
         Base.metadata.create_all(bind=engine)
+        search.ensure_index()
+        
+        # Record the schema as current: production boots only check this revision
+        alembic_command.stamp(AlembicConfig(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")),
+                              "head")
+        print("✅ Schema stamped at the newest migration")
         
         # Verify tables were created
         inspector = inspect(engine)
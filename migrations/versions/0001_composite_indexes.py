@@ -0,0 +1,58 @@
+"""Composite indexes for list ordering, doctor's day and patient history queries
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Databases created by Base.metadata.create_all after these indexes were added
+to models.py already have them, so every step checks before acting.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_patients_created_at_id", "patients", ["created_at", "id"]),
+    ("ix_doctors_created_at_id", "doctors", ["created_at", "id"]),
+    ("ix_appointments_date_time_id", "appointments", ["date", "time", "id"]),
+    ("ix_appointments_date_status", "appointments", ["date", "status"]),
+    ("ix_appointments_doctor_date_time", "appointments", ["doctor_id", "date", "time"]),
+    ("ix_appointments_patient_date", "appointments", ["patient_id", "date"]),
+    ("ix_prescriptions_created_at_id", "prescriptions", ["created_at", "id"]),
+    ("ix_prescriptions_patient_date", "prescriptions", ["patient_id", "date"]),
+    ("ix_prescriptions_doctor_date", "prescriptions", ["doctor_id", "date"]),
+]
+
+# Superseded: every composite above that starts with `date` serves these lookups
+REPLACED = [
+    ("ix_appointments_date", "appointments", ["date"]),
+]
+
+
+def _existing(table):
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        if name not in _existing(table):
+            op.create_index(name, table, columns)
+    for name, table, _ in REPLACED:
+        if name in _existing(table):
+            op.drop_index(name, table_name=table)
+
+
+def downgrade():
+    for name, table, columns in REPLACED:
+        if name not in _existing(table):
+            op.create_index(name, table, columns)
+    for name, table, _ in reversed(INDEXES):
+        if name in _existing(table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,70 @@
+"""One live appointment per doctor, date and time
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Adds the generated appointments.booking_active column (1 unless the
+appointment is cancelled, NULL otherwise) and a unique index on
+(doctor_id, date, time, booking_active), which replaces the plain
+(doctor_id, date, time) index. Existing double bookings would make the
+unique index fail, so they are reported and the upgrade stops before any
+change; resolve them (cancel or move one of each pair) and re-run.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+COLUMN = "booking_active"
+UNIQUE_INDEX = "uq_appointments_doctor_slot"
+REPLACED_INDEX = "ix_appointments_doctor_date_time"
+
+
+def _columns():
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns("appointments")}
+
+
+def _indexes():
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes("appointments")}
+
+
+def _double_bookings():
+    return op.get_bind().execute(sa.text(
+        "SELECT doctor_id, date, time, COUNT(*) AS bookings FROM appointments "
+        "WHERE status <> 'Cancelled' GROUP BY doctor_id, date, time HAVING COUNT(*) > 1"
+    )).all()
+
+
+def upgrade():
+    if UNIQUE_INDEX not in _indexes():
+        duplicates = _double_bookings()
+        if duplicates:
+            sample = ", ".join(f"{row.doctor_id} {row.date} {row.time} (x{row.bookings})" for row in duplicates[:5])
+            raise RuntimeError(
+                f"{len(duplicates)} doctor slots are double-booked, e.g. {sample}. "
+                "Cancel or move the extra appointments, then run the migration again."
+            )
+    if COLUMN not in _columns():
+        op.add_column("appointments", sa.Column(
+            COLUMN, sa.Integer(), sa.Computed("CASE WHEN status <> 'Cancelled' THEN 1 END"), nullable=True
+        ))
+    if UNIQUE_INDEX not in _indexes():
+        op.create_index(UNIQUE_INDEX, "appointments", ["doctor_id", "date", "time", COLUMN], unique=True)
+    if REPLACED_INDEX in _indexes():
+        op.drop_index(REPLACED_INDEX, table_name="appointments")
+
+
+def downgrade():
+    if REPLACED_INDEX not in _indexes():
+        op.create_index(REPLACED_INDEX, "appointments", ["doctor_id", "date", "time"])
+    if UNIQUE_INDEX in _indexes():
+        op.drop_index(UNIQUE_INDEX, table_name="appointments")
+    if COLUMN in _columns():
+        op.drop_column("appointments", COLUMN)
@@ -0,0 +1,110 @@
+"""Store UUID primary and foreign keys as 16 bytes instead of 36-character strings
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+Existing IDs keep their value and their string form in the API; only the
+storage changes. New rows get time-ordered UUIDv7 IDs from models.uuid7().
+
+MySQL (8.0+ for UUID_TO_BIN/BIN_TO_UUID): foreign keys between the converted
+tables are dropped, each table's ID columns are widened to VARBINARY, rewritten
+in one UPDATE and narrowed to BINARY(16), then the foreign keys are restored.
+Every step rebuilds the table, so run it in a maintenance window on large
+databases. MySQL DDL is not transactional: if the upgrade is interrupted,
+restore from backup rather than re-running it.
+
+SQLite stores each value with its own type whatever the declared column type,
+so the values are rewritten in place as BLOBs and the declarations are left
+alone. Rows already in the target form are skipped, so it is safe to re-run.
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+ID_COLUMNS = {
+    "users": ["id"],
+    "patients": ["id"],
+    "doctors": ["id"],
+    "appointments": ["id", "patient_id", "doctor_id"],
+    "prescriptions": ["id", "patient_id", "doctor_id"],
+}
+
+
+def _is_binary(inspector, table):
+    column = next(column for column in inspector.get_columns(table) if column["name"] == "id")
+    return column["type"].python_type is bytes and getattr(column["type"], "length", None) == 16
+
+
+def _convert_mysql(to_binary):
+    inspector = sa.inspect(op.get_bind())
+    pending = [table for table in ID_COLUMNS if _is_binary(inspector, table) != to_binary]
+    if not pending:
+        return
+    foreign_keys = [(table, fk) for table in ID_COLUMNS for fk in inspector.get_foreign_keys(table)]
+    for table, fk in foreign_keys:
+        op.drop_constraint(fk["name"], table, type_="foreignkey")
+
+    convert = "UUID_TO_BIN" if to_binary else "BIN_TO_UUID"
+    final_type = "BINARY(16)" if to_binary else "VARCHAR(36)"
+    for table in pending:
+        columns = ID_COLUMNS[table]
+        op.execute(f"ALTER TABLE {table} " + ", ".join(f"MODIFY {c} VARBINARY(36) NOT NULL" for c in columns))
+        op.execute(f"UPDATE {table} SET " + ", ".join(f"{c} = {convert}({c})" for c in columns))
+        op.execute(f"ALTER TABLE {table} " + ", ".join(f"MODIFY {c} {final_type} NOT NULL" for c in columns))
+
+    for table, fk in foreign_keys:
+        op.create_foreign_key(
+            fk["name"], table, fk["referred_table"], fk["constrained_columns"], fk["referred_columns"],
+            ondelete=fk.get("options", {}).get("ondelete"),
+        )
+
+
+def _to_bytes(value):
+    return uuid.UUID(value).bytes
+
+
+def _to_text(value):
+    return str(uuid.UUID(bytes=bytes(value)))
+
+
+def _convert_sqlite(to_binary):
+    bind = op.get_bind()
+    bind.connection.driver_connection.create_function(
+        "convert_uuid", 1, _to_bytes if to_binary else _to_text, deterministic=True
+    )
+    # Parent and child keys are rewritten by separate statements
+    op.execute("PRAGMA defer_foreign_keys = ON")
+    source_type = "text" if to_binary else "blob"
+    for table, columns in ID_COLUMNS.items():
+        for column in columns:
+            op.execute(
+                f"UPDATE {table} SET {column} = convert_uuid({column}) WHERE typeof({column}) = '{source_type}'"
+            )
+
+
+def _convert(to_binary):
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        _convert_mysql(to_binary)
+    elif dialect == "sqlite":
+        _convert_sqlite(to_binary)
+    else:
+        raise NotImplementedError(f"Binary UUID migration is not implemented for {dialect}")
+
+
+def upgrade():
+    _convert(to_binary=True)
+
+
+def downgrade():
+    _convert(to_binary=False)
@@ -0,0 +1,127 @@
+"""Move prescription attachments from a comma-joined column into their own table
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+Each path in prescriptions.attachments becomes a prescription_attachments row
+keeping its position, with a content type guessed from the file extension.
+The old column is dropped once its values are copied. Downgrade joins the
+paths back into the column (paths containing commas cannot round-trip) and
+drops the table. Every step checks before acting, so either direction can be
+re-run after an interruption.
+"""
+from datetime import datetime
+import mimetypes
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+TABLE = "prescription_attachments"
+COLUMN = "attachments"
+COPY_BATCH = 1000
+
+
+def _id_type():
+    # Same storage as models.UUIDBinary, without importing the app
+    return sa.LargeBinary(16).with_variant(mysql.BINARY(16), "mysql")
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _columns():
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns("prescriptions")}
+
+
+def _indexes():
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(TABLE)}
+
+
+def _attachments_table():
+    return sa.table(
+        TABLE,
+        sa.column("id", _id_type()),
+        sa.column("prescription_id", _id_type()),
+        sa.column("position", sa.Integer()),
+        sa.column("path", sa.String(512)),
+        sa.column("content_type", sa.String(100)),
+        sa.column("created_at", sa.DateTime()),
+    )
+
+
+def upgrade():
+    if TABLE not in _tables():
+        op.create_table(
+            TABLE,
+            sa.Column("id", _id_type(), primary_key=True),
+            sa.Column("prescription_id", _id_type(),
+                      sa.ForeignKey("prescriptions.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("position", sa.Integer(), nullable=False),
+            sa.Column("path", sa.String(512), nullable=False),
+            sa.Column("content_type", sa.String(100), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+    if "ix_prescription_attachments_prescription" not in _indexes():
+        op.create_index("ix_prescription_attachments_prescription", TABLE, ["prescription_id", "position"])
+    if "ix_prescription_attachments_path" not in _indexes():
+        op.create_index("ix_prescription_attachments_path", TABLE, ["path"])
+
+    if COLUMN not in _columns():
+        return
+    bind = op.get_bind()
+    attachments = _attachments_table()
+    # Prescriptions copied by an interrupted run already have rows
+    done = set(bind.execute(sa.select(attachments.c.prescription_id).distinct()).scalars())
+    now = datetime.utcnow()
+    rows = []
+    for prescription_id, joined in bind.execute(sa.text(
+        f"SELECT id, {COLUMN} FROM prescriptions WHERE {COLUMN} IS NOT NULL AND {COLUMN} <> ''"
+    )):
+        if prescription_id in done:
+            continue
+        paths = [path.strip() for path in joined.split(",") if path.strip()]
+        rows.extend(
+            {"id": uuid.uuid4().bytes, "prescription_id": prescription_id, "position": position,
+             "path": path[:512], "content_type": mimetypes.guess_type(path)[0], "created_at": now}
+            for position, path in enumerate(paths)
+        )
+        if len(rows) >= COPY_BATCH:
+            bind.execute(attachments.insert(), rows)
+            rows = []
+    if rows:
+        bind.execute(attachments.insert(), rows)
+    with op.batch_alter_table("prescriptions") as batch:
+        batch.drop_column(COLUMN)
+
+
+def downgrade():
+    if COLUMN not in _columns():
+        op.add_column("prescriptions", sa.Column(COLUMN, sa.Text(), nullable=True))
+    if TABLE not in _tables():
+        return
+    bind = op.get_bind()
+    attachments = _attachments_table()
+    joined = {}
+    for prescription_id, path in bind.execute(
+        sa.select(attachments.c.prescription_id, attachments.c.path)
+        .order_by(attachments.c.prescription_id, attachments.c.position)
+    ):
+        joined.setdefault(prescription_id, []).append(path)
+    prescriptions = sa.table("prescriptions", sa.column("id", _id_type()), sa.column(COLUMN, sa.Text()))
+    update = prescriptions.update().where(prescriptions.c.id == sa.bindparam("prescription_id"))
+    items = [{"prescription_id": key, COLUMN: ",".join(paths)} for key, paths in joined.items()]
+    for start in range(0, len(items), COPY_BATCH):
+        bind.execute(update.values({COLUMN: sa.bindparam(COLUMN)}), items[start:start + COPY_BATCH])
+    op.drop_table(TABLE)
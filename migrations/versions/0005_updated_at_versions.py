@@ -0,0 +1,60 @@
+"""Index updated_at and store it to the microsecond for ETag version probes
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+List ETags read MAX(updated_at) per table, which the new indexes turn into a
+single index lookup. On MySQL, updated_at becomes DATETIME(6): plain DATETIME
+keeps whole seconds, so two updates within one second would leave a row's
+ETag unchanged. Both steps check before acting.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+TABLES = ["patients", "doctors", "appointments", "prescriptions"]
+
+
+def _index_name(table):
+    return f"ix_{table}_updated_at"
+
+
+def _indexes(table):
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _fsp(table):
+    column = next(c for c in sa.inspect(op.get_bind()).get_columns(table) if c["name"] == "updated_at")
+    return getattr(column["type"], "fsp", None) or 0
+
+
+def _set_precision(fsp):
+    if op.get_bind().dialect.name != "mysql":
+        return
+    for table in TABLES:
+        if _fsp(table) != fsp:
+            op.alter_column(table, "updated_at", existing_nullable=False,
+                            type_=mysql.DATETIME(fsp=fsp) if fsp else sa.DateTime())
+
+
+def upgrade():
+    _set_precision(6)
+    for table in TABLES:
+        if _index_name(table) not in _indexes(table):
+            op.create_index(_index_name(table), table, ["updated_at"])
+
+
+def downgrade():
+    for table in TABLES:
+        if _index_name(table) in _indexes(table):
+            op.drop_index(_index_name(table), table_name=table)
+    _set_precision(0)
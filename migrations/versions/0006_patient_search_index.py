@@ -0,0 +1,39 @@
+"""Full-text search index on patients
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+Until now the index was only created by the application at boot
+(search.ensure_index), which production no longer runs: it checks the
+stored revision instead. MySQL gets the FULLTEXT index on (name, contact,
+medical_history); SQLite gets the FTS5 table and its sync triggers. Skipped
+when the index is already there, as on databases the app booted before.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+import search
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    search.create_index(op.get_bind())
+
+
+def downgrade():
+    bind = op.get_bind()
+    if not search.index_exists(bind):
+        return
+    if bind.dialect.name == "mysql":
+        op.drop_index(search.FULLTEXT_INDEX, table_name="patients")
+    elif bind.dialect.name == "sqlite":
+        for suffix in ("ai", "ad", "au"):
+            op.execute(sa.text(f"DROP TRIGGER IF EXISTS {search.FTS_TABLE}_{suffix}"))
+        op.execute(sa.text(f"DROP TABLE {search.FTS_TABLE}"))
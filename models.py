@@ -1,18 +1,106 @@
-from sqlalchemy import Column, String, Integer, Text, DateTime, Enum, ForeignKey, Date, Time, Boolean
+from sqlalchemy import Column, String, Integer, BigInteger, Text, DateTime, Enum, ForeignKey, Date, Time, Boolean, Index, Computed, inspect
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import LargeBinary, TypeDecorator
 from datetime import datetime
+from typing import List, Optional
+import mimetypes
+import secrets
+import threading
+import time
 import uuid
 from database import Base
 
 
+_uuid7_lock = threading.Lock()
+_uuid7_last = [0, 0]  # [unix ms, counter] of the previous ID
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): 48-bit Unix milliseconds, then a
+    12-bit counter and 62 random bits. The counter keeps IDs generated by one
+    process increasing within the same millisecond, so new rows land at the
+    right-hand edge of the primary key index instead of at random pages.
+    """
+    with _uuid7_lock:
+        ms = time.time_ns() // 1_000_000
+        last_ms, counter = _uuid7_last
+        if ms > last_ms:
+            counter = secrets.randbits(11)  # random start, leaving room to count up
+        else:
+            ms, counter = last_ms, counter + 1
+            if counter > 0xFFF:
+                ms, counter = ms + 1, 0
+        _uuid7_last[:] = [ms, counter]
+    value = (ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | secrets.randbits(62)
+    return uuid.UUID(int=value)
+
+
 def generate_uuid():
-    return str(uuid.uuid4())
+    return str(uuid7())
+
+
+def canonical_id(value: str) -> str:
+    """
+    Lowercase, hyphenated form of a UUID string (the form keys are read back
+    in), so ids written in upper case or without hyphens compare equal to it.
+    Anything that is not a UUID is returned unchanged and matches no row.
+    """
+    try:
+        return str(uuid.UUID(value))
+    except (AttributeError, TypeError, ValueError):
+        return value
+
+
+class UUIDBinary(TypeDecorator):
+    """
+    UUID stored as 16 raw bytes (BINARY(16) on MySQL, BLOB elsewhere) and
+    exposed to Python, schemas and the API as the usual 36-character string.
+    Strings that are not UUIDs bind as NULL, which matches no row, so a lookup
+    by a malformed ID behaves like a lookup by an unknown one.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    @property
+    def python_type(self):
+        return str
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(mysql.BINARY(16))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    # Hot path on every key read and lookup: hex conversion directly, which is
+    # several times cheaper than round-tripping through uuid.UUID
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        if isinstance(value, uuid.UUID):
+            return value.bytes
+        try:
+            raw = bytes.fromhex(str(value).replace("-", ""))
+        except ValueError:
+            return None
+        return raw if len(raw) == 16 else None
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        h = value.hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+# Microsecond precision on MySQL, whose plain DATETIME keeps whole seconds, so
+# two updates within one second still change updated_at (it backs the ETags)
+PreciseDateTime = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
 
 
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(String(36), primary_key=True, default=generate_uuid)
+    id = Column(UUIDBinary, primary_key=True, default=generate_uuid)
     username = Column(String(50), unique=True, nullable=False, index=True)
     email = Column(String(255), unique=True, nullable=False, index=True)
     full_name = Column(String(255), nullable=True)
@@ -25,8 +113,11 @@ class User(Base):
 
 class Patient(Base):
     __tablename__ = "patients"
+    __table_args__ = (
+        Index("ix_patients_created_at_id", "created_at", "id"),
+    )
     
-    id = Column(String(36), primary_key=True, default=generate_uuid)
+    id = Column(UUIDBinary, primary_key=True, default=generate_uuid)
     name = Column(String(255), nullable=False, index=True)
     age = Column(Integer, nullable=False)
     gender = Column(Enum('Male', 'Female', 'Other'), nullable=False)
@@ -34,7 +125,7 @@ class Patient(Base):
     address = Column(Text, nullable=False)
     medical_history = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = Column(PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     
     # Relationships
     appointments = relationship("Appointment", back_populates="patient", cascade="all, delete-orphan")
@@ -43,14 +134,17 @@ class Patient(Base):
 
 class Doctor(Base):
     __tablename__ = "doctors"
+    __table_args__ = (
+        Index("ix_doctors_created_at_id", "created_at", "id"),
+    )
     
-    id = Column(String(36), primary_key=True, default=generate_uuid)
+    id = Column(UUIDBinary, primary_key=True, default=generate_uuid)
     name = Column(String(255), nullable=False, index=True)
     specialization = Column(String(100), nullable=False)
     contact = Column(String(20), nullable=False)
     email = Column(String(255), nullable=False, unique=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = Column(PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     
     # Relationships
     appointments = relationship("Appointment", back_populates="doctor", cascade="all, delete-orphan")
@@ -59,11 +153,19 @@ class Doctor(Base):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        Index("ix_appointments_date_time_id", "date", "time", "id"),
+        Index("ix_appointments_date_status", "date", "status"),
+        # One live booking per doctor slot. booking_active is NULL for cancelled
+        # rows and NULLs never collide, so cancelled slots can be rebooked
+        Index("uq_appointments_doctor_slot", "doctor_id", "date", "time", "booking_active", unique=True),
+        Index("ix_appointments_patient_date", "patient_id", "date"),
+    )
     
-    id = Column(String(36), primary_key=True, default=generate_uuid)
-    patient_id = Column(String(36), ForeignKey('patients.id', ondelete='CASCADE'), nullable=False)
-    doctor_id = Column(String(36), ForeignKey('doctors.id', ondelete='CASCADE'), nullable=False)
-    date = Column(Date, nullable=False, index=True)
+    id = Column(UUIDBinary, primary_key=True, default=generate_uuid)
+    patient_id = Column(UUIDBinary, ForeignKey('patients.id', ondelete='CASCADE'), nullable=False)
+    doctor_id = Column(UUIDBinary, ForeignKey('doctors.id', ondelete='CASCADE'), nullable=False)
+    date = Column(Date, nullable=False)
     time = Column(Time, nullable=False)
     reason = Column(Text, nullable=False)
     status = Column(
@@ -72,8 +174,9 @@ class Appointment(Base):
         nullable=False,
         index=True
     )
+    booking_active = Column(Integer, Computed("CASE WHEN status <> 'Cancelled' THEN 1 END"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = Column(PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     
     # Relationships
     patient = relationship("Patient", back_populates="appointments")
@@ -82,19 +185,86 @@ class Appointment(Base):
 
 class Prescription(Base):
     __tablename__ = "prescriptions"
+    __table_args__ = (
+        Index("ix_prescriptions_created_at_id", "created_at", "id"),
+        Index("ix_prescriptions_patient_date", "patient_id", "date"),
+        Index("ix_prescriptions_doctor_date", "doctor_id", "date"),
+    )
     
-    id = Column(String(36), primary_key=True, default=generate_uuid)
-    patient_id = Column(String(36), ForeignKey('patients.id', ondelete='CASCADE'), nullable=False)
-    doctor_id = Column(String(36), ForeignKey('doctors.id', ondelete='CASCADE'), nullable=False)
+    id = Column(UUIDBinary, primary_key=True, default=generate_uuid)
+    patient_id = Column(UUIDBinary, ForeignKey('patients.id', ondelete='CASCADE'), nullable=False)
+    doctor_id = Column(UUIDBinary, ForeignKey('doctors.id', ondelete='CASCADE'), nullable=False)
     diagnosis = Column(Text, nullable=False)
     medications = Column(Text, nullable=False)
     instructions = Column(Text, nullable=True)
     date = Column(Date, nullable=False, index=True)
-    attachments = Column(Text, nullable=True)  # JSON string or comma-separated file paths
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = Column(PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     
     # Relationships
     patient = relationship("Patient", back_populates="prescriptions")
     doctor = relationship("Doctor", back_populates="prescriptions")
+    attachment_rows = relationship(
+        "PrescriptionAttachment",
+        back_populates="prescription",
+        order_by="PrescriptionAttachment.position",
+        cascade="all, delete-orphan",
+    )
+    
+    @property
+    def attachments(self) -> List[str]:
+        """Attachment paths in order (the List[str] exposed by the API)"""
+        return [attachment.path for attachment in self.attachment_rows]
+    
+    @attachments.setter
+    def attachments(self, paths: Optional[List[str]]):
+        if inspect(self).persistent and list(paths or []) != self.attachments:
+            # The prescription row itself may not change (so onupdate would not
+            # fire); its ETag must. New rows get updated_at from the column default
+            self.updated_at = datetime.utcnow()
+        # Keep rows for paths that are still attached so their metadata survives updates
+        existing = {}
+        for attachment in self.attachment_rows:
+            existing.setdefault(attachment.path, []).append(attachment)
+        rows = []
+        for position, path in enumerate(paths or []):
+            kept = existing.get(path)
+            attachment = kept.pop(0) if kept else PrescriptionAttachment(
+                path=path, content_type=guess_content_type(path)
+            )
+            attachment.position = position
+            rows.append(attachment)
+        self.attachment_rows = rows
+
+
+def guess_content_type(path: str) -> Optional[str]:
+    return mimetypes.guess_type(path)[0]
+
+
+class PrescriptionAttachment(Base):
+    """One file attached to a prescription, with its position in the list"""
+    __tablename__ = "prescription_attachments"
+    __table_args__ = (
+        Index("ix_prescription_attachments_prescription", "prescription_id", "position"),
+    )
+    
+    id = Column(UUIDBinary, primary_key=True, default=generate_uuid)
+    prescription_id = Column(UUIDBinary, ForeignKey('prescriptions.id', ondelete='CASCADE'), nullable=False)
+    position = Column(Integer, nullable=False)
+    path = Column(String(512), nullable=False, index=True)
+    content_type = Column(String(100), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    prescription = relationship("Prescription", back_populates="attachment_rows")
+
+
+class Counter(Base):
+    """Incrementally maintained row counts backing the dashboard (see counters.py)"""
+    __tablename__ = "counters"
+    
+    name = Column(String(64), primary_key=True)
+    value = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
 
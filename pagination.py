@@ -0,0 +1,82 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor is an opaque, URL-safe token holding the sort-key values of the
+last row of a page. The next page is fetched with a WHERE clause on those
+values instead of OFFSET, so deep pages cost the same as the first one.
+"""
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded for the requested ordering"""
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def _from_json(value: Any, python_type: type) -> Any:
+    if value is None:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is time:
+        return time.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode sort-key values into an opaque cursor"""
+    raw = json.dumps([_to_json(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    """Decode a cursor back into values typed for the given order columns"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise InvalidCursor("Invalid cursor")
+        return [_from_json(value, column.type.python_type) for value, column in zip(values, columns)]
+    except InvalidCursor:
+        raise
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def after(columns: Sequence[Any], values: Sequence[Any]):
+    """WHERE clause selecting rows strictly after `values` in ascending `columns` order"""
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, column > values[i]))
+    return or_(*clauses)
+
+
+def paginate(query, columns: Sequence[Any], skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    """Order a query by `columns` and apply either keyset or offset pagination"""
+    query = query.order_by(*columns)
+    if cursor:
+        query = query.filter(after(columns, decode_cursor(cursor, columns)))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def next_cursor(rows: Sequence[Any], columns: Sequence[Any], limit: int) -> Optional[str]:
+    """Cursor for the page after `rows`, or None when this was the last page"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor([getattr(last, column.key) for column in columns])
@@ -0,0 +1,149 @@
+"""
+Per-request SQL statement accounting
+
+Engine events time every statement. QueryStatsMiddleware opens a
+RequestQueries record per HTTP request in a context variable (sync endpoints
+and dependencies run in the threadpool with a copy of the request context, so
+they see the same record) and at the end of the request:
+  - reports statement count and DB time to /metrics,
+  - warns when one statement shape ran N_PLUS_ONE_THRESHOLD or more times,
+    the usual sign of a lazy load or query inside a loop (N+1),
+  - outside production, sends the count as `X-Query-Count` / `X-Query-Time-Ms`.
+Statements slower than SLOW_QUERY_MS are logged as they finish, with bound
+parameters redacted. This replaces SQLAlchemy's echo, which logs every
+statement and now only runs when SQL_ECHO is set.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+import metrics
+
+
+_WHITESPACE = re.compile(r"\s+")
+# Expanded IN lists and multi-row VALUES differ only in their placeholder count
+_PLACEHOLDER_LIST = re.compile(r"\((?:\?|%s|:\w+)(?:, (?:\?|%s|:\w+))+\)")
+_STARTED = "querystats_started"
+
+
+class RequestQueries:
+    """Statements run while handling one request"""
+    __slots__ = ("count", "seconds", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[shape(statement)] += 1
+
+    def repeated(self, threshold: int):
+        """(shape, times) for statements run at least `threshold` times, most frequent first"""
+        return [(text, times) for text, times in self.shapes.most_common() if times >= threshold]
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def current() -> Optional[RequestQueries]:
+    """Record for the request being handled, if any"""
+    return _current.get()
+
+
+@contextmanager
+def collect():
+    """Record the statements run inside the block (by this context) in a RequestQueries"""
+    queries = RequestQueries()
+    token = _current.set(queries)
+    try:
+        yield queries
+    finally:
+        _current.reset(token)
+
+
+def shape(statement: str) -> str:
+    return _PLACEHOLDER_LIST.sub("(?...)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _truncate(text: str, limit: int = 300) -> str:
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def _redacted(parameters, executemany: bool) -> str:
+    count = len(parameters) if parameters else 0
+    noun = "parameter set" if executemany else "parameter"
+    return f"[{count} {noun}{'' if count == 1 else 's'} redacted]"
+
+
+# ========== ENGINE EVENT HOOKS ==========
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_STARTED, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info[_STARTED].pop()
+    seconds = time.perf_counter() - started
+    queries = _current.get()
+    if queries is not None:
+        queries.record(statement, seconds)
+    if settings.SLOW_QUERY_MS and seconds * 1000 >= settings.SLOW_QUERY_MS:
+        print(f"🐢 Slow query ({seconds * 1000:.0f} ms): {_truncate(shape(statement))} "
+              f"{_redacted(parameters, executemany)}")
+
+
+@event.listens_for(Engine, "handle_error")
+def _discard_failed(context):
+    # after_cursor_execute does not run for a statement that raised
+    started = context.connection.info.get(_STARTED) if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+class QueryStatsMiddleware:
+    """ASGI middleware collecting the statements each request runs"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        expose = settings.ENVIRONMENT != "production"
+
+        async def send_wrapper(message):
+            if expose and message["type"] == "http.response.start":
+                # Streaming responses may still query after this point
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-query-count", str(queries.count).encode()),
+                    (b"x-query-time-ms", f"{queries.seconds * 1000:.1f}".encode()),
+                ]
+            await send(message)
+
+        with collect() as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                self._report(scope, queries)
+
+    @staticmethod
+    def _report(scope, queries: RequestQueries) -> None:
+        route = metrics.route_label(scope)
+        metrics.DB_STATEMENTS.observe(queries.count, scope["method"], route)
+        metrics.DB_REQUEST_SECONDS.observe(queries.seconds, scope["method"], route)
+        if settings.N_PLUS_ONE_THRESHOLD:
+            for text, times in queries.repeated(settings.N_PLUS_ONE_THRESHOLD):
+                print(f"⚠️  Possible N+1 in {scope['method']} {route}: "
+                      f"ran {times}x: {_truncate(text)}")
@@ -0,0 +1,56 @@
+"""
+Dashboard counter reconciliation
+
+Usage:
+    python reconcile_counters.py [--dry-run]
+
+Recounts patients, doctors, appointments, prescriptions and appointments per
+day from their tables and adds any drift to the `counters` table (see
+counters.reconcile). The counts scan whole tables, so run this from a single
+scheduler - cron, or the host's scheduled jobs - rather than in every worker;
+every 15 minutes is plenty, since ORM writes and bulk creates keep the
+counters exact and drift only comes from writes made outside the app:
+
+    */15 * * * * cd /app && python reconcile_counters.py
+
+--dry-run prints the drift without correcting it. Exits 1 if it fails.
+"""
+import argparse
+import sys
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Report drift without correcting it")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    import counters
+    from database import SessionLocal
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        drift = counters.reconcile(db, apply=not args.dry_run)
+    except Exception as e:
+        print(f"❌ Counter reconciliation failed: {type(e).__name__}: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    if not drift:
+        print(f"✅ Dashboard counters match their tables ({elapsed:.1f}s)")
+        return
+    verb = "Found" if args.dry_run else "Corrected"
+    print(f"⚠️  {verb} drift in {len(drift)} counters ({elapsed:.1f}s):")
+    for name, delta in sorted(drift.items()):
+        print(f"   {name}: {delta:+d}")
+
+
+if __name__ == "__main__":
+    main()
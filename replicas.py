@@ -0,0 +1,240 @@
+"""
+Read-replica routing for read-only endpoints
+
+DATABASE_REPLICA_URLS lists read replicas of the primary (comma-separated).
+GET endpoints take their session from get_read_db(), which hands out a session
+bound to the next healthy replica, round-robin. A replica is taken out of
+rotation when it fails a health check (check(), run every
+REPLICA_HEALTH_CHECK_SECONDS) or drops a connection mid-request, and goes back
+in when a later check succeeds. With no replica configured or none healthy,
+reads go to the primary.
+
+Replicas lag the primary, so a client that just committed a write is pinned to
+the primary for READ_YOUR_WRITES_SECONDS. ReadYourWritesMiddleware identifies
+the client (bearer token, else remote address) in a context variable; the
+Session after_commit hook pins that client when the transaction wrote rows.
+The pin lives in this worker's memory: set the window above the replicas'
+usual lag, and expect a client that lands on another worker to read from a
+replica.
+"""
+import hashlib
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from fastapi import Depends
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from cache import TTLCache
+from config import settings
+from database import SessionLocal, engine_kwargs, get_db, pool_stats_for, prepare_database_url
+import metrics
+
+
+class ReadOnlySessionError(RuntimeError):
+    """A write was attempted on a session bound to a read replica"""
+
+
+class Replica:
+    """One replica engine and its health"""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_engine(url, **engine_kwargs, pool_logging_name=name)
+        self.healthy = True
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        event.listen(self.engine, "handle_error", self._on_error)
+
+    def ping(self) -> None:
+        with self.engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
+
+    def mark(self, healthy: bool, error: Optional[BaseException] = None) -> None:
+        self.last_error = None if healthy else f"{type(error).__name__}: {str(error).splitlines()[0]}"
+        if self.healthy and not healthy:
+            print(f"⚠️  Read replica {self.name} out of rotation: {self.last_error}")
+        elif healthy and not self.healthy:
+            print(f"✅ Read replica {self.name} back in rotation")
+        self.healthy = healthy
+        self.failures = 0 if healthy else self.failures + 1
+
+    def _on_error(self, context):
+        # A dropped connection takes the replica out until the next health check
+        if context.is_disconnect:
+            self.mark(False, context.original_exception)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "checked_seconds_ago": round(time.monotonic() - self.checked_at, 1) if self.checked_at else None,
+            "pool": pool_stats_for(self.name).stats(),
+        }
+
+
+class ReplicaSet:
+    """Round-robin over the replicas currently passing health checks"""
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(f"replica{index}", prepare_database_url(url)) for index, url in enumerate(urls)]
+        self._order = itertools.cycle(self.replicas)
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """Next healthy replica, or None when all are out of rotation"""
+        with self._lock:
+            for _ in range(len(self.replicas)):
+                replica = next(self._order)
+                if replica.healthy:
+                    return replica
+        return None
+
+    def check(self) -> None:
+        """Ping every replica and update its health"""
+        for replica in self.replicas:
+            try:
+                replica.ping()
+            except Exception as e:
+                replica.mark(False, e)
+            else:
+                replica.mark(True)
+            replica.checked_at = time.monotonic()
+
+    def stats(self) -> List[dict]:
+        return [replica.stats() for replica in self.replicas]
+
+
+def _split_urls(value: str) -> List[str]:
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+replicas = ReplicaSet(_split_urls(settings.DATABASE_REPLICA_URLS))
+
+# Clients that wrote within the read-your-writes window
+pinned = TTLCache(maxsize=100_000, ttl=settings.READ_YOUR_WRITES_SECONDS)
+
+_client: ContextVar[Optional[str]] = ContextVar("replica_client", default=None)
+
+
+def client_key(scope) -> Optional[str]:
+    """Stable key for the caller: a digest of its bearer token, else its address"""
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            return "token:" + hashlib.blake2b(value, digest_size=16).hexdigest()
+    client = scope.get("client")
+    return f"addr:{client[0]}" if client else None
+
+
+def is_pinned() -> bool:
+    key = _client.get()
+    return key is not None and pinned.get(key) is not None
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware recording which client the request belongs to"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replicas:
+            await self.app(scope, receive, send)
+            return
+        token = _client.set(client_key(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _client.reset(token)
+
+
+# ========== SESSION EVENT HOOKS ==========
+_WROTE = "replicas_wrote"
+_READ_ONLY = "read_only"
+
+
+@event.listens_for(Session, "before_flush")
+def _guard_flush(session, flush_context, instances):
+    if session.info.get(_READ_ONLY) and (session.new or session.dirty or session.deleted):
+        raise ReadOnlySessionError("Read-only session cannot write; use get_db for this endpoint")
+
+
+@event.listens_for(Session, "after_flush")
+def _flushed(session, flush_context):
+    session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        if orm_execute_state.session.info.get(_READ_ONLY):
+            raise ReadOnlySessionError("Read-only session cannot write; use get_db for this endpoint")
+        orm_execute_state.session.info[_WROTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer(session):
+    if session.info.pop(_WROTE, False) and replicas and settings.READ_YOUR_WRITES_SECONDS > 0:
+        key = _client.get()
+        if key is not None:
+            pinned.set(key, True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(session):
+    session.info.pop(_WROTE, None)
+
+
+def replica_session() -> Optional[Session]:
+    """Session on a healthy replica, or None when the read belongs on the primary (pinned, none up)"""
+    if not replicas:
+        return None
+    if is_pinned():
+        metrics.DB_READ_SESSIONS.inc("primary", "read_your_writes")
+        return None
+    replica = replicas.choose()
+    if replica is None:
+        metrics.DB_READ_SESSIONS.inc("primary", "no_healthy_replica")
+        return None
+    metrics.DB_READ_SESSIONS.inc(replica.name, "replica")
+    db = SessionLocal(bind=replica.engine)
+    db.info[_READ_ONLY] = True
+    db.info["replica"] = replica.name
+    return db
+
+
+def read_session() -> Session:
+    """Session for read-only work outside a request's dependencies (streaming exports)"""
+    db = replica_session()
+    return db if db is not None else SessionLocal()
+
+
+# Dependency for GET endpoints that only read. Primary reads reuse the request's
+# get_db session (shared with get_current_user) so a request never holds two
+# primary connections.
+def get_read_db(db: Session = Depends(get_db)):
+    replica_db = replica_session()
+    if replica_db is None:
+        yield db
+        return
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
+
+
+def stats() -> dict:
+    return {
+        "replicas": replicas.stats(),
+        "pinned_clients": pinned.stats()["size"],
+        "read_your_writes_seconds": settings.READ_YOUR_WRITES_SECONDS,
+    }
@@ -0,0 +1,42 @@
+"""
+Fast JSON rendering for typed API envelopes
+
+Endpoints that return ORM rows hand them to render() together with their
+typed envelope (schemas.PatientListResponse etc.). The whole page is
+validated in one TypeAdapter call straight from the ORM attributes and
+dumped to JSON bytes by pydantic-core's Rust serializer, which plays the
+part orjson would without another dependency. The returned Response skips
+FastAPI's response_model pass, so each row is validated and serialized once;
+response_model stays on the route for the OpenAPI schema.
+"""
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def adapter(envelope) -> TypeAdapter:
+    """TypeAdapter per envelope type, built once (building one compiles its schema)"""
+    return TypeAdapter(envelope)
+
+
+def render_bytes(envelope, data: Any, message: Optional[str] = None, next_cursor: Optional[str] = None) -> bytes:
+    envelope_adapter = adapter(envelope)
+    value = envelope_adapter.validate_python(
+        {"data": data, "message": message, "success": True, "next_cursor": next_cursor},
+        from_attributes=True,
+    )
+    return envelope_adapter.dump_json(value)
+
+
+def render(envelope, data: Any, message: Optional[str] = None, next_cursor: Optional[str] = None,
+           status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """JSON response for `data` (ORM objects or dicts) wrapped in `envelope`"""
+    return Response(
+        content=render_bytes(envelope, data, message=message, next_cursor=next_cursor),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
@@ -3,9 +3,9 @@ Authentication routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from database import get_db
+from database import get_async_db
 import schemas
 import models
 import auth
@@ -14,11 +14,12 @@ import auth
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
+# async like login: the bcrypt hash is awaited, not waited on by a request thread
 @router.post("/register", response_model=schemas.ApiResponse, status_code=status.HTTP_201_CREATED)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     try:
-        db_user = auth.create_user(db=db, user=user)
+        db_user = await auth.create_user_async(db=db, user=user)
         
         # Create token for immediate login after registration
         access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -45,11 +46,13 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
         )
 
 
+# async so a login waiting on the bcrypt pool holds neither a request thread nor a connection;
+# the user is looked up and the session closed before the hash is awaited
 @router.post("/login", response_model=schemas.ApiResponse)
-def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login user and return JWT token"""
     try:
-        user = auth.authenticate_user(db, user_credentials.email, user_credentials.password)
+        user = await auth.authenticate_user_async(db, user_credentials.email, user_credentials.password)
         
         if not user:
             raise HTTPException(
@@ -93,7 +96,7 @@ def login(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
 
 
 @router.get("/me", response_model=schemas.ApiResponse)
-async def get_current_user_info(current_user: models.User = Depends(auth.get_current_active_user)):
+async def get_current_user_info(current_user: models.User = Depends(auth.get_current_active_user_async)):
     """Get current logged-in user information"""
     return schemas.ApiResponse(
         data=schemas.User.model_validate(current_user),
@@ -102,7 +105,7 @@ async def get_current_user_info(current_user: models.User = Depends(auth.get_cur
 
 
 @router.post("/refresh", response_model=schemas.ApiResponse)
-async def refresh_token(current_user: models.User = Depends(auth.get_current_active_user)):
+async def refresh_token(current_user: models.User = Depends(auth.get_current_active_user_async)):
     """Refresh access token"""
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
@@ -1,8 +1,18 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import AfterValidator, BaseModel, EmailStr, Field
 from datetime import datetime, date, time
-from typing import Optional, List, Any
+# Aliases for annotations in classes that also have `date`/`time` fields,
+# where the field name would otherwise shadow the type
+from datetime import date as date_type, time as time_type
+from typing import Annotated, Generic, Optional, List, Any, TypeVar
 from enum import Enum
 
+from models import canonical_id
+
+
+# Patient/doctor references, canonicalised so they match the ids read back
+# from the database (and the in-memory directory and availability keys)
+EntityId = Annotated[str, AfterValidator(canonical_id)]
+
 
 # Enums
 class GenderEnum(str, Enum):
@@ -123,8 +133,8 @@ class Doctor(DoctorBase):
 
 # Appointment Schemas
 class AppointmentBase(BaseModel):
-    patient_id: str
-    doctor_id: str
+    patient_id: EntityId
+    doctor_id: EntityId
     date: date
     time: time
     reason: str = Field(..., min_length=1)
@@ -136,16 +146,18 @@ class AppointmentCreate(AppointmentBase):
 
 
 class AppointmentUpdate(BaseModel):
-    patient_id: Optional[str] = None
-    doctor_id: Optional[str] = None
-    date: Optional[date] = None
-    time: Optional[time] = None
+    patient_id: Optional[EntityId] = None
+    doctor_id: Optional[EntityId] = None
+    date: Optional[date_type] = None
+    time: Optional[time_type] = None
     reason: Optional[str] = Field(None, min_length=1)
     status: Optional[AppointmentStatusEnum] = None
 
 
 class Appointment(AppointmentBase):
     id: str
+    patient_id: str  # read back canonical; skips the EntityId parse per row
+    doctor_id: str
     patient_name: Optional[str] = None
     doctor_name: Optional[str] = None
     created_at: datetime
@@ -156,14 +168,17 @@ class Appointment(AppointmentBase):
 
 
 # Prescription Schemas
+AttachmentPath = Annotated[str, Field(min_length=1, max_length=512)]
+
+
 class PrescriptionBase(BaseModel):
-    patient_id: str
-    doctor_id: str
+    patient_id: EntityId
+    doctor_id: EntityId
     diagnosis: str = Field(..., min_length=1)
     medications: str = Field(..., min_length=1)
     instructions: Optional[str] = None
     date: date
-    attachments: Optional[List[str]] = None
+    attachments: Optional[List[AttachmentPath]] = None
 
 
 class PrescriptionCreate(PrescriptionBase):
@@ -171,17 +186,19 @@ class PrescriptionCreate(PrescriptionBase):
 
 
 class PrescriptionUpdate(BaseModel):
-    patient_id: Optional[str] = None
-    doctor_id: Optional[str] = None
+    patient_id: Optional[EntityId] = None
+    doctor_id: Optional[EntityId] = None
     diagnosis: Optional[str] = Field(None, min_length=1)
     medications: Optional[str] = Field(None, min_length=1)
     instructions: Optional[str] = None
-    date: Optional[date] = None
-    attachments: Optional[List[str]] = None
+    date: Optional[date_type] = None
+    attachments: Optional[List[AttachmentPath]] = None
 
 
 class Prescription(PrescriptionBase):
     id: str
+    patient_id: str  # read back canonical; skips the EntityId parse per row
+    doctor_id: str
     patient_name: Optional[str] = None
     doctor_name: Optional[str] = None
     created_at: datetime
@@ -191,6 +208,18 @@ class Prescription(PrescriptionBase):
         from_attributes = True
 
 
+class PrescriptionAttachment(BaseModel):
+    id: str
+    prescription_id: str
+    position: int
+    path: str
+    content_type: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 # Dashboard Schema
 class DashboardStats(BaseModel):
     total_patients: int
@@ -200,8 +229,24 @@ class DashboardStats(BaseModel):
 
 
 # API Response Schema
-class ApiResponse(BaseModel):
-    data: Any
+DataT = TypeVar("DataT")
+
+
+class ApiResponse(BaseModel, Generic[DataT]):
+    """Response envelope; `data` is Any unless parameterized, e.g. ApiResponse[List[Patient]]"""
+    data: DataT
     message: Optional[str] = None
     success: bool = True
-
+    next_cursor: Optional[str] = None  # Set on list responses when another page exists
+
+
+# Typed envelopes, rendered by responses.render
+PatientResponse = ApiResponse[Patient]
+PatientListResponse = ApiResponse[List[Patient]]
+DoctorResponse = ApiResponse[Doctor]
+DoctorListResponse = ApiResponse[List[Doctor]]
+AppointmentResponse = ApiResponse[Appointment]
+AppointmentListResponse = ApiResponse[List[Appointment]]
+PrescriptionResponse = ApiResponse[Prescription]
+PrescriptionListResponse = ApiResponse[List[Prescription]]
+PrescriptionAttachmentListResponse = ApiResponse[List[PrescriptionAttachment]]
@@ -0,0 +1,121 @@
+"""
+Full-text search over patient records
+
+MySQL uses a FULLTEXT index on (name, contact, medical_history) queried with
+MATCH ... AGAINST in boolean mode. SQLite, the local stand-in, uses an FTS5
+external-content table kept in sync with triggers and ranked with bm25().
+Other databases fall back to an unranked LIKE scan.
+"""
+import re
+from typing import List, Tuple
+
+from sqlalchemy import Float, inspect, or_, select, text
+from sqlalchemy.orm import Session
+
+from database import engine
+import models
+
+
+FULLTEXT_INDEX = "ft_patients_search"
+FTS_TABLE = "patients_fts"
+SEARCH_COLUMNS = ("name", "contact", "medical_history")
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def index_exists(conn) -> bool:
+    """Whether the dialect's full-text index for patients is in place (always true for LIKE fallback)"""
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        return FULLTEXT_INDEX in {index["name"] for index in inspect(conn).get_indexes("patients")}
+    if dialect == "sqlite":
+        return conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+        ).first() is not None
+    return True
+
+
+def create_index(conn) -> None:
+    """Create the full-text index on an open connection if it is missing (used by migration 0006)"""
+    if index_exists(conn):
+        return
+    dialect = conn.dialect.name
+    if dialect == "mysql":
+        conn.execute(text(
+            f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON patients ({', '.join(SEARCH_COLUMNS)})"
+        ))
+    elif dialect == "sqlite":
+        columns = ", ".join(SEARCH_COLUMNS)
+        new_columns = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+        old_columns = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({columns}, content='patients', content_rowid='rowid')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON patients BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.rowid, {new_columns}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON patients BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.rowid, {old_columns}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON patients BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.rowid, {old_columns}); "
+            f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.rowid, {new_columns}); END"
+        ))
+        # Index rows that existed before the FTS table
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def ensure_index(bind=engine) -> None:
+    """Create the dialect's full-text index for patients if it is missing (idempotent)"""
+    with bind.begin() as conn:
+        create_index(conn)
+
+
+def tokenize(query: str) -> List[str]:
+    return _TOKEN.findall(query.lower())
+
+
+def _ranked_ids(db: Session, tokens: List[str], skip: int, limit: int) -> List[Tuple[str, float]]:
+    dialect = db.get_bind().dialect.name
+    params = {"skip": skip, "limit": limit}
+    if dialect == "mysql":
+        # Every term must match; trailing * allows prefix (type-ahead) matches
+        params["q"] = " ".join(f"+{token}*" for token in tokens)
+        match = f"MATCH ({', '.join(SEARCH_COLUMNS)}) AGAINST (:q IN BOOLEAN MODE)"
+        rows = db.execute(text(
+            f"SELECT id, {match} AS score FROM patients WHERE {match} "
+            f"ORDER BY score DESC, id LIMIT :limit OFFSET :skip"
+        ).columns(id=models.UUIDBinary(), score=Float()), params).all()
+        return [(row.id, float(row.score)) for row in rows]
+    if dialect == "sqlite":
+        params["q"] = " ".join(f'"{token}"*' for token in tokens)
+        # bm25() is lower-is-better; negate so higher scores rank first everywhere
+        rows = db.execute(text(
+            f"SELECT p.id AS id, -bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} "
+            f"JOIN patients p ON p.rowid = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :q ORDER BY score DESC, p.id LIMIT :limit OFFSET :skip"
+        ).columns(id=models.UUIDBinary(), score=Float()), params).all()
+        return [(row.id, float(row.score)) for row in rows]
+    columns = [getattr(models.Patient, column) for column in SEARCH_COLUMNS]
+    statement = select(models.Patient.id).order_by(models.Patient.id).offset(skip).limit(limit)
+    for token in tokens:
+        statement = statement.where(or_(*[column.ilike(f"%{token}%") for column in columns]))
+    return [(patient_id, 0.0) for patient_id in db.execute(statement).scalars()]
+
+
+def search_patients(db: Session, query: str, skip: int = 0, limit: int = 20) -> List[models.Patient]:
+    """Patients matching every term of `query`, best match first"""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    ranked = _ranked_ids(db, tokens, skip, limit)
+    if not ranked:
+        return []
+    patients = {
+        patient.id: patient
+        for patient in db.query(models.Patient).filter(models.Patient.id.in_([patient_id for patient_id, _ in ranked]))
+    }
+    return [patients[patient_id] for patient_id, _ in ranked if patient_id in patients]
@@ -1,202 +1,376 @@
 """
-Seed script to populate the database with sample data
+Synthetic data generator
+
+Usage:
+    python seed_data.py [--patients 200] [--doctors 20] [--appointments 1000] [--prescriptions 500]
+                        [--seed 42] [--chunk-size 5000] [--parallel] [--append]
+                        [--history-days 730] [--future-days 60] [--patient-skew 2.0]
+                        [--age-mean 42] [--age-stddev 18] [--gender-weights Female=50,Male=48,Other=2]
+                        [--cancel-rate 0.1] [--attachments-mean 0.8]
+
+Generates realistic patients, doctors, appointments and prescriptions and
+writes them with chunked multi-row Core INSERTs (one transaction per chunk),
+then recounts the dashboard counters. Output is deterministic for a given
+--seed, sizes and day (dates are relative to today): every chunk draws from its own generator seeded with
+(seed, table, chunk), and ids are UUIDv7 values built from each row's
+creation time and a hash of (seed, table, row number), so child rows compute
+their parents' ids instead of holding millions of them in memory. With
+--parallel, tables that do not depend on each other are written at the same
+time (doctors with patients, then appointments with prescriptions); that
+helps on MySQL, while SQLite serializes writers and always runs one table at
+a time.
+
+Appointments take distinct doctor slots (a fixed permutation of every slot in
+the --history-days/--future-days window), so the booking constraint always
+holds; past ones are Completed or Cancelled, future ones Scheduled or
+Cancelled. --patient-skew > 1 concentrates visits and prescriptions on fewer
+patients, as in real practices. Rows per second are reported per table.
+
+With no arguments the database gets a small demo dataset (seed 42), and
+seeding is skipped if patients already exist (pass --append to add more
+anyway; without --seed an append picks a time-based seed so its ids do not
+collide with earlier runs). Attachment rows are reported as their own table.
+Doctor inserts bump the doctor directory's version counter in the same
+transaction, so running workers reload /api/doctors.
 """
-from sqlalchemy.orm import Session
-from database import SessionLocal, init_db
+import argparse
+import hashlib
+import math
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, select
+
+from database import SessionLocal, engine, init_db
+import availability
+import counters
+import directory
 import models
-from datetime import date, time
 
+FIRST_NAMES = (
+    "James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+    "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Amina", "Wanjiru", "Otieno", "Achieng", "Kamau", "Njeri", "Mohamed", "Fatuma", "Baraka", "Zawadi",
+)
+LAST_NAMES = (
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Wilson", "Anderson", "Taylor", "Thomas", "Moore", "Mwangi", "Odhiambo", "Kariuki", "Wambui", "Omondi",
+)
+STREETS = ("Main St", "Oak Ave", "Pine Rd", "Elm St", "Cedar Ln", "Maple Dr", "Hospital Rd", "Kenyatta Ave")
+CITIES = ("Nairobi", "Mombasa", "Kisumu", "Nakuru", "Eldoret", "Springfield", "Riverside")
+SPECIALIZATIONS = {
+    "General Medicine": 30, "Pediatrics": 12, "Cardiology": 8, "Orthopedics": 8, "Obstetrics": 8,
+    "Dermatology": 6, "Neurology": 5, "Psychiatry": 5, "Oncology": 4, "Ophthalmology": 4,
+    "ENT": 4, "Endocrinology": 3, "Urology": 3,
+}
+CONDITIONS = (
+    ("Hypertension", "Amlodipine 5mg - Once daily", "Monitor blood pressure daily."),
+    ("Type 2 Diabetes", "Metformin 500mg - Twice daily", "Take with meals. Check glucose each morning."),
+    ("Asthma", "Salbutamol inhaler - As needed", "Use before exercise. Avoid known triggers."),
+    ("Upper respiratory infection", "Amoxicillin 500mg - Three times daily for 7 days", "Finish the course."),
+    ("Migraine", "Sumatriptan 50mg - At onset", "Rest in a dark room. Keep a headache diary."),
+    ("High cholesterol", "Atorvastatin 20mg - Once daily at bedtime", "Low-fat diet. Recheck lipids in 3 months."),
+    ("Malaria", "Artemether/Lumefantrine - Twice daily for 3 days", "Take with fatty food. Return if fever persists."),
+    ("Lower back pain", "Ibuprofen 400mg - Three times daily", "Gentle stretching. Avoid heavy lifting."),
+    ("Gastritis", "Omeprazole 20mg - Once daily before breakfast", "Avoid spicy food and alcohol."),
+    ("Anxiety", "Sertraline 50mg - Once daily", "Follow up in 4 weeks."),
+)
+HISTORY = (None, None, "Hypertension", "Asthma", "Type 2 Diabetes", "Allergic to penicillin", "Previous appendectomy")
+REASONS = (
+    "Routine checkup", "Follow-up visit", "Blood pressure review", "Persistent cough", "Lab results review",
+    "Prescription renewal", "Chest pain", "Back pain", "Skin rash", "Prenatal visit", "Vaccination",
+)
+ATTACHMENT_KINDS = (("labs", "pdf"), ("scans", "png"), ("xrays", "jpg"), ("referrals", "pdf"))
+DEFAULT_SEED = 42
+ATTACHMENTS = "attachments"  # Report key for prescription attachment rows
 
-def seed_database():
-    """Populate database with sample data"""
-    
-    # Initialize database
-    init_db()
-    
-    db: Session = SessionLocal()
-    
-    try:
-        # Check if data already exists
-        if db.query(models.Patient).first():
-            print("⚠️  Database already contains data. Skipping seed.")
-            return
-        
-        print("🌱 Seeding database...")
-        
-        # Create Doctors
-        doctors = [
-            models.Doctor(
-                name="Sarah Williams",
-                specialization="Cardiology",
-                contact="+1234560001",
-                email="sarah.williams@hospital.com"
-            ),
-            models.Doctor(
-                name="Michael Brown",
-                specialization="General Medicine",
-                contact="+1234560002",
-                email="michael.brown@hospital.com"
-            ),
-            models.Doctor(
-                name="Lisa Anderson",
-                specialization="Neurology",
-                contact="+1234560003",
-                email="lisa.anderson@hospital.com"
-            ),
-            models.Doctor(
-                name="James Wilson",
-                specialization="Orthopedics",
-                contact="+1234560004",
-                email="james.wilson@hospital.com"
-            ),
-        ]
-        
-        db.add_all(doctors)
-        db.commit()
-        print("✅ Added 4 doctors")
-        
-        # Create Patients
-        patients = [
-            models.Patient(
-                name="John Doe",
-                age=35,
-                gender="Male",
-                contact="+1234567890",
-                address="123 Main St, City, State",
-                medical_history="Hypertension, Type 2 Diabetes"
-            ),
-            models.Patient(
-                name="Jane Smith",
-                age=28,
-                gender="Female",
-                contact="+1234567891",
-                address="456 Oak Ave, City, State",
-                medical_history="Asthma"
-            ),
-            models.Patient(
-                name="Robert Johnson",
-                age=52,
-                gender="Male",
-                contact="+1234567892",
-                address="789 Pine Rd, City, State",
-                medical_history="Heart Disease, High Cholesterol"
-            ),
-            models.Patient(
-                name="Emily Davis",
-                age=41,
-                gender="Female",
-                contact="+1234567893",
-                address="321 Elm St, City, State",
-                medical_history="Migraine, Anxiety"
-            ),
-        ]
-        
-        db.add_all(patients)
-        db.commit()
-        print("✅ Added 4 patients")
-        
-        # Refresh to get IDs
-        for doctor in doctors:
-            db.refresh(doctor)
-        for patient in patients:
-            db.refresh(patient)
-        
-        # Create Appointments
-        appointments = [
-            models.Appointment(
-                patient_id=patients[0].id,
-                doctor_id=doctors[0].id,
-                date=date(2024, 10, 25),
-                time=time(10, 0),
-                reason="Regular checkup for hypertension",
-                status="Scheduled"
-            ),
-            models.Appointment(
-                patient_id=patients[1].id,
-                doctor_id=doctors[1].id,
-                date=date(2024, 10, 24),
-                time=time(14, 30),
-                reason="Asthma follow-up",
-                status="Scheduled"
-            ),
-            models.Appointment(
-                patient_id=patients[2].id,
-                doctor_id=doctors[0].id,
-                date=date(2024, 10, 20),
-                time=time(11, 0),
-                reason="Cardiac consultation",
-                status="Completed"
-            ),
-            models.Appointment(
-                patient_id=patients[3].id,
-                doctor_id=doctors[2].id,
-                date=date(2024, 10, 26),
-                time=time(15, 0),
-                reason="Migraine treatment",
-                status="Scheduled"
-            ),
-        ]
-        
-        db.add_all(appointments)
-        db.commit()
-        print("✅ Added 4 appointments")
-        
-        # Create Prescriptions
-        prescriptions = [
-            models.Prescription(
-                patient_id=patients[0].id,
-                doctor_id=doctors[0].id,
-                diagnosis="Hypertension",
-                medications="Lisinopril 10mg - Once daily, Amlodipine 5mg - Once daily",
-                instructions="Take medications with food. Monitor blood pressure daily.",
-                date=date(2024, 10, 20)
-            ),
-            models.Prescription(
-                patient_id=patients[1].id,
-                doctor_id=doctors[1].id,
-                diagnosis="Acute Asthma Exacerbation",
-                medications="Albuterol inhaler - As needed, Fluticasone 250mcg - Twice daily",
-                instructions="Use rescue inhaler for breathing difficulty. Avoid allergens.",
-                date=date(2024, 10, 18)
-            ),
-            models.Prescription(
-                patient_id=patients[2].id,
-                doctor_id=doctors[0].id,
-                diagnosis="High Cholesterol",
-                medications="Atorvastatin 20mg - Once daily at bedtime",
-                instructions="Follow low-cholesterol diet. Exercise regularly. Recheck lipids in 3 months.",
-                date=date(2024, 10, 20)
-            ),
-        ]
-        
-        db.add_all(prescriptions)
-        db.commit()
-        print("✅ Added 3 prescriptions")
-        
-        print("🎉 Database seeded successfully!")
-        
-    except Exception as e:
-        print(f"❌ Error seeding database: {e}")
-        db.rollback()
-    finally:
-        db.close()
 
+@dataclass
+class Config:
+    patients: int = 200
+    doctors: int = 20
+    appointments: int = 1000
+    prescriptions: int = 500
+    seed: Optional[int] = None  # None: DEFAULT_SEED, or a time-based seed when appending
+    chunk_size: int = 5000
+    parallel: bool = False
+    history_days: int = 730  # Appointments and prescriptions reach this far back
+    future_days: int = 60  # ...and appointments this far ahead
+    patient_skew: float = 2.0  # 1 = every patient equally active; higher = visits concentrate on fewer patients
+    age_mean: float = 42
+    age_stddev: float = 18
+    gender_weights: Dict[str, float] = field(default_factory=lambda: {"Female": 50, "Male": 48, "Other": 2})
+    cancel_rate: float = 0.1  # Share of appointments that are cancelled
+    attachments_mean: float = 0.8  # Average attachments per prescription (0-3 each)
 
-if __name__ == "__main__":
-    seed_database()
 
+@dataclass
+class TableReport:
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class Generator:
+    """Deterministic rows for one Config; row i of a table is the same on every run"""
+
+    def __init__(self, config: Config):
+        if config.seed is None:
+            config = replace(config, seed=DEFAULT_SEED)
+        self.config = config
+        self.today = date.today()
+        # Rows are "created" between start and today's midnight, in row order within each table
+        self.now = datetime.combine(self.today, datetime.min.time())
+        self.start = self.now - timedelta(days=config.history_days)
+        self.start_ms = int(self.start.replace(tzinfo=timezone.utc).timestamp() * 1000)
+        self.span_ms = config.history_days * 86_400_000
+        self.first_day = self.today - timedelta(days=config.history_days)
+        days = config.history_days + config.future_days + 1
+        self.slots = config.doctors * days * availability.SLOTS_PER_DAY
+        if config.appointments > self.slots:
+            raise ValueError(
+                f"{config.appointments} appointments do not fit in {self.slots} doctor slots; "
+                f"add doctors or widen --history-days/--future-days"
+            )
+        # Any stride coprime to the slot count visits every slot exactly once
+        self.stride = max(1, int(self.slots * 0.6180339887))
+        while math.gcd(self.stride, self.slots) != 1:
+            self.stride += 1
+        self.slot_times = [datetime.strptime(label, "%H:%M").time() for label in availability.SLOT_LABELS]
+        self.genders = list(config.gender_weights)
+        self.gender_weights = list(config.gender_weights.values())
+        self.specializations = list(SPECIALIZATIONS)
+        self.specialization_weights = list(SPECIALIZATIONS.values())
 
+    # ---- ids and time ----
+    def created_ms(self, table: str, index: int) -> int:
+        return self.start_ms + self.span_ms * index // (getattr(self.config, table) or 1)
 
+    def created_at(self, table: str, index: int) -> datetime:
+        return self.start + timedelta(milliseconds=self.created_ms(table, index) - self.start_ms)
 
+    def row_id(self, table: str, index: int) -> str:
+        """UUIDv7 for row `index` of `table`: creation time in ms plus hashed bits"""
+        digest = hashlib.blake2b(f"{self.config.seed}:{table}:{index}".encode(), digest_size=8).digest()
+        value = (self.created_ms(table, index) << 80) | (0x7 << 76) | ((index & 0xFFF) << 64) | (0b10 << 62) | \
+            (int.from_bytes(digest, "big") >> 2)
+        h = f"{value:032x}"
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
 
+    def rng(self, table: str, chunk: int) -> random.Random:
+        return random.Random(f"{self.config.seed}:{table}:{chunk}")
 
+    def active_patient(self, rng: random.Random) -> str:
+        # u ** skew piles up near 0, so low-numbered patients come back more often
+        index = int(self.config.patients * rng.random() ** self.config.patient_skew)
+        return self.row_id("patients", min(index, self.config.patients - 1))
 
+    # ---- rows ----
+    def doctors(self, rng: random.Random, index: int) -> dict:
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        return {
+            "id": self.row_id("doctors", index),
+            "name": f"Dr. {first} {last}",
+            "specialization": rng.choices(self.specializations, self.specialization_weights)[0],
+            "contact": f"+2547{index % 100_000_000:08d}",
+            # Index and seed keep emails unique however the names repeat, also across --append runs
+            "email": f"{first}.{last}.{index}.{self.config.seed}@hospital.example".lower(),
+        }
 
+    def patients(self, rng: random.Random, index: int) -> dict:
+        age = int(rng.gauss(self.config.age_mean, self.config.age_stddev))
+        return {
+            "id": self.row_id("patients", index),
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "age": min(max(age, 1), 110),
+            "gender": rng.choices(self.genders, self.gender_weights)[0],
+            "contact": f"+2541{index % 100_000_000:08d}",
+            "address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {rng.choice(CITIES)}",
+            "medical_history": rng.choice(HISTORY),
+        }
 
+    def appointments(self, rng: random.Random, index: int) -> dict:
+        slot = (index * self.stride + self.config.seed) % self.slots
+        doctor, day_slot = slot % self.config.doctors, slot // self.config.doctors
+        day = self.first_day + timedelta(days=day_slot // availability.SLOTS_PER_DAY)
+        if rng.random() < self.config.cancel_rate:
+            status = "Cancelled"
+        else:
+            status = "Completed" if day < self.today else "Scheduled"
+        return {
+            "id": self.row_id("appointments", index),
+            "patient_id": self.active_patient(rng),
+            "doctor_id": self.row_id("doctors", doctor),
+            "date": day,
+            "time": self.slot_times[day_slot % availability.SLOTS_PER_DAY],
+            "reason": rng.choice(REASONS),
+            "status": status,
+        }
 
+    def prescriptions(self, rng: random.Random, index: int) -> dict:
+        diagnosis, medications, instructions = rng.choice(CONDITIONS)
+        return {
+            "id": self.row_id("prescriptions", index),
+            "patient_id": self.active_patient(rng),
+            "doctor_id": self.row_id("doctors", rng.randrange(self.config.doctors)),
+            "diagnosis": diagnosis,
+            "medications": medications,
+            "instructions": instructions,
+            "date": self.first_day + timedelta(days=rng.randrange(self.config.history_days + 1)),
+        }
 
+    def attachments(self, rng: random.Random, prescription: dict, created_at: datetime) -> List[dict]:
+        mean = self.config.attachments_mean
+        count = sum(rng.random() < mean / 3 for _ in range(3)) if mean > 0 else 0
+        rows = []
+        for position in range(count):
+            folder, extension = rng.choice(ATTACHMENT_KINDS)
+            path = f"{folder}/{prescription['date']:%Y/%m}/{prescription['id'][:8]}-{position}.{extension}"
+            rows.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "prescription_id": prescription["id"],
+                "position": position,
+                "path": path,
+                "content_type": models.guess_content_type(path),
+                "created_at": created_at,
+            })
+        return rows
 
+    # ---- writing ----
+    def write(self, table: str) -> Dict[str, TableReport]:
+        """Insert every row of `table` (and prescriptions' attachments), one transaction per chunk"""
+        model = {"patients": models.Patient, "doctors": models.Doctor, "appointments": models.Appointment,
+                 "prescriptions": models.Prescription}[table]
+        make_row = getattr(self, table)
+        total = getattr(self.config, table)
+        chunk_size = self.config.chunk_size
+        started = time.perf_counter()
+        written = attached = 0
+        for chunk, first in enumerate(range(0, total, chunk_size)):
+            rng = self.rng(table, chunk)
+            rows, children = [], []
+            for index in range(first, min(first + chunk_size, total)):
+                row = make_row(rng, index)
+                row["created_at"] = row["updated_at"] = self.created_at(table, index)
+                rows.append(row)
+                if table == "prescriptions":
+                    children.extend(self.attachments(rng, row, row["created_at"]))
+            with engine.begin() as conn:
+                conn.execute(insert(model.__table__), rows)
+                if children:
+                    conn.execute(insert(models.PrescriptionAttachment.__table__), children)
+                if table == "doctors":
+                    # Core inserts skip the ORM events that tell workers to reload the directory
+                    counters.bump(conn, directory.VERSION_COUNTER)
+            written += len(rows)
+            attached += len(children)
+        seconds = time.perf_counter() - started
+        reports = {table: TableReport(written, seconds)}
+        if table == "prescriptions":
+            reports[ATTACHMENTS] = TableReport(attached, seconds)
+        return reports
 
 
+def generate(config: Config) -> Dict[str, TableReport]:
+    """Write the dataset described by `config` and recount the dashboard counters"""
+    generator = Generator(config)
+    # Parents first: appointments and prescriptions reference doctors and patients
+    phases = [("doctors", "patients"), ("appointments", "prescriptions")]
+    parallel = config.parallel and engine.dialect.name != "sqlite"
+    reports: Dict[str, TableReport] = {}
+    for phase in phases:
+        tables = [table for table in phase if getattr(config, table)]
+        if parallel and len(tables) > 1:
+            with ThreadPoolExecutor(max_workers=len(tables)) as pool:
+                written = {}
+                for table_reports in pool.map(generator.write, tables):
+                    written.update(table_reports)
+        else:
+            written = {}
+            for table in tables:
+                written.update(generator.write(table))
+        reports.update(written)
+        for table, report in written.items():
+            print(f"✅ {table:<14} {report.rows:>10,} rows in {report.seconds:7.1f}s "
+                  f"({report.rows_per_second:,.0f} rows/s)")
+    db = SessionLocal()
+    try:
+        counters.reconcile(db)
+    finally:
+        db.close()
+    return reports
+
 
+def parse_weights(value: str) -> Dict[str, float]:
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - {"Male", "Female", "Other"}
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown gender(s): {', '.join(sorted(unknown))}")
+    return weights
 
+
+def parse_args():
+    defaults = Config()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=defaults.patients)
+    parser.add_argument("--doctors", type=int, default=defaults.doctors)
+    parser.add_argument("--appointments", type=int, default=defaults.appointments)
+    parser.add_argument("--prescriptions", type=int, default=defaults.prescriptions)
+    parser.add_argument("--seed", type=int, default=None,
+                        help=f"Same seed and sizes give the same data (default {DEFAULT_SEED}; time-based with --append)")
+    parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size, help="Rows per INSERT transaction")
+    parser.add_argument("--parallel", action="store_true", help="Write independent tables concurrently (not on SQLite)")
+    parser.add_argument("--append", action="store_true", help="Seed even if the database already has patients")
+    parser.add_argument("--history-days", type=int, default=defaults.history_days)
+    parser.add_argument("--future-days", type=int, default=defaults.future_days)
+    parser.add_argument("--patient-skew", type=float, default=defaults.patient_skew)
+    parser.add_argument("--age-mean", type=float, default=defaults.age_mean)
+    parser.add_argument("--age-stddev", type=float, default=defaults.age_stddev)
+    parser.add_argument("--gender-weights", type=parse_weights, default=defaults.gender_weights)
+    parser.add_argument("--cancel-rate", type=float, default=defaults.cancel_rate)
+    parser.add_argument("--attachments-mean", type=float, default=defaults.attachments_mean)
+    args = parser.parse_args()
+    append = args.append
+    del args.append
+    return Config(**vars(args)), append
+
+
+def seed_database(config: Config = None, append: bool = False):
+    """Populate the database with synthetic data; returns the per-table reports (True if skipped)"""
+    config = config or Config()
+    init_db()
+    db = SessionLocal()
+    try:
+        has_data = db.execute(select(models.Patient.id).limit(1)).first() is not None
+    finally:
+        db.close()
+    if has_data and not append:
+        print("⚠️  Database already contains data. Skipping seed (use --append to add more).")
+        return True
+
+    if config.seed is None:
+        # Appending with the default seed would regenerate the ids already there
+        config.seed = int(time.time()) if append else DEFAULT_SEED
+    print(f"🌱 Seeding {config.doctors:,} doctors, {config.patients:,} patients, "
+          f"{config.appointments:,} appointments, {config.prescriptions:,} prescriptions (seed {config.seed})...")
+    started = time.perf_counter()
+    reports = generate(config)
+    elapsed = time.perf_counter() - started
+    rows = sum(report.rows for report in reports.values())
+    print(f"🎉 Database seeded: {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    return reports
+
+
+if __name__ == "__main__":
+    seed_database(*parse_args())
@@ -0,0 +1,81 @@
+"""
+Startup timing and background warm-up
+
+main.py imports this module first, so the time from here to the first
+startup hook is the cost of importing the application. Startup phases
+(schema creation or check) are timed with `report.phase()` and printed as one
+line once the worker can serve /health. Work that only speeds up the first
+real requests - opening pool connections, loading the bcrypt backend,
+importing the JWT library - runs afterwards in the background through
+`report.warm_up()` and is reported separately, so it never delays /health.
+"""
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+
+IMPORTED_AT = time.perf_counter()
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f} ms"
+
+
+class StartupReport:
+    """Time spent per startup and warm-up phase (this worker)"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.phases: Dict[str, float] = {}
+        self.ready_seconds: Optional[float] = None
+        self.warmup: Dict[str, float] = {}
+        self.warmup_errors: Dict[str, str] = {}
+        self.warmup_done = False
+        # Outcome of the schema step: created, current, outdated or unknown (it failed)
+        self.schema: Dict[str, Optional[str]] = {"status": "unknown"}
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def mark_ready(self) -> str:
+        """Record time since import and return the breakdown line for the log"""
+        self.ready_seconds = time.perf_counter() - self.started
+        parts = ", ".join(f"{name} {_ms(seconds)}" for name, seconds in self.phases.items())
+        return f"⏱️  Startup took {_ms(self.ready_seconds)} ({parts})"
+
+    def warm_up(self, steps: Dict[str, Callable[[], object]]) -> str:
+        """Run each step, timing it; failures are recorded, not raised"""
+        for name, step in steps.items():
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self.warmup_errors[name] = f"{type(e).__name__}: {e}".splitlines()[0]
+            self.warmup[name] = time.perf_counter() - started
+        self.warmup_done = True
+        parts = ", ".join(
+            f"{name} {_ms(seconds)}{' (failed)' if name in self.warmup_errors else ''}"
+            for name, seconds in self.warmup.items()
+        )
+        return f"🔥 Warm-up took {_ms(sum(self.warmup.values()))} ({parts})"
+
+    def as_dict(self) -> dict:
+        return {
+            "ready_ms": round(self.ready_seconds * 1000, 1) if self.ready_seconds is not None else None,
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+            "schema": self.schema,
+            "warmup_done": self.warmup_done,
+            "warmup_ms": {name: round(seconds * 1000, 1) for name, seconds in self.warmup.items()},
+            "warmup_errors": self.warmup_errors,
+        }
+
+
+report = StartupReport(IMPORTED_AT)
@@ -0,0 +1,149 @@
+"""
+Concurrent booking stress test
+
+Usage:
+    python stress_booking.py [--workers 16] [--doctors 20] [--contention 8] [--database-url mysql+pymysql://...]
+
+Many threads book the same doctor slots at the same moment through
+crud.create_appointment, the code path behind POST /api/appointments. Every
+slot is attempted --contention times by different workers. The run passes
+when each slot ends up with exactly one live appointment, every other
+attempt got a BookingConflict, and the database holds no double bookings.
+Defaults to a throwaway SQLite file; point --database-url at a scratch MySQL
+database to exercise real row-level concurrency.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as time_type, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=16, help="Concurrent booking threads")
+    parser.add_argument("--doctors", type=int, default=20, help="Doctors whose day is being booked")
+    parser.add_argument("--contention", type=int, default=8, help="Booking attempts per slot")
+    parser.add_argument("--database-url", default=None, help="Database to test (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def seed(engine, models, doctors: int):
+    from sqlalchemy import insert
+
+    now = datetime.utcnow()
+    doctor_ids = [str(uuid.uuid4()) for _ in range(doctors)]
+    patient_ids = [str(uuid.uuid4()) for _ in range(50)]
+    with engine.begin() as conn:
+        conn.execute(insert(models.Doctor.__table__), [
+            {"id": doctor_id, "name": f"Stress Doctor {i}", "specialization": "General", "contact": f"+1000{i:06d}",
+             "email": f"stress-{doctor_id[:8]}@example.com", "created_at": now, "updated_at": now}
+            for i, doctor_id in enumerate(doctor_ids)
+        ])
+        conn.execute(insert(models.Patient.__table__), [
+            {"id": patient_id, "name": f"Stress Patient {i}", "age": 30, "gender": "Other",
+             "contact": f"+2000{i:06d}", "address": "Stress St", "created_at": now, "updated_at": now}
+            for i, patient_id in enumerate(patient_ids)
+        ])
+    return doctor_ids, patient_ids
+
+
+def main():
+    args = parse_args()
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'stress_booking.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DEBUG"] = "False"
+
+    from sqlalchemy import func, select
+
+    import availability
+    import crud
+    import models
+    import schemas
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    doctor_ids, patient_ids = seed(engine, models, args.doctors)
+    day = date.today() + timedelta(days=random.randint(30, 365))
+    slots = [
+        (doctor_id, time_type((availability.DAY_START + i * availability.SLOT_MINUTES) // 60,
+                              (availability.DAY_START + i * availability.SLOT_MINUTES) % 60))
+        for doctor_id in doctor_ids
+        for i in range(availability.SLOTS_PER_DAY)
+    ]
+    attempts = [slot for slot in slots for _ in range(args.contention)]
+    random.Random(3).shuffle(attempts)
+
+    print("=" * 60)
+    print("Concurrent Booking Stress Test")
+    print("=" * 60)
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    print(f"{len(slots)} slots x {args.contention} attempts = {len(attempts)} bookings, {args.workers} workers\n")
+
+    outcomes = Counter()
+    outcomes_lock = threading.Lock()
+    start_line = threading.Barrier(args.workers)
+    local = threading.local()
+
+    def book(slot):
+        if not getattr(local, "ready", False):
+            # Line every worker up so the first wave of attempts collides
+            local.ready = True
+            start_line.wait()
+        doctor_id, at = slot
+        db = SessionLocal()
+        try:
+            crud.create_appointment(db, schemas.AppointmentCreate(
+                patient_id=random.choice(patient_ids), doctor_id=doctor_id, date=day, time=at, reason="Stress"))
+            outcome = "booked"
+        except crud.BookingConflict:
+            outcome = "conflict"
+        except Exception as e:
+            outcome = f"error: {type(e).__name__}: {str(e).splitlines()[0]}"
+        finally:
+            db.close()
+        with outcomes_lock:
+            outcomes[outcome] += 1
+
+    # Give each worker at least one attempt so the start barrier can open
+    attempts = attempts if len(attempts) >= args.workers else attempts * args.workers
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(book, attempts))
+    elapsed = time.perf_counter() - started
+
+    with engine.connect() as conn:
+        double_booked = conn.execute(
+            select(models.Appointment.doctor_id, models.Appointment.time, func.count())
+            .where(models.Appointment.date == day, models.Appointment.status != "Cancelled")
+            .group_by(models.Appointment.doctor_id, models.Appointment.time)
+            .having(func.count() > 1)
+        ).all()
+        live = conn.execute(
+            select(func.count()).select_from(models.Appointment)
+            .where(models.Appointment.date == day, models.Appointment.status != "Cancelled")
+        ).scalar()
+
+    errors = {outcome: count for outcome, count in outcomes.items() if outcome.startswith("error")}
+    print(f"Booked:        {outcomes['booked']:8d}")
+    print(f"Conflicts 409: {outcomes['conflict']:8d}")
+    for outcome, count in errors.items():
+        print(f"{outcome[:60]}: {count}")
+    print(f"Double-booked: {len(double_booked):8d}")
+    print(f"\nAttempts/s:    {len(attempts) / elapsed:8.0f}")
+    print(f"Bookings/s:    {outcomes['booked'] / elapsed:8.0f}   ({elapsed:.2f}s)")
+
+    if double_booked or errors or live != len(slots) or outcomes["booked"] != len(slots):
+        print(f"\n❌ Expected {len(slots)} bookings and no double bookings; database holds {live} live appointments")
+        sys.exit(1)
+    print("\n✅ Every slot booked exactly once")
+
+
+if __name__ == "__main__":
+    main()